@@ -5,11 +5,13 @@ Surveille l'état de Homebox et Neron avec notifications Telegram
 """
 
 import asyncio
+import html
 import logging
 import sys
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Set
 from pathlib import Path
 import signal
 
@@ -18,21 +20,38 @@ sys.path.insert(0, str(Path(__file__).parent.absolute()))
 
 from src.checkers.homebox import HomeboxChecker
 from src.checkers.neron import NeronChecker
-from src.notifiers.telegram import TelegramNotifier
+from src.checkers.homebox_api import HomeboxAPIChecker
+from src.checkers.tls import TLSChecker
+from src.checkers.backoff import ProbeBackoff
+from src.notifiers.pipeline import build_pipeline
+from src.notifiers.commands import TelegramCommandBot
 from src.database.history import HistoryManager
+from src.database.coordination import LeaseCoordinator, create_backend
+from src.database.cli import export_command, history_command
+from src.replay import replay_command
+from src.resources import LABELS, ResourceSampler, format_metric, resources_command, tracemalloc_report
+from src.workers.pool import ProbeWorkerPool
+from src.checkers.tracing import diagnose_phases, format_phases
+from src.analysis.baselines import LatencyBaselines
+from src.scheduler import ReportScheduler, Schedule
+from src.state import ROLLUP_HOURS, StatusSnapshot, format_duration
+from src.web.events import EventBroker
+from src.web.status import StatusServer, service_payload
+from src.checkpoint import read_checkpoint, result_from_dict, result_to_dict, write_checkpoint
 from src.config import Config
+from src.logging_setup import setup_logging, stop_logging
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/control-plane.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Cible de coordination réservée au rapport quotidien (une seule instance l'envoie)
+REPORT_TARGET = "__rapport__"
+
+# Cible de coordination réservée à la rétention (archivage + suppression)
+RETENTION_TARGET = "__retention__"
+
+# Intervalle d'enregistrement des références de latence (secondes)
+BASELINE_SAVE_INTERVAL = 900
+
 
 class ServiceStatus:
     """Représente l'état d'un service"""
@@ -56,52 +75,396 @@ class ControlPlane:
     
     def __init__(self):
         self.config = Config()
-        self.notifier = TelegramNotifier(
-            token=self.config.telegram_bot_token,
-            chat_id=self.config.telegram_chat_id
+        # Notifications: backends en parallèle, chacun avec sa file et son disjoncteur
+        self.notifier = build_pipeline(self.config)
+        self.history = HistoryManager(
+            self.config.database_path,
+            read_connections=self.config.history_read_connections,
+            storage=self.config.history_storage,
+            rle_latency_band=self.config.history_rle_band,
+            rle_flush_interval=self.config.history_flush_interval
         )
-        self.history = HistoryManager(self.config.database_path)
         
-        # Initialiser les checkers
-        self.checkers = []
+        # Initialiser les checkers (groupes Homebox et Neron d'abord)
+        self.checkers = self.group_checkers()
         
-        # Homebox checker (depuis JSON)
-        self.checkers.append(
-            HomeboxChecker(
-                config_file="config/homebox.json",
-                fallback_url=self.config.homebox_url,
-                fallback_timeout=self.config.check_timeout
+        # Vérification approfondie de l'API Homebox (statut, base, latence du listing):
+        # sans compte, le listing ne vérifierait ni la base ni sa latence
+        api_credentials = self.config.homebox_api_username and self.config.homebox_api_password
+        if self.config.check_homebox_services and not api_credentials:
+            logger.info(
+                "ℹ️ Homebox API Deep non activé: HOMEBOX_API_USERNAME et "
+                "HOMEBOX_API_PASSWORD requis"
+            )
+        elif self.config.check_homebox_services:
+            self.checkers.append(
+                HomeboxAPIChecker(
+                    url=self.config.homebox_api_url,
+                    username=self.config.homebox_api_username,
+                    password=self.config.homebox_api_password,
+                    timeout=self.config.check_timeout,
+                    min_version=self.config.homebox_api_min_version
+                )
             )
-        )
         
-        # Neron checker (depuis JSON)
-        self.checkers.append(
-            NeronChecker(
-                config_file="config/neron.json",
-                fallback_url=self.config.neron_url,
-                fallback_timeout=self.config.check_timeout
+        # Certificats TLS (si des cibles sont configurées)
+        if self.config.tls_checks:
+            self.checkers.append(
+                TLSChecker(
+                    targets=self.config.tls_checks,
+                    refresh_interval=self.config.tls_refresh_interval,
+                    expiry_thresholds=self.config.tls_expiry_thresholds,
+                    timeout=self.config.check_timeout
+                )
+            )
+        
+        # Timeouts adaptatifs et relances: amorcés avec les dernières latences mesurées
+        self._seed_latencies()
+        
+        # Références de latence par service et heure de la semaine
+        self.baselines: Optional[LatencyBaselines] = None
+        if self.config.anomaly_detection:
+            self.baselines = LatencyBaselines(
+                z_threshold=self.config.anomaly_z_threshold,
+                min_samples=self.config.anomaly_min_samples,
+                ewma_alpha=self.config.anomaly_ewma_alpha
             )
+            self._load_baselines()
+        
+        # État courant et agrégats en mémoire (rapports sans re-vérification).
+        # Seuls les noms passés à handle_result sont amorcés: les membres d'un groupe
+        # ont leurs transitions dans l'historique, mais leurs agrégats ne seraient
+        # jamais rafraîchis
+        self.snapshot = StatusSnapshot()
+        intervals, since, until = self.history.get_state_intervals(hours=ROLLUP_HOURS)
+        members = self.group_members(self.checkers)
+        self.snapshot.seed(
+            {name: spans for name, spans in intervals.items() if name not in members},
+            since, until
+        )
+        
+        # Flux d'événements en direct (/events), filtrable par service ou tag
+        service_tags = {}
+        for checker in self.checkers:
+            for service_checker in getattr(checker, 'service_checkers', []):
+                tags = set(getattr(service_checker, 'tags', None) or [])
+                service_tags[service_checker.name] = tags
+                service_tags.setdefault(checker.name, set()).update(tags)
+        self.events = EventBroker(
+            queue_size=self.config.events_queue_size,
+            service_tags=service_tags
+        )
+        
+        # Rapports planifiés sur l'horloge murale
+        self.report_scheduler = ReportScheduler(
+            [Schedule(spec) for spec in self.config.report_schedules],
+            self._scheduled_report
         )
         
         # État précédent pour détecter les changements
         self.previous_states: Dict[str, bool] = {}
         self.running = False
         
+        # Redémarrage à chaud: états, derniers résultats et backoff d'avant l'arrêt
+        self._restore_checkpoint()
+        
+        # Coordination multi-instances (démarrée en mode continu uniquement)
+        self.coordinator: Optional[LeaseCoordinator] = None
+        
+        # Workers de sondage multi-processus (démarrés en mode continu uniquement)
+        self.worker_pool: Optional[ProbeWorkerPool] = None
+        
+        # Relevés des ressources du démon (démarrés en mode continu uniquement)
+        self.resources: Optional[ResourceSampler] = None
+        
+        # Page de statut locale (démarrée en mode continu uniquement)
+        self.status_server: Optional[StatusServer] = None
+        
+        # Commandes Telegram (démarrées en mode continu uniquement)
+        self.command_bot: Optional[TelegramCommandBot] = None
+        
         logger.info("Control Plane initialisé")
     
+    @classmethod
+    def for_replay(cls, config: Config, notifier) -> 'ControlPlane':
+        """
+        Instance réduite à la logique d'alerte (`handle_result`), pour le rejeu
+        de l'historique: ni checkers, ni base, ni point de reprise
+        """
+        cp = cls.__new__(cls)
+        cp.config = config
+        cp.notifier = notifier
+        cp.snapshot = StatusSnapshot()
+        cp.events = EventBroker(queue_size=config.events_queue_size)
+        cp.baselines = None
+        if config.anomaly_detection:
+            # Références apprises au fil du rejeu, comme après une première installation
+            cp.baselines = LatencyBaselines(
+                z_threshold=config.anomaly_z_threshold,
+                min_samples=config.anomaly_min_samples,
+                ewma_alpha=config.anomaly_ewma_alpha
+            )
+        cp.previous_states = {}
+        cp.coordinator = None
+        cp.running = False
+        return cp
+    
+    def group_checkers(self) -> List:
+        """Groupes de services Homebox et Neron (depuis JSON, sinon variables d'environnement)"""
+        return [
+            # Homebox: config/homebox.json, sinon HOMEBOX_URL / HOMEBOX_SERVICES
+            HomeboxChecker(
+                config_file="config/homebox.json",
+                fallback_url=(self.config.homebox_base_url if self.config.homebox_services
+                              else self.config.homebox_url),
+                fallback_timeout=self.config.check_timeout,
+                fallback_services=self.config.homebox_services,
+                backoff=self._create_backoff()
+            ),
+            # Neron: config/neron.json, sinon NERON_URL
+            NeronChecker(
+                config_file="config/neron.json",
+                fallback_url=self.config.neron_url,
+                fallback_timeout=self.config.check_timeout,
+                backoff=self._create_backoff()
+            ),
+        ]
+    
+    @staticmethod
+    def group_members(checkers: List) -> Set[str]:
+        """
+        Services membres d'un groupe de plusieurs services: enregistrés dans
+        l'historique, mais seul le résultat du groupe passe par `handle_result`
+        """
+        return {
+            service_checker.name
+            for checker in checkers
+            if len(getattr(checker, 'service_checkers', None) or []) > 1
+            for service_checker in checker.service_checkers
+        }
+    
+    def _create_backoff(self) -> Optional[ProbeBackoff]:
+        """Backoff des sondes d'un groupe de services (si activé)"""
+        if not self.config.probe_backoff:
+            return None
+        return ProbeBackoff(
+            base_interval=self.config.check_interval,
+            max_interval=self.config.probe_backoff_max_interval,
+            after_failures=self.config.probe_backoff_after,
+            tcp_precheck=self.config.probe_tcp_precheck,
+            tcp_timeout=self.config.probe_tcp_timeout
+        )
+    
+    def owns(self, target: str) -> bool:
+        """Cette instance est-elle responsable de la cible ?"""
+        return self.coordinator is None or self.coordinator.holds(target)
+    
+    def start_coordination(self):
+        """Rejoindre la coordination multi-instances et acquérir les baux"""
+        self.coordinator = LeaseCoordinator(
+            backend=create_backend(
+                self.config.coordination_backend,
+                self.config.coordination_db_path
+            ),
+            instance_id=self.config.instance_id,
+            lease_ttl=self.config.lease_ttl,
+            on_acquire=self._seed_state
+        )
+        self.coordinator.set_targets(
+            [c.name for c in self.checkers] + [REPORT_TARGET, RETENTION_TARGET]
+        )
+        self.coordinator.start()
+    
+    def start_workers(self):
+        """Démarrer les processus workers et leur répartir les services"""
+        service_checkers = [
+            service_checker
+            for checker in self.checkers
+            for service_checker in getattr(checker, 'service_checkers', [])
+        ]
+        self.worker_pool = ProbeWorkerPool(self.config.probe_workers)
+        self.worker_pool.start(service_checkers)
+    
+    def _target_names(self, target: str) -> List[str]:
+        """Noms sous lesquels une cible publie ses résultats (groupe d'un seul service: le service)"""
+        checker = next((c for c in self.checkers if c.name == target), None)
+        service_checkers = getattr(checker, 'service_checkers', None) or []
+        if len(service_checkers) == 1:
+            return [target, service_checkers[0].name]
+        return [target]
+    
+    def _seed_state(self, target: str):
+        """Reprendre le dernier état connu d'une cible acquise depuis l'historique partagé"""
+        for name in self._target_names(target):
+            # Une autre instance a pu enregistrer des transitions entre-temps
+            self.history.forget_state(name)
+            recent = self.history.get_recent_checks(service_name=name, limit=1)
+            if recent:
+                self.previous_states[name] = bool(recent[0]['is_healthy'])
+    
+    def _seed_latencies(self):
+        """Pré-remplir les fenêtres de latence (timeouts adaptatifs, relances)"""
+        groups = [c for c in self.checkers if getattr(c, 'latencies', None)]
+        if not groups:
+            return
+        
+        window = max(checker.latencies.window for checker in groups)
+        durations = self.history.get_recent_phase_durations('total', limit=window)
+        for checker in groups:
+            for service_checker in checker.service_checkers:
+                checker.latencies.seed(service_checker.name, durations.get(service_checker.name, []))
+        logger.info(f"⏱️ Fenêtres de latence amorcées ({len(durations)} service(s) avec historique)")
+    
+    def _load_baselines(self):
+        """Charger les références de latence, ou les construire depuis l'historique"""
+        rows = self.history.get_latency_baselines()
+        if rows:
+            self.baselines.load(rows)
+            logger.info(f"📐 {len(rows)} référence(s) de latence chargée(s)")
+            return
+        
+        # Première exécution: une passe agrégée sur l'historique existant
+        self.baselines.load_sums(
+            self.history.get_latency_profile(days=self.config.baseline_lookback_days)
+        )
+        self.save_baselines()
+        logger.info(
+            f"📐 Références de latence construites sur {self.config.baseline_lookback_days} jours "
+            f"({len(self.baselines.stats)} créneau(x))"
+        )
+    
+    def _restore_checkpoint(self):
+        """Reprendre l'état sauvegardé avant l'arrêt (évite de réalerter un service déjà DOWN)"""
+        if not self.config.checkpoint_path:
+            return
+        checkpoint = read_checkpoint(self.config.checkpoint_path, self.config.checkpoint_max_age)
+        if not checkpoint:
+            return
+        
+        elapsed = (datetime.now() - datetime.fromisoformat(checkpoint['saved_at'])).total_seconds()
+        self.previous_states.update(checkpoint.get('states', {}))
+        
+        services = checkpoint.get('services', {})
+        for name, entry in services.items():
+            since = datetime.fromisoformat(entry['since']) if entry.get('since') else None
+            self.snapshot.restore(name, result_from_dict(entry['result']), since)
+        
+        groups = {checker.name: checker for checker in self.checkers}
+        for group_name, states in checkpoint.get('backoff', {}).items():
+            backoff = getattr(groups.get(group_name), 'backoff', None)
+            if backoff is None:
+                continue
+            backoff.restore({
+                name: {**data, 'last_result': result_from_dict(data['last_result'])}
+                for name, data in states.items()
+            }, elapsed=elapsed)
+        
+        down = [name for name, healthy in self.previous_states.items() if not healthy]
+        logger.info(
+            f"💾 État restauré ({len(services)} service(s), sauvegardé il y a "
+            f"{format_duration(elapsed)})" + (f", DOWN: {', '.join(down)}" if down else "")
+        )
+    
+    def save_checkpoint(self):
+        """Écrire le point de reprise de l'état courant"""
+        if not self.config.checkpoint_path:
+            return
+        services = {
+            name: {
+                'since': self.snapshot.since[name].isoformat() if name in self.snapshot.since else None,
+                'result': result_to_dict(result),
+            }
+            for name, result in self.snapshot.services.items()
+        }
+        backoff = {}
+        for checker in self.checkers:
+            if getattr(checker, 'backoff', None):
+                backoff[checker.name] = {
+                    name: {**data, 'last_result': result_to_dict(data['last_result'])}
+                    for name, data in checker.backoff.export().items()
+                }
+        try:
+            write_checkpoint(self.config.checkpoint_path, {
+                'states': dict(self.previous_states),
+                'services': services,
+                'backoff': backoff,
+            })
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"❌ Écriture du point de reprise impossible: {e}")
+    
+    async def sample_resources(self):
+        """Relever les ressources du démon et alerter sur une croissance anormale"""
+        sample, growth = self.resources.sample()
+        self.history.add_resource_sample(sample)
+        logger.debug("🧠 Ressources: %s", ", ".join(
+            f"{metric}={format_metric(metric, value)}" for metric, value in sample.items()
+        ))
+        
+        if not growth:
+            return
+        summary = [
+            f"{LABELS[metric]}: {format_metric(metric, reference)} → {format_metric(metric, value)}"
+            + (f" (+{(value / reference - 1) * 100:.0f} %)" if reference else "")
+            for metric, reference, value in growth
+        ]
+        logger.warning(f"🧠 Croissance anormale des ressources: {'; '.join(summary)}")
+        await self.notifier.send_warning(
+            "🧠 <b>Ressources du Control Plane en hausse</b>\n\n"
+            + "\n".join(f"  • {line}" for line in summary) +
+            f"\n\nRéférence: minimum sur {self.config.resource_growth_window:g}h\n"
+            f"Diagnostic: <code>python app.py resources --tracemalloc {os.getpid()}</code>"
+        )
+    
+    def save_baselines(self):
+        """Enregistrer les références de latence modifiées"""
+        if self.baselines:
+            self.history.save_latency_baselines(self.baselines.pop_dirty())
+    
     async def check_service(self, checker) -> ServiceStatus:
         """Vérifier un service individuel"""
         try:
-            result = await checker.check()
+            if self.worker_pool and hasattr(checker, 'service_checkers'):
+                result = await checker.check(runner=self.worker_pool.run)
+            else:
+                result = await checker.check()
             
-            # Sauvegarder dans l'historique
-            self.history.add_check(
-                service_name=result.service_name,
-                is_healthy=result.is_healthy,
-                response_time=result.response_time,
-                status_code=result.status_code,
-                error=result.error
-            )
+            # Sauvegarder dans l'historique (sauf résultat reconduit sans sonde, ex: backoff)
+            if not getattr(result, 'cached', False):
+                self.history.add_check(
+                    service_name=result.service_name,
+                    is_healthy=result.is_healthy,
+                    response_time=result.response_time,
+                    status_code=result.status_code,
+                    error=result.error
+                )
+            
+            # Sauvegarder chaque service du groupe (références de latence par service)
+            for service_result in getattr(result, 'services', None) or []:
+                if not getattr(service_result, 'cached', False):
+                    self.history.add_check(
+                        service_name=service_result.service_name,
+                        is_healthy=service_result.is_healthy,
+                        response_time=service_result.response_time,
+                        status_code=service_result.status_code,
+                        error=service_result.error
+                    )
+            
+            # Sauvegarder la décomposition des temps de réponse par service
+            for service_result in getattr(result, 'services', None) or [result]:
+                if getattr(service_result, 'phases', None):
+                    self.history.add_phase_timings(
+                        service_name=service_result.service_name,
+                        phases=service_result.phases,
+                        timestamp=service_result.timestamp
+                    )
+                
+                # Certificats TLS: uniquement lors d'un nouveau handshake
+                if getattr(service_result, 'refreshed', False):
+                    self.history.add_tls_check(
+                        service_name=service_result.service_name,
+                        certificate=service_result.certificate,
+                        error=service_result.error
+                    )
             
             return result
             
@@ -118,24 +481,55 @@ class ControlPlane:
         """Vérifier tous les services en parallèle"""
         logger.info("Début de la vérification de tous les services")
         
-        # Exécuter tous les checks en parallèle
-        tasks = [self.check_service(checker) for checker in self.checkers]
+        # Exécuter tous les checks en parallèle (cibles dont on détient le bail)
+        checkers = [checker for checker in self.checkers if self.owns(checker.name)]
+        tasks = [self.check_service(checker) for checker in checkers]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Traiter les résultats et envoyer les notifications
-        for result in results:
+        for checker, result in zip(checkers, results):
             if isinstance(result, Exception):
                 logger.error(f"Exception lors du check: {result}")
                 continue
             
-            await self.handle_result(result)
+            await self.handle_result(result, target=checker.name)
         
         return [r for r in results if not isinstance(r, Exception)]
     
-    async def handle_result(self, result: ServiceStatus):
-        """Gérer le résultat d'une vérification et envoyer les notifications appropriées"""
+    async def handle_result(self, result: ServiceStatus, target: Optional[str] = None):
+        """
+        Gérer le résultat d'une vérification et envoyer les notifications appropriées
+        
+        Args:
+            result: Résultat de la vérification
+            target: Cible de coordination (nom du checker) dont provient le résultat,
+                    par défaut le nom du résultat. Un groupe d'un seul service
+                    renvoie le résultat sous le nom du service.
+        """
         service_name = result.service_name
         was_healthy = self.previous_states.get(service_name, True)
+        self.snapshot.update(result)
+        self._publish_events(result, was_healthy)
+        
+        # Seule l'instance qui détient le bail peut alerter
+        if not self.owns(target or service_name):
+            logger.info(f"🔓 {service_name}: bail perdu, notification ignorée")
+            self.previous_states[service_name] = result.is_healthy
+            return
+        
+        # Avertissements ponctuels remontés par le checker (ex: expiration TLS)
+        for warning in getattr(result, 'warnings', None) or []:
+            await self.notifier.send_warning(warning)
+        
+        # Écart de chaque service UP à sa propre référence de latence
+        deviations = {}
+        if self.baselines:
+            for service_result in self._measured_services(result):
+                deviations[service_result.service_name] = self.baselines.observe(
+                    service_result.service_name, service_result.timestamp,
+                    service_result.response_time
+                )
+        slow = self._slow_services(result, deviations) if result.is_healthy else []
         
         # Service est passé de UP à DOWN
         if was_healthy and not result.is_healthy:
@@ -148,6 +542,9 @@ class ControlPlane:
                 f"<b>Erreur:</b> {result.error or 'Timeout/Connexion impossible'}\n"
                 f"<b>Heure:</b> {result.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
             )
+            # Cause racine: les services injoignables ne génèrent pas d'alerte propre
+            if getattr(result, 'root_causes', None):
+                message += f"\n<b>Cause racine:</b> {', '.join(result.root_causes)}"
             # Ajouter les détails si disponibles
             if hasattr(result, 'details') and result.details:
                 message += f"\n\n<b>Détails:</b>\n{result.details}"
@@ -170,17 +567,10 @@ class ControlPlane:
             
             await self.notifier.send_success(message)
         
-        # Service est UP mais lent
-        elif result.is_healthy and result.response_time > self.config.max_response_time:
-            logger.warning(f"⚠️ {service_name} est lent ({result.response_time:.2f}s)")
-            message = (
-                f"⚠️ <b>AVERTISSEMENT - Performance dégradée</b>\n\n"
-                f"<b>Service:</b> {service_name}\n"
-                f"<b>Temps de réponse:</b> {result.response_time:.2f}s\n"
-                f"<b>Seuil:</b> {self.config.max_response_time}s\n"
-                f"<b>Heure:</b> {result.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-            await self.notifier.send_warning(message)
+        # Service est UP mais lent (un avertissement par service lent du groupe)
+        elif slow:
+            for service_result, deviation in slow:
+                await self._send_slow_warning(service_result, deviation)
         
         # Service est OK
         else:
@@ -189,39 +579,173 @@ class ControlPlane:
         # Mettre à jour l'état précédent
         self.previous_states[service_name] = result.is_healthy
     
-    async def send_status_report(self):
-        """Envoyer un rapport de statut complet"""
+    def _publish_events(self, result: ServiceStatus, was_healthy: bool):
+        """Diffuser le résultat (et le changement d'état éventuel) aux abonnés /events"""
+        services, tags = self.events.scope(result)
+        since = self.snapshot.since.get(result.service_name)
+        self.events.publish('result', service_payload(result, since), services, tags)
+        
+        if was_healthy != result.is_healthy:
+            self.events.publish('transition', {
+                'name': result.service_name,
+                'from': 'up' if was_healthy else 'down',
+                'to': 'up' if result.is_healthy else 'down',
+                'at': result.timestamp.isoformat(timespec='seconds'),
+                'error': result.error,
+            }, services, tags)
+    
+    @staticmethod
+    def _measured_services(result: ServiceStatus) -> List[ServiceStatus]:
+        """Services UP mesurés à ce cycle (les services d'un groupe, sinon le résultat)"""
+        return [
+            r for r in getattr(result, 'services', None) or [result]
+            if r.is_healthy and not getattr(r, 'cached', False)
+        ]
+    
+    def _slow_services(self, result: ServiceStatus, deviations: Dict) -> List[tuple]:
+        """
+        Services lents: écart à leur propre référence, sinon seuil global
+        
+        Returns:
+            [(résultat du service, écart ou None), ...]
+        """
+        slow = []
+        for service_result in self._measured_services(result):
+            deviation = deviations.get(service_result.service_name)
+            if deviation:
+                is_slow = deviation.anomalous
+            else:
+                is_slow = service_result.response_time > self.config.max_response_time
+            if is_slow:
+                slow.append((service_result, deviation))
+        return slow
+    
+    async def _send_slow_warning(self, result: ServiceStatus, deviation):
+        """Avertir qu'un service est lent (référence du service ou seuil global)"""
+        logger.warning(f"⚠️ {result.service_name} est lent ({result.response_time:.2f}s)")
+        if deviation:
+            reference = (
+                f"<b>Référence:</b> {deviation.mean:.2f}s ± {deviation.std:.2f}s "
+                f"(z={deviation.z_score:.1f})\n"
+            )
+        else:
+            reference = f"<b>Seuil:</b> {self.config.max_response_time}s\n"
+        message = (
+            f"⚠️ <b>AVERTISSEMENT - Performance dégradée</b>\n\n"
+            f"<b>Service:</b> {result.service_name}\n"
+            f"<b>Temps de réponse:</b> {result.response_time:.2f}s\n"
+            f"{reference}"
+            f"<b>Heure:</b> {result.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        breakdown = self._format_slow_breakdown(result)
+        if breakdown:
+            message += f"\n\n<b>Décomposition:</b>\n{breakdown}"
+        await self.notifier.send_warning(message)
+    
+    def _format_slow_breakdown(self, result: ServiceStatus) -> str:
+        """Décomposer par phase le temps de réponse des services lents"""
+        services = [
+            r for r in getattr(result, 'services', None) or [result]
+            if getattr(r, 'phases', None)
+        ]
+        slow = [r for r in services if r.response_time > self.config.max_response_time]
+        
+        lines = []
+        for service_result in slow or services:
+            line = f"{service_result.service_name}: {format_phases(service_result.phases)}"
+            verdict = diagnose_phases(service_result.phases)
+            if verdict:
+                line += f" → {verdict}"
+            lines.append(line)
+        
+        return "\n".join(lines)
+    
+    async def send_status_report(self, hours: int = 24):
+        """Envoyer un rapport de statut complet depuis le snapshot en mémoire"""
         logger.info("Génération du rapport de statut")
         
-        # Récupérer les derniers checks
-        results = await self.check_all()
+        # Mode `report` ponctuel: aucun résultat encore en mémoire
+        if not self.snapshot.services:
+            await self.check_all()
         
-        # Construire le message
-        report = "📊 <b>RAPPORT DE STATUT</b>\n\n"
+        await self.notifier.send_info(self.snapshot.report(hours))
+    
+    async def _scheduled_report(self, schedule: Schedule):
+        """Échéance d'un rapport planifié (une seule instance l'envoie)"""
+        if self.owns(REPORT_TARGET):
+            await self.send_status_report(hours=schedule.period_hours)
+    
+    async def _command_status(self, args: List[str]) -> str:
+        """/status: état courant depuis le snapshot"""
+        return self.snapshot.status_text()
+    
+    async def _command_uptime(self, args: List[str]) -> str:
+        """/uptime: uptime 24h et 7 jours depuis les agrégats en mémoire"""
+        return self.snapshot.uptime_text()
+    
+    async def _command_history(self, args: List[str]) -> str:
+        """/history <service>: chronologie 24h et statistiques d'un service"""
+        if not args:
+            return "Usage: /history &lt;service&gt;"
+        return self.snapshot.history_text(" ".join(args))
+    
+    async def _command_check(self, args: List[str]) -> str:
+        """/check <service>: sonder immédiatement ce seul service (sans l'enregistrer)"""
+        if not args:
+            return "Usage: /check &lt;service&gt;"
+        wanted = " ".join(args).lower()
+        candidates = list(self.checkers) + [
+            service_checker
+            for checker in self.checkers
+            for service_checker in getattr(checker, 'service_checkers', [])
+        ]
+        checker = next((c for c in candidates if c.name.lower() == wanted), None)
+        if checker is None:
+            return f"Service inconnu: {html.escape(' '.join(args))}"
         
-        for result in results:
-            status_icon = "✅" if result.is_healthy else "🔴"
-            report += (
-                f"{status_icon} <b>{result.service_name}</b>\n"
-                f"   Status: {'UP' if result.is_healthy else 'DOWN'}\n"
-                f"   Réponse: {result.response_time:.2f}s\n"
-            )
-            if result.status_code:
-                report += f"   Code HTTP: {result.status_code}\n"
-            if result.error:
-                report += f"   Erreur: {result.error}\n"
-            report += "\n"
+        # Une demande explicite rétablit la cadence normale des sondes
+        for group in self.checkers:
+            backoff = getattr(group, 'backoff', None)
+            if backoff is None:
+                continue
+            if group is checker:
+                backoff.reset()
+            elif checker in getattr(group, 'service_checkers', []):
+                backoff.reset(checker.name)
         
-        # Ajouter les statistiques
-        stats = self.history.get_uptime_stats(hours=24)
-        if stats:
-            report += "📈 <b>STATISTIQUES 24H</b>\n\n"
-            for service, uptime in stats.items():
-                report += f"   {service}: {uptime:.1f}% uptime\n"
+        result = await checker.check()
+        icon = "✅" if result.is_healthy else "🔴"
+        reply = (
+            f"{icon} <b>{html.escape(result.service_name)}</b>: "
+            f"{'UP' if result.is_healthy else 'DOWN'} ({result.response_time:.2f}s)"
+        )
+        if result.status_code:
+            reply += f"\nCode HTTP: {result.status_code}"
+        if result.error:
+            reply += f"\nErreur: {html.escape(result.error)}"
+        if getattr(result, 'details', None):
+            reply += f"\n\n{result.details}"
+        return reply
+    
+    async def run_retention(self):
+        """Archiver puis supprimer l'historique plus ancien que `retention_days`"""
+        days = self.config.retention_days
+        cutoff = datetime.now() - timedelta(days=days)
         
-        report += f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        if self.config.archive_enabled:
+            try:
+                archived = await self.history.read(
+                    self.history.archive_old_records, cutoff, self.config.archive_dir
+                )
+            except Exception as e:
+                # Ne rien supprimer qui n'ait été archivé
+                logger.error(f"❌ Archivage impossible, rétention reportée: {e}")
+                return
+            if archived:
+                total = sum(archived.values())
+                logger.info(f"📦 {total} ligne(s) archivée(s) dans {self.config.archive_dir}")
         
-        await self.notifier.send_info(report)
+        self.history.cleanup_old_records(days=days, cutoff=cutoff)
     
     async def run_continuous(self):
         """Boucle de monitoring continue"""
@@ -230,15 +754,62 @@ class ControlPlane:
         
         logger.info(f"🚀 Démarrage du monitoring continu (intervalle: {interval}s)")
         
+        if self.config.coordination_enabled:
+            self.start_coordination()
+        
+        if self.config.probe_workers > 0:
+            self.start_workers()
+        
+        if self.config.resource_sample_interval > 0:
+            self.resources = ResourceSampler(
+                growth_threshold=self.config.resource_growth_threshold,
+                window_hours=self.config.resource_growth_window,
+                worker_pids=lambda: self.worker_pool.pids() if self.worker_pool else []
+            )
+        
+        if self.config.status_server_enabled:
+            self.status_server = StatusServer(
+                self.snapshot, self.config.status_host, self.config.status_port,
+                broker=self.events
+            )
+            try:
+                await self.status_server.start()
+            except OSError as e:
+                logger.error(f"❌ Page de statut indisponible ({self.config.status_host}:{self.config.status_port}): {e}")
+                self.status_server = None
+        
+        if self.config.telegram_commands_enabled:
+            self.command_bot = TelegramCommandBot(
+                token=self.config.telegram_bot_token,
+                chat_id=self.config.telegram_chat_id,
+                handlers={
+                    'status': self._command_status,
+                    'history': self._command_history,
+                    'uptime': self._command_uptime,
+                    'check': self._command_check,
+                },
+                commands_per_minute=self.config.telegram_commands_per_minute
+            )
+            await self.command_bot.start()
+        
         # Envoyer une notification de démarrage
-        await self.notifier.send_info(
+        message = (
             "🚀 <b>Control Plane démarré</b>\n\n"
             f"Monitoring de {len(self.checkers)} services:\n"
             + "\n".join(f"  • {c.name}" for c in self.checkers) +
             f"\n\nIntervalle: {interval}s"
         )
+        if self.coordinator:
+            message += f"\nInstance: {self.coordinator.instance_id} (mode coordonné)"
+        await self.notifier.send_info(message)
+        
+        self.report_scheduler.start()
         
         check_count = 0
+        last_retention = None
+        last_baseline_save = time.monotonic()
+        last_checkpoint = time.monotonic()
+        last_resource_sample = None
         
         try:
             while self.running:
@@ -247,9 +818,27 @@ class ControlPlane:
                 
                 await self.check_all()
                 
-                # Envoyer un rapport toutes les 24h (86400 secondes)
-                if check_count * interval % 86400 == 0:
-                    await self.send_status_report()
+                # Enregistrer périodiquement les références de latence
+                if time.monotonic() - last_baseline_save >= BASELINE_SAVE_INTERVAL:
+                    self.save_baselines()
+                    last_baseline_save = time.monotonic()
+                
+                # Point de reprise de l'état courant (redémarrage à chaud)
+                if time.monotonic() - last_checkpoint >= self.config.checkpoint_interval:
+                    self.save_checkpoint()
+                    last_checkpoint = time.monotonic()
+                
+                # Relevé des ressources du démon (fuites mémoire, descripteurs)
+                if self.resources and (last_resource_sample is None or time.monotonic()
+                                       - last_resource_sample >= self.config.resource_sample_interval):
+                    await self.sample_resources()
+                    last_resource_sample = time.monotonic()
+                
+                # Rétention de l'historique une fois par jour
+                if (self.config.retention_days and self.owns(RETENTION_TARGET)
+                        and (last_retention is None or time.monotonic() - last_retention >= 86400)):
+                    await self.run_retention()
+                    last_retention = time.monotonic()
                 
                 # Attendre avant le prochain check
                 await asyncio.sleep(interval)
@@ -271,11 +860,34 @@ class ControlPlane:
         logger.info("Arrêt du Control Plane...")
         self.running = False
         
+        await self.report_scheduler.stop()
+        
+        # Point de reprise d'abord: l'arrêt des serveurs HTTP peut dépasser le délai accordé
+        self.save_checkpoint()
+        self.save_baselines()
+        
+        if self.status_server:
+            await self.status_server.stop()
+        
+        if self.command_bot:
+            await self.command_bot.stop()
+        
+        # Rendre les baux pour une reprise immédiate par les autres instances
+        if self.coordinator:
+            await self.coordinator.stop()
+        
+        if self.worker_pool:
+            await self.worker_pool.stop()
+        
         # Envoyer une notification d'arrêt
-        await self.notifier.send_info(
+        message = (
             "🛑 <b>Control Plane arrêté</b>\n\n"
             f"Arrêt à {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         )
+        if self.coordinator:
+            message += f"\nInstance: {self.coordinator.instance_id}"
+        await self.notifier.send_info(message)
+        await self.notifier.close()
         
         # Fermer les connexions
         self.history.close()
@@ -284,6 +896,26 @@ class ControlPlane:
 
 async def main():
     """Point d'entrée principal"""
+    # Consultation de l'historique: lecture seule, sans démarrer le Control Plane
+    if len(sys.argv) > 1 and sys.argv[1] == "history":
+        config = Config(require_telegram=False)
+        sys.exit(history_command(sys.argv[2:], config.database_path, config.archive_dir))
+    
+    # Export de l'historique vers des fichiers compressés
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        config = Config(require_telegram=False)
+        sys.exit(export_command(sys.argv[2:], config.database_path))
+    
+    # Rejeu de l'historique dans la logique d'alerte (notifications capturées)
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        config = Config(require_telegram=False)
+        sys.exit(await replay_command(sys.argv[2:], config))
+    
+    # Relevés des ressources du démon (lecture seule) ou diagnostic tracemalloc
+    if len(sys.argv) > 1 and sys.argv[1] == "resources":
+        config = Config(require_telegram=False)
+        sys.exit(resources_command(sys.argv[2:], config.database_path))
+    
     cp = ControlPlane()
     
     # Gérer les signaux d'arrêt proprement
@@ -294,6 +926,16 @@ async def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # Diagnostic mémoire à la demande: kill -USR1 <pid>
+    def tracemalloc_handler(sig, frame):
+        try:
+            tracemalloc_report(cp.config.tracemalloc_frames, output_dir=cp.config.tracemalloc_dir)
+        except OSError as e:
+            logger.error(f"❌ Diff tracemalloc impossible: {e}")
+    
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, tracemalloc_handler)
+    
     # Mode de fonctionnement
     if len(sys.argv) > 1:
         command = sys.argv[1]
@@ -302,15 +944,19 @@ async def main():
             # Une seule vérification
             logger.info("Mode: Vérification unique")
             await cp.check_all()
+            cp.save_checkpoint()
+            cp.save_baselines()
+            await cp.notifier.close()
         
         elif command == "report":
             # Envoyer un rapport
             logger.info("Mode: Rapport de statut")
             await cp.send_status_report()
+            await cp.notifier.close()
         
         else:
             print(f"Commande inconnue: {command}")
-            print("Usage: python app.py [check|report]")
+            print("Usage: python app.py [check|report|history|export|replay|resources]")
             sys.exit(1)
     else:
         # Mode monitoring continu (par défaut)
@@ -319,6 +965,19 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Logging non bloquant: les écritures se font dans un thread dédié
+    log_config = Config(require_telegram=False)
+    setup_logging(
+        level=log_config.log_level,
+        log_file=log_config.log_file,
+        json_format=log_config.log_format == 'json',
+        rotation=log_config.log_rotation,
+        max_bytes=log_config.log_max_bytes,
+        backup_count=log_config.log_backup_count,
+        when=log_config.log_rotate_when,
+        sampling=log_config.log_sampling
+    )
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -326,3 +985,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Erreur fatale: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        stop_logging()
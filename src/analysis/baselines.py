@@ -0,0 +1,144 @@
+"""
+Latency Baselines
+Références de latence saisonnières et détection d'anomalies par service
+
+Chaque service a une référence (moyenne, écart-type) par heure de la
+semaine (0 = lundi 00h, 167 = dimanche 23h): un service naturellement plus
+lent la journée n'est pas comparé à sa latence nocturne, ni à un seuil
+global commun à tous les services.
+
+- Construction: une passe agrégée en SQL sur l'historique (GROUP BY
+  service, heure de la semaine), une ligne par couple
+- Rafraîchissement: mise à jour incrémentale (Welford) à chaque échantillon,
+  avec un poids plafonné pour suivre les évolutions lentes
+- Score: EWMA des derniers temps de réponse comparée à la référence de
+  l'heure courante (z-score); anomalie au-delà de `z_threshold`
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+# Écart-type plancher: absolu (secondes) et relatif à la moyenne
+MIN_STD_SECONDS = 0.05
+MIN_STD_RATIO = 0.1
+
+
+def hour_of_week(timestamp: datetime) -> int:
+    """Heure de la semaine (0 = lundi 00h ... 167 = dimanche 23h)"""
+    return timestamp.weekday() * 24 + timestamp.hour
+
+
+class LatencyStats:
+    """Moyenne et variance incrémentales (algorithme de Welford)"""
+    
+    __slots__ = ('count', 'mean', 'm2')
+    
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+    
+    @classmethod
+    def from_sums(cls, count: int, total: float, total_sq: float) -> 'LatencyStats':
+        """Construire depuis des agrégats SQL (nombre, somme, somme des carrés)"""
+        mean = total / count
+        m2 = max(0.0, total_sq - count * mean * mean)
+        return cls(count, mean, m2)
+    
+    def update(self, value: float, max_count: int):
+        # Poids plafonné: les échantillons récents gardent au moins 1/max_count
+        if self.count >= max_count:
+            self.m2 *= (max_count - 1) / self.count
+            self.count = max_count - 1
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class Deviation:
+    """Écart d'un échantillon à la référence de son service"""
+    
+    def __init__(self, value: float, ewma: float, mean: float, std: float,
+                 z_score: float, anomalous: bool):
+        self.value = value
+        self.ewma = ewma
+        self.mean = mean
+        self.std = std
+        self.z_score = z_score
+        self.anomalous = anomalous
+
+
+class LatencyBaselines:
+    """Références de latence par service et heure de la semaine"""
+    
+    def __init__(self, z_threshold: float = 3.0, min_samples: int = 10,
+                 ewma_alpha: float = 0.3, max_count: int = 1000):
+        """
+        Args:
+            z_threshold: Z-score à partir duquel la latence est anormale
+            min_samples: Échantillons minimum avant de se fier à une référence
+            ewma_alpha: Poids du dernier échantillon dans l'EWMA
+            max_count: Poids maximum d'une référence (adaptation aux évolutions)
+        """
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.ewma_alpha = ewma_alpha
+        self.max_count = max_count
+        
+        self.stats: Dict[Tuple[str, int], LatencyStats] = {}
+        self.ewma: Dict[str, float] = {}
+        self.dirty = set()
+    
+    def load(self, rows: Iterable[tuple]):
+        """Charger des références (service, heure, nombre, moyenne, m2)"""
+        for service_name, hour, count, mean, m2 in rows:
+            self.stats[(service_name, hour)] = LatencyStats(count, mean, m2)
+    
+    def load_sums(self, rows: Iterable[tuple]):
+        """Construire les références depuis une passe agrégée (service, heure, n, somme, somme²)"""
+        for service_name, hour, count, total, total_sq in rows:
+            if count:
+                self.stats[(service_name, hour)] = LatencyStats.from_sums(count, total, total_sq)
+                self.dirty.add((service_name, hour))
+    
+    def observe(self, service_name: str, timestamp: datetime,
+                value: float) -> Optional[Deviation]:
+        """
+        Scorer un temps de réponse puis l'intégrer à la référence
+        
+        Returns:
+            L'écart à la référence, ou None si elle n'a pas assez d'échantillons
+        """
+        previous = self.ewma.get(service_name, value)
+        ewma = self.ewma_alpha * value + (1 - self.ewma_alpha) * previous
+        self.ewma[service_name] = ewma
+        
+        key = (service_name, hour_of_week(timestamp))
+        stats = self.stats.setdefault(key, LatencyStats())
+        
+        deviation = None
+        if stats.count >= self.min_samples:
+            std = max(stats.std, MIN_STD_SECONDS, stats.mean * MIN_STD_RATIO)
+            z_score = (ewma - stats.mean) / std
+            deviation = Deviation(value, ewma, stats.mean, std, z_score,
+                                  anomalous=z_score >= self.z_threshold)
+        
+        stats.update(value, self.max_count)
+        self.dirty.add(key)
+        return deviation
+    
+    def pop_dirty(self):
+        """Références modifiées depuis le dernier appel (service, heure, n, moyenne, m2)"""
+        rows = [
+            (service_name, hour, self.stats[(service_name, hour)].count,
+             self.stats[(service_name, hour)].mean, self.stats[(service_name, hour)].m2)
+            for service_name, hour in self.dirty
+        ]
+        self.dirty = set()
+        return rows
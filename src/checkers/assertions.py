@@ -0,0 +1,178 @@
+"""
+Response Assertions
+Assertions optionnelles sur le corps des réponses HTTP
+
+Le corps est lu en streaming et seul un préfixe borné (64 Kio par défaut)
+est conservé en mémoire. La lecture s'arrête et la connexion est libérée
+dès que le résultat des assertions est connu: un corps volumineux n'est
+jamais lu ni bufferisé en entier.
+
+Configuration (champ `assertions` d'un service dans le JSON):
+{
+  "contains": "Homebox",          # Sous-chaîne attendue
+  "regex": "<title>.*</title>",   # Expression régulière attendue
+  "json_path": "health",          # Chemin pointé dans un corps JSON
+  "json_value": true,             # Valeur attendue au chemin (optionnel)
+  "max_body_bytes": 1048576,      # Taille maximale du corps
+  "read_limit": 65536             # Taille du préfixe examiné
+}
+"""
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+DEFAULT_READ_LIMIT = 64 * 1024
+CHUNK_SIZE = 8 * 1024
+
+_MISSING = object()
+
+
+def resolve_json_path(document: Any, path: str) -> Any:
+    """
+    Résoudre un chemin pointé ("data.items.0.name") dans un document JSON
+    
+    Returns:
+        La valeur trouvée, ou _MISSING si le chemin n'existe pas
+    """
+    current = document
+    for part in path.split('.'):
+        if isinstance(current, dict) and part in current:
+            current = current[part]
+        elif isinstance(current, list) and part.lstrip('-').isdigit():
+            index = int(part)
+            if -len(current) <= index < len(current):
+                current = current[index]
+            else:
+                return _MISSING
+        else:
+            return _MISSING
+    return current
+
+
+class ResponseAssertion:
+    """Assertions évaluées sur un préfixe borné du corps de la réponse"""
+    
+    def __init__(self, contains: Optional[str] = None, regex: Optional[str] = None,
+                 json_path: Optional[str] = None, json_value: Any = _MISSING,
+                 max_body_bytes: Optional[int] = None,
+                 read_limit: int = DEFAULT_READ_LIMIT):
+        self.contains = contains.encode('utf-8') if contains is not None else None
+        self.regex = re.compile(regex.encode('utf-8')) if regex is not None else None
+        self.json_path = json_path
+        self.json_value = json_value
+        self.max_body_bytes = max_body_bytes
+        self.read_limit = read_limit
+    
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional['ResponseAssertion']:
+        """Construire les assertions depuis la configuration JSON (None si vide)"""
+        if not config:
+            return None
+        
+        return cls(
+            contains=config.get('contains'),
+            regex=config.get('regex'),
+            json_path=config.get('json_path'),
+            json_value=config.get('json_value', _MISSING),
+            max_body_bytes=config.get('max_body_bytes'),
+            read_limit=config.get('read_limit', DEFAULT_READ_LIMIT)
+        )
+    
+    @property
+    def _needs_body(self) -> bool:
+        return (self.contains is not None or self.regex is not None
+                or self.json_path is not None)
+    
+    async def evaluate(self, response) -> Optional[str]:
+        """
+        Évaluer les assertions sur une réponse aiohttp
+        
+        Returns:
+            None si toutes les assertions passent, sinon le message d'erreur
+        """
+        declared_size = response.content_length
+        if (self.max_body_bytes is not None and declared_size is not None
+                and declared_size > self.max_body_bytes):
+            response.close()
+            return f"Corps trop volumineux ({declared_size} > {self.max_body_bytes} octets)"
+        
+        # Taille à vérifier en lisant le flux si elle n'est pas annoncée
+        count_size = self.max_body_bytes is not None and declared_size is None
+        if not self._needs_body and not count_size:
+            return None
+        
+        buffer = bytearray()
+        total = 0
+        complete = True
+        contains_ok = self.contains is None
+        regex_ok = self.regex is None
+        prefix_full = False
+        
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                total += len(chunk)
+                if prefix_full:
+                    # Préfixe complet et le flux continue: corps tronqué
+                    complete = False
+                    break
+                if count_size and total > self.max_body_bytes:
+                    return f"Corps trop volumineux (> {self.max_body_bytes} octets)"
+                
+                room = self.read_limit - len(buffer)
+                if room > 0:
+                    buffer += chunk[:room]
+                
+                if not contains_ok and self.contains in buffer:
+                    contains_ok = True
+                if not regex_ok and self.regex.search(buffer):
+                    regex_ok = True
+                
+                # Décider au plus tôt: plus rien à vérifier dans la suite du flux
+                text_decided = contains_ok and regex_ok and self.json_path is None
+                prefix_full = len(buffer) >= self.read_limit and not count_size
+                if text_decided and not count_size:
+                    complete = False
+                    break
+                if prefix_full and total > len(buffer):
+                    complete = False
+                    break
+                # Corps de exactement `read_limit` octets: lu en entier si sa taille
+                # annoncée est atteinte, sinon le bloc suivant (ou la fin du flux) tranche
+                if prefix_full and declared_size is not None and total >= declared_size:
+                    break
+            
+            if not contains_ok:
+                return (f"Texte attendu absent des {len(buffer)} premiers octets: "
+                        f"{self.contains.decode('utf-8', 'replace')!r}")
+            if not regex_ok:
+                return (f"Motif attendu absent des {len(buffer)} premiers octets: "
+                        f"{self.regex.pattern.decode('utf-8', 'replace')!r}")
+            
+            if self.json_path is not None:
+                return self._check_json(buffer, truncated=not complete or total > len(buffer))
+            
+            return None
+        
+        finally:
+            if not complete or total > len(buffer):
+                # Corps non lu en entier: fermer la connexion plutôt que la vider
+                response.close()
+    
+    def _check_json(self, buffer: bytearray, truncated: bool) -> Optional[str]:
+        """Vérifier la valeur au chemin JSON configuré"""
+        if truncated:
+            return f"Corps JSON tronqué (> {self.read_limit} octets examinés)"
+        
+        try:
+            document = json.loads(bytes(buffer))
+        except ValueError as e:
+            return f"Corps JSON invalide: {e}"
+        
+        value = resolve_json_path(document, self.json_path)
+        if value is _MISSING:
+            return f"Chemin JSON absent: {self.json_path}"
+        if self.json_value is not _MISSING and value != self.json_value:
+            return f"{self.json_path} = {value!r} (attendu: {self.json_value!r})"
+        
+        return None
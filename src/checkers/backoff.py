@@ -0,0 +1,195 @@
+"""
+Probe Backoff
+Espacement des sondes d'un service DOWN depuis longtemps
+
+Après `after_failures` échecs consécutifs, un service n'est plus sondé à
+chaque cycle: l'intervalle entre deux sondes double à chaque nouvel échec,
+jusqu'à `max_interval`. Entre deux sondes, le dernier résultat DOWN est
+reconduit sans ouvrir de connexion. La cadence normale reprend dès que le
+service répond à nouveau, ou sur demande (`reset`, commande /check).
+
+Optionnellement, un service en backoff est d'abord testé par une simple
+connexion TCP (quelques millisecondes quand le port est fermé) avant la
+requête HTTP complète.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class BackoffState:
+    """État de backoff d'un service"""
+    
+    __slots__ = ('failures', 'interval', 'next_probe', 'last_result')
+    
+    def __init__(self):
+        self.failures = 0
+        self.interval = 0.0
+        self.next_probe = 0.0
+        self.last_result = None
+
+
+class ProbeBackoff:
+    """Planification des sondes par service pendant une panne"""
+    
+    def __init__(self, base_interval: float, max_interval: float = 3600,
+                 after_failures: int = 3, factor: float = 2.0,
+                 tcp_precheck: bool = False, tcp_timeout: float = 2.0):
+        """
+        Args:
+            base_interval: Intervalle normal entre deux cycles (check_interval)
+            max_interval: Intervalle maximal entre deux sondes d'un service DOWN
+            after_failures: Échecs consécutifs avant d'espacer les sondes
+            factor: Multiplicateur de l'intervalle à chaque nouvel échec
+            tcp_precheck: Tester la connexion TCP avant la sonde HTTP (services en backoff)
+            tcp_timeout: Timeout de la connexion TCP (secondes)
+        """
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.after_failures = max(1, after_failures)
+        self.factor = factor
+        self.tcp_precheck = tcp_precheck
+        self.tcp_timeout = tcp_timeout
+        self.states: Dict[str, BackoffState] = {}
+    
+    def in_backoff(self, name: str) -> bool:
+        state = self.states.get(name)
+        return state is not None and state.interval > 0
+    
+    def due(self, name: str, now: Optional[float] = None) -> bool:
+        """
+        Le service doit-il être sondé à ce cycle ?
+        
+        Tolérance d'un demi-cycle: les cycles ne tombent pas exactement à
+        `base_interval` d'écart.
+        """
+        if not self.in_backoff(name):
+            return True
+        now = time.monotonic() if now is None else now
+        return now + self.base_interval / 2 >= self.states[name].next_probe
+    
+    def record(self, name: str, result, now: Optional[float] = None):
+        """Prendre en compte le résultat d'une sonde"""
+        now = time.monotonic() if now is None else now
+        state = self.states.setdefault(name, BackoffState())
+        
+        if result.is_healthy:
+            if state.interval:
+                logger.info(f"⏩ {name}: de nouveau UP, reprise de la cadence normale")
+            del self.states[name]
+            return
+        
+        state.failures += 1
+        state.last_result = result
+        if state.failures < self.after_failures:
+            return
+        
+        exponent = state.failures - self.after_failures + 1
+        interval = min(self.base_interval * self.factor ** exponent, self.max_interval)
+        if interval != state.interval:
+            logger.info(
+                f"⏪ {name}: DOWN depuis {state.failures} sondes, "
+                f"prochaine sonde dans {interval:.0f}s"
+            )
+        state.interval = interval
+        state.next_probe = now + interval
+    
+    def reset(self, name: Optional[str] = None):
+        """Reprendre la cadence normale (un service, ou tous)"""
+        if name is None:
+            self.states.clear()
+        else:
+            self.states.pop(name, None)
+    
+    def export(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """État à sauvegarder: {service: {failures, interval, next_probe_in, last_result}}"""
+        now = time.monotonic() if now is None else now
+        return {
+            name: {
+                'failures': state.failures,
+                'interval': state.interval,
+                'next_probe_in': max(0.0, state.next_probe - now),
+                'last_result': state.last_result,
+            }
+            for name, state in self.states.items()
+            if state.last_result is not None
+        }
+    
+    def restore(self, states: Dict[str, Dict], elapsed: float = 0.0, now: Optional[float] = None):
+        """
+        Reprendre un état exporté par `export`
+        
+        Args:
+            states: État par service
+            elapsed: Secondes écoulées depuis l'export (arrêt du démon)
+        """
+        now = time.monotonic() if now is None else now
+        for name, data in states.items():
+            state = BackoffState()
+            state.failures = data['failures']
+            state.interval = data['interval']
+            state.next_probe = now + max(0.0, data['next_probe_in'] - elapsed)
+            state.last_result = data['last_result']
+            self.states[name] = state
+    
+    def skipped_status(self, name: str, now: Optional[float] = None):
+        """Reconduire le dernier résultat DOWN d'un service non sondé à ce cycle"""
+        now = time.monotonic() if now is None else now
+        state = self.states[name]
+        result = copy.copy(state.last_result)
+        remaining = max(0.0, state.next_probe - now)
+        result.timestamp = datetime.now()
+        result.phases = {}
+        result.backoff = True
+        # Pas une nouvelle mesure: ni historique, ni référence de latence
+        result.cached = True
+        result.next_probe_at = result.timestamp + timedelta(seconds=remaining)
+        return result
+
+
+async def tcp_probe(url: str, timeout: float) -> Optional[str]:
+    """
+    Tester l'ouverture d'une connexion TCP vers l'hôte et le port d'une URL
+    
+    Returns:
+        None si la connexion s'établit, sinon le message d'erreur
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, port), timeout
+        )
+    except asyncio.TimeoutError:
+        return f"TCP: pas de réponse après {timeout}s"
+    except OSError as e:
+        return f"TCP: {e.strerror or e}"
+    
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return None
+
+
+def precheck_status(checker, error: str):
+    """Construire le résultat DOWN d'un service dont le port TCP est fermé"""
+    from app import ServiceStatus
+    
+    result = ServiceStatus(
+        service_name=checker.name,
+        is_healthy=False,
+        response_time=0,
+        error=error
+    )
+    result.critical = checker.critical
+    result.description = checker.description
+    return result
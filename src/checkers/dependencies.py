@@ -0,0 +1,93 @@
+"""
+Service Dependencies
+Graphe de dépendances entre services d'un même fichier de configuration
+
+Chaque service peut déclarer `depends_on` (liste de noms de services).
+Les services sont vérifiés par niveaux topologiques: tant qu'un parent est
+DOWN au cycle courant, ses dépendants ne sont pas sondés et sont marqués
+injoignables avec le parent en cause racine.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def dependency_levels(checkers: List) -> List[List]:
+    """
+    Ordonner les checkers par niveaux topologiques (algorithme de Kahn)
+    
+    Les dépendances vers des services inconnus sont ignorées. Les services
+    pris dans un cycle sont placés dans un dernier niveau, sans ordre.
+    
+    Returns:
+        Liste de niveaux, chaque niveau ne dépendant que des précédents
+    """
+    by_name = {checker.name: checker for checker in checkers}
+    parents: Dict[str, set] = {}
+    
+    for checker in checkers:
+        deps = set()
+        for parent in getattr(checker, 'depends_on', None) or []:
+            if parent not in by_name:
+                logger.warning(f"⚠️ {checker.name}: dépendance inconnue ignorée: {parent}")
+            elif parent != checker.name:
+                deps.add(parent)
+        parents[checker.name] = deps
+    
+    levels = []
+    placed = set()
+    remaining = [checker.name for checker in checkers]
+    
+    while remaining:
+        level = [name for name in remaining if parents[name] <= placed]
+        if not level:
+            logger.error(f"❌ Cycle de dépendances détecté: {', '.join(remaining)}")
+            levels.append([by_name[name] for name in remaining])
+            break
+        
+        levels.append([by_name[name] for name in level])
+        placed.update(level)
+        remaining = [name for name in remaining if name not in placed]
+    
+    return levels
+
+
+def root_cause(checker, results: Dict) -> Optional[str]:
+    """
+    Retourner le service DOWN à l'origine de l'indisponibilité d'un dépendant
+    
+    Args:
+        checker: Service checker dont on évalue les parents
+        results: Résultats déjà obtenus au cycle courant {nom: ServiceStatus}
+    
+    Returns:
+        Nom du service en cause racine, ou None si tous les parents sont UP
+    """
+    for parent in getattr(checker, 'depends_on', None) or []:
+        result = results.get(parent)
+        if result is None:
+            continue
+        if isinstance(result, Exception):
+            return parent
+        if not result.is_healthy:
+            return getattr(result, 'root_cause', None) or parent
+    return None
+
+
+def unreachable_status(checker, cause: str):
+    """Construire le résultat d'un service non sondé car son parent est DOWN"""
+    from app import ServiceStatus
+    
+    result = ServiceStatus(
+        service_name=checker.name,
+        is_healthy=False,
+        response_time=0,
+        error=f"Injoignable (parent DOWN: {cause})"
+    )
+    result.critical = checker.critical
+    result.description = checker.description
+    result.unreachable = True
+    result.root_cause = cause
+    return result
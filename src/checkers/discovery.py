@@ -0,0 +1,305 @@
+"""
+Target Discovery
+Découverte automatique des services depuis les stacks docker compose
+
+Les fichiers compose (`/opt/*/docker-compose.yaml` par défaut, comme
+`bin/smart-reboot.sh`) sont lus et chaque service qui publie un port TCP et
+porte un label `controlplane.check.*` devient une cible HTTP, au format des
+services du JSON. Avec `require_label: false`, tous les services publiant un port
+sont sondés en HTTP, y compris les bases (Postgres, Redis, MQTT) qui ne
+répondent pas en HTTP: à exclure avec `controlplane.check.enable: "false"`.
+Les labels des services ajustent la cible:
+
+  controlplane.check.enable: "false"      # Ne pas surveiller ce service
+  controlplane.check.port: "8080"         # Port sondé (défaut: 1er port publié)
+  controlplane.check.path: "/health"      # Chemin ajouté à l'URL
+  controlplane.check.url: "http://..."    # URL complète (remplace base_url/port)
+  controlplane.check.name: "Mon service"  # Nom (défaut: <projet>/<service>)
+  controlplane.check.description: "..."
+  controlplane.check.critical: "true"
+  controlplane.check.timeout: "5"
+
+Optionnellement, les conteneurs en cours d'exécution portant ces labels sont
+aussi interrogés via l'API Docker (socket Unix). Les fichiers ne sont relus
+que si leur date de modification a changé; les cibles découvertes sont
+fusionnées avec les services statiques du JSON, qui restent prioritaires.
+
+Configuration (champ `discovery` du JSON):
+{
+  "compose": ["/opt/*/docker-compose.yaml", "/opt/*/docker-compose.yml", "/opt/*/compose.yaml"],
+  "docker_labels": false,               # Interroger aussi les conteneurs (API Docker)
+  "docker_socket": "/var/run/docker.sock",
+  "require_label": true,                # Seulement les services portant un label controlplane.check.*
+  "critical": false,                    # Criticité par défaut des cibles découvertes
+  "refresh_interval": 300               # Secondes entre deux scans
+}
+`true` utilise ces valeurs par défaut.
+"""
+
+import glob
+import http.client
+import json
+import logging
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+LABEL_PREFIX = 'controlplane.check.'
+
+DEFAULT_COMPOSE_PATTERNS = [
+    '/opt/*/docker-compose.yaml',
+    '/opt/*/docker-compose.yml',
+    '/opt/*/compose.yaml',
+]
+
+
+def _as_bool(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _labels(raw) -> Dict[str, str]:
+    """Labels compose: dictionnaire ou liste `clé=valeur`"""
+    if isinstance(raw, dict):
+        return {str(k): '' if v is None else str(v) for k, v in raw.items()}
+    labels = {}
+    for item in raw or []:
+        key, _, value = str(item).partition('=')
+        labels[key] = value
+    return labels
+
+
+def published_port(ports) -> Optional[int]:
+    """Premier port TCP publié sur l'hôte (syntaxe courte ou longue de compose)"""
+    for entry in ports or []:
+        if isinstance(entry, dict):
+            if entry.get('protocol', 'tcp') != 'tcp' or not entry.get('published'):
+                continue
+            host_port = str(entry['published'])
+        elif isinstance(entry, str):
+            mapping, _, protocol = entry.partition('/')
+            if protocol and protocol != 'tcp':
+                continue
+            parts = mapping.rsplit(':', 2)
+            if len(parts) < 2 or not parts[-2]:
+                continue  # Port du conteneur seul: port hôte aléatoire
+            host_port = parts[-2]
+        else:
+            continue  # Entier: port du conteneur seul
+        try:
+            return int(host_port.split('-')[0])
+        except ValueError:
+            continue
+    return None
+
+
+def _target(name: str, port: Optional[int], labels: Dict[str, str],
+            description: str, tags: List[str], critical: bool) -> Optional[Dict]:
+    """Cible au format des services du JSON (None si rien à sonder)"""
+    if not _as_bool(labels.get(LABEL_PREFIX + 'enable'), True):
+        return None
+    
+    target = {
+        'name': labels.get(LABEL_PREFIX + 'name') or name,
+        'description': labels.get(LABEL_PREFIX + 'description') or description,
+        'critical': _as_bool(labels.get(LABEL_PREFIX + 'critical'), critical),
+        'tags': tags,
+    }
+    if labels.get(LABEL_PREFIX + 'url'):
+        target['url'] = labels[LABEL_PREFIX + 'url']
+    else:
+        try:
+            port = int(labels.get(LABEL_PREFIX + 'port') or port or 0)
+        except ValueError:
+            port = 0
+        if not port:
+            return None
+        target['port'] = port
+        if labels.get(LABEL_PREFIX + 'path'):
+            target['path'] = labels[LABEL_PREFIX + 'path']
+    try:
+        if labels.get(LABEL_PREFIX + 'timeout'):
+            target['timeout'] = float(labels[LABEL_PREFIX + 'timeout'])
+    except ValueError:
+        logger.warning(f"⚠️ {target['name']}: timeout invalide ({labels[LABEL_PREFIX + 'timeout']})")
+    return target
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """Connexion HTTP sur le socket Unix de Docker"""
+    
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class TargetDiscovery:
+    """Cibles découvertes depuis les fichiers compose et les labels Docker"""
+    
+    def __init__(self, compose: Optional[List[str]] = None, docker_labels: bool = False,
+                 docker_socket: str = '/var/run/docker.sock', require_label: bool = True,
+                 critical: bool = False, refresh_interval: float = 300):
+        """
+        Args:
+            compose: Motifs glob des fichiers compose
+            docker_labels: Interroger aussi les conteneurs via l'API Docker
+            docker_socket: Socket Unix de l'API Docker
+            require_label: Ne garder que les services portant un label controlplane.check.*
+            critical: Criticité par défaut des cibles découvertes
+            refresh_interval: Secondes entre deux scans
+        """
+        self.compose = list(DEFAULT_COMPOSE_PATTERNS if compose is None else compose)
+        self.docker_labels = docker_labels
+        self.docker_socket = docker_socket
+        self.require_label = require_label
+        self.critical = critical
+        self.refresh_interval = refresh_interval
+        
+        # Fichier -> (date de modification, cibles)
+        self._cache: Dict[str, Tuple[int, List[Dict]]] = {}
+        # Dernières cibles Docker (conservées si l'API ne répond pas)
+        self._containers: List[Dict] = []
+        self._last_scan: Optional[float] = None
+    
+    @classmethod
+    def from_config(cls, config: Union[bool, Dict, None]) -> Optional['TargetDiscovery']:
+        """Construire depuis la configuration JSON (None si désactivé)"""
+        if not config:
+            return None
+        if config is True:
+            config = {}
+        if not config.get('enabled', True):
+            return None
+        
+        return cls(
+            compose=config.get('compose'),
+            docker_labels=config.get('docker_labels', False),
+            docker_socket=config.get('docker_socket', '/var/run/docker.sock'),
+            require_label=config.get('require_label', True),
+            critical=config.get('critical', False),
+            refresh_interval=config.get('refresh_interval', 300)
+        )
+    
+    def due(self, now: Optional[float] = None) -> bool:
+        """Un nouveau scan est-il dû ?"""
+        now = time.monotonic() if now is None else now
+        return self._last_scan is None or now - self._last_scan >= self.refresh_interval
+    
+    def scan(self) -> List[Dict]:
+        """
+        Scanner les fichiers compose (seulement ceux modifiés) et les conteneurs
+        
+        Returns:
+            Cibles au format des services du JSON, sans doublon de nom
+        """
+        self._last_scan = time.monotonic()
+        
+        paths = sorted({path for pattern in self.compose for path in glob.glob(pattern)})
+        for stale in set(self._cache) - set(paths):
+            del self._cache[stale]
+        
+        targets: List[Dict] = []
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._cache.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = self._cache[path] = (mtime, self._parse_compose(path))
+            targets.extend(cached[1])
+        
+        if self.docker_labels:
+            targets.extend(self._scan_containers())
+        
+        unique: Dict[str, Dict] = {}
+        for target in targets:
+            unique.setdefault(target['name'], target)
+        return list(unique.values())
+    
+    def _parse_compose(self, path: str) -> List[Dict]:
+        """Cibles d'un fichier compose"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                compose = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning(f"⚠️ Fichier compose illisible ({path}): {e}")
+            return []
+        
+        project = compose.get('name') or os.path.basename(os.path.dirname(os.path.abspath(path)))
+        targets = []
+        for service_name, service in (compose.get('services') or {}).items():
+            service = service or {}
+            labels = _labels(service.get('labels'))
+            if self.require_label and not any(k.startswith(LABEL_PREFIX) for k in labels):
+                continue
+            target = _target(
+                name=f"{project}/{service_name}",
+                port=published_port(service.get('ports')),
+                labels=labels,
+                description=f"Stack {project} (docker compose)",
+                tags=['compose', project],
+                critical=self.critical
+            )
+            if target:
+                targets.append(target)
+        
+        logger.debug("🔎 %s: %d cible(s) découverte(s)", path, len(targets))
+        return targets
+    
+    def _scan_containers(self) -> List[Dict]:
+        """Cibles des conteneurs en cours d'exécution portant un label controlplane.check.*"""
+        conn = _UnixHTTPConnection(self.docker_socket, timeout=5)
+        try:
+            conn.request('GET', '/containers/json')
+            response = conn.getresponse()
+            if response.status != 200:
+                raise OSError(f"HTTP {response.status}")
+            containers = json.loads(response.read())
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            logger.warning(f"⚠️ API Docker indisponible ({self.docker_socket}): {e}")
+            return self._containers
+        finally:
+            conn.close()
+        
+        targets = []
+        for container in containers:
+            labels = container.get('Labels') or {}
+            if not any(k.startswith(LABEL_PREFIX) for k in labels):
+                continue
+            project = labels.get('com.docker.compose.project')
+            service = labels.get('com.docker.compose.service')
+            name = f"{project}/{service}" if project and service else (
+                (container.get('Names') or ['?'])[0].lstrip('/')
+            )
+            port = next(
+                (p['PublicPort'] for p in container.get('Ports') or []
+                 if p.get('PublicPort') and p.get('Type', 'tcp') == 'tcp'),
+                None
+            )
+            target = _target(
+                name=name,
+                port=port,
+                labels=labels,
+                description=f"Conteneur {name} (labels Docker)",
+                tags=['docker', project] if project else ['docker'],
+                critical=self.critical
+            )
+            if target:
+                targets.append(target)
+        
+        self._containers = targets
+        return targets
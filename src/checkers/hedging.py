@@ -0,0 +1,105 @@
+"""
+Hedged Probes
+Relance d'une sonde en parallèle quand la première tarde
+
+Si une sonde n'a pas répondu après le p95 de la latence récente du service,
+une seconde sonde part sur une nouvelle connexion; la première réponse UP
+l'emporte et l'autre est annulée. Un handshake TCP malchanceux ne fait plus
+passer le service DOWN pour tout un intervalle, sans allonger le timeout:
+la relance dispose seulement du temps restant.
+
+Le taux de relance est plafonné (`max_rate` des dernières sondes) et chaque
+relance est enregistrée comme phase `hedge` (délai avant relance) dans
+`phase_timings`.
+
+Configuration (champ `hedging` de `settings` dans le JSON):
+{
+  "percentile": 0.95,    # Délai avant relance: percentile de la latence récente
+  "max_rate": 0.1,       # Part maximale de sondes relancées
+  "min_delay": 0.05,     # Délai minimal avant relance (secondes)
+  "min_samples": 20,     # Mesures nécessaires avant d'activer les relances
+  "window": 200          # Sondes prises en compte pour le taux de relance
+}
+`true` utilise ces valeurs par défaut.
+"""
+
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Union
+
+from src.checkers.timeouts import LatencyWindows
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """Délai de relance par service et plafond du taux de relance"""
+    
+    def __init__(self, percentile: float = 0.95, max_rate: float = 0.1,
+                 min_delay: float = 0.05, min_samples: int = 20, window: int = 200):
+        """
+        Args:
+            percentile: Percentile de latence déclenchant la relance (0-1)
+            max_rate: Part maximale de sondes relancées sur la fenêtre
+            min_delay: Délai minimal avant relance (secondes)
+            min_samples: Mesures nécessaires avant d'activer les relances
+            window: Sondes prises en compte pour le taux de relance
+        """
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_delay = min_delay
+        self.min_samples = max(1, min_samples)
+        self.recent: Deque[bool] = deque(maxlen=window)
+        self.probes = 0
+        self.hedges = 0
+    
+    @classmethod
+    def from_config(cls, config: Union[bool, Dict, None]) -> Optional['HedgePolicy']:
+        """Construire depuis la configuration JSON (None si désactivé)"""
+        if not config:
+            return None
+        if config is True:
+            config = {}
+        if not config.get('enabled', True):
+            return None
+        
+        return cls(
+            percentile=config.get('percentile', 0.95),
+            max_rate=config.get('max_rate', 0.1),
+            min_delay=config.get('min_delay', 0.05),
+            min_samples=config.get('min_samples', 20),
+            window=config.get('window', 200)
+        )
+    
+    @property
+    def rate(self) -> float:
+        """Taux de relance sur la fenêtre récente"""
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+    
+    def plan(self, checkers: List, latencies: LatencyWindows):
+        """
+        Fixer `hedge_after` de chaque checker avant un lot de sondes
+        
+        Le budget du lot est calculé comme si toutes les sondes armées
+        étaient relancées: le plafond `max_rate` n'est jamais dépassé.
+        """
+        budget = int(self.max_rate * (len(self.recent) + len(checkers))) - sum(self.recent)
+        for checker in checkers:
+            delay = None
+            if budget > 0:
+                delay = latencies.quantile(checker.name, self.percentile, self.min_samples)
+            if delay is not None:
+                delay = round(max(delay, self.min_delay), 3)
+                if delay >= checker.timeout:
+                    delay = None
+            if delay is not None:
+                budget -= 1
+            checker.hedge_after = delay
+    
+    def record(self, result):
+        """Comptabiliser une sonde (relancée ou non)"""
+        hedged = bool(getattr(result, 'hedged', False))
+        self.recent.append(hedged)
+        self.probes += 1
+        if hedged:
+            self.hedges += 1
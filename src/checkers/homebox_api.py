@@ -0,0 +1,237 @@
+"""
+Homebox API Deep Checker
+Vérification approfondie de l'API Homebox (CHECK_HOMEBOX_SERVICES)
+
+Au-delà du port qui répond, chaque cycle:
+1. `GET /api/v1/status`: santé déclarée, schéma de la réponse et version
+   (optionnellement comparée à `homebox_api_min_version`)
+2. `GET /api/v1/items?pageSize=1`: listing authentifié d'un item, qui passe
+   par la base de données (joignabilité de la base et latence de l'API)
+
+L'authentification (`POST /api/v1/users/login`) n'a lieu qu'une fois: le
+token est réutilisé jusqu'à son expiration ou un refus (401). Sans
+identifiants, le listing n'est pas authentifié et un 401 prouve seulement
+que l'API répond.
+
+Les durées sont enregistrées comme phases `login`, `status` et `items` dans
+`phase_timings`; le temps de réponse du service est la latence synthétique
+(statut + listing), suivie par les références de latence comme les autres.
+
+Configuration (.env):
+CHECK_HOMEBOX_SERVICES=true
+HOMEBOX_API_URL=http://192.168.1.130:7745   # défaut: HOMEBOX_URL
+HOMEBOX_API_USERNAME=monitoring@example.com
+HOMEBOX_API_PASSWORD=...
+"""
+
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Marge avant l'expiration du token pour se reconnecter
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Champs attendus dans la réponse de /api/v1/status
+STATUS_FIELDS = ('health', 'build')
+
+
+def _version_tuple(version: str) -> Tuple[int, ...]:
+    """'v0.10.3' -> (0, 10, 3)"""
+    return tuple(int(part) for part in re.findall(r'\d+', version or ''))
+
+
+def _parse_expiry(value: Optional[str]) -> Optional[datetime]:
+    """Date d'expiration du token (RFC 3339, fractions de seconde tronquées)"""
+    if not value:
+        return None
+    value = re.sub(r'(\.\d{6})\d+', r'\1', value.replace('Z', '+00:00'))
+    try:
+        expires_at = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at
+
+
+class HomeboxAPIChecker:
+    """Vérification approfondie de l'API Homebox (statut, login, listing des items)"""
+    
+    def __init__(self, url: str, username: Optional[str] = None,
+                 password: Optional[str] = None, timeout: float = 10,
+                 min_version: Optional[str] = None, name: str = "Homebox API Deep"):
+        """
+        Args:
+            url: URL de Homebox (sans /api)
+            username: Compte utilisé pour le listing authentifié (optionnel)
+            password: Mot de passe du compte (optionnel)
+            timeout: Timeout de chaque requête en secondes
+            min_version: Version minimale attendue de Homebox (optionnel)
+            name: Nom du service
+        """
+        self.name = name
+        self.url = url.rstrip('/')
+        self.api_base = f"{self.url}/api/v1"
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.min_version = min_version
+        
+        # Token réutilisé d'un cycle à l'autre
+        self.token: Optional[str] = None
+        self.token_expires_at: Optional[datetime] = None
+        self.logins = 0
+        
+        auth = f"compte {username}" if username else "sans authentification"
+        logger.info("✓ %s checker initialisé: %s (%s)", name, self.api_base, auth)
+    
+    def _token_valid(self) -> bool:
+        if not self.token:
+            return False
+        if self.token_expires_at is None:
+            return True
+        return datetime.now(timezone.utc) < self.token_expires_at - TOKEN_REFRESH_MARGIN
+    
+    async def _login(self, session: aiohttp.ClientSession, phases: Dict[str, float]):
+        """Obtenir un token (seulement si le précédent a expiré ou a été refusé)"""
+        start = time.perf_counter()
+        async with session.post(
+            f"{self.api_base}/users/login",
+            json={'username': self.username, 'password': self.password, 'stayLoggedIn': True}
+        ) as response:
+            if response.status != 200:
+                raise PermissionError(f"Login refusé (HTTP {response.status})")
+            data = await response.json(content_type=None)
+        phases['login'] = time.perf_counter() - start
+        
+        if not isinstance(data, dict):
+            raise PermissionError("Login: réponse inattendue (objet JSON attendu)")
+        token = data.get('token')
+        if not token:
+            raise PermissionError("Login: token absent de la réponse")
+        self.token = token if token.startswith('Bearer ') else f"Bearer {token}"
+        self.token_expires_at = _parse_expiry(data.get('expiresAt'))
+        self.logins += 1
+        logger.info("🔑 %s: authentifié (%s)", self.name, self.username)
+    
+    async def _status(self, session: aiohttp.ClientSession, phases: Dict[str, float]) -> Dict:
+        """Statut déclaré par Homebox (schéma vérifié)"""
+        start = time.perf_counter()
+        async with session.get(f"{self.api_base}/status") as response:
+            if response.status != 200:
+                raise RuntimeError(f"/status: HTTP {response.status}")
+            data = await response.json(content_type=None)
+        phases['status'] = time.perf_counter() - start
+        
+        if not isinstance(data, dict):
+            raise ValueError("/status: réponse inattendue (objet JSON attendu)")
+        missing = [field for field in STATUS_FIELDS if field not in data]
+        if missing:
+            raise ValueError(f"/status: schéma inattendu (champs absents: {', '.join(missing)})")
+        return data
+    
+    async def _items(self, session: aiohttp.ClientSession,
+                     phases: Dict[str, float]) -> Tuple[int, Optional[Dict]]:
+        """Listing d'un item (authentifié si possible); réessaie une fois après un 401"""
+        for attempt in range(2):
+            headers = {}
+            if self.username:
+                if not self._token_valid():
+                    await self._login(session, phases)
+                headers['Authorization'] = self.token
+            
+            start = time.perf_counter()
+            async with session.get(
+                f"{self.api_base}/items", params={'page': 1, 'pageSize': 1}, headers=headers
+            ) as response:
+                status = response.status
+                data = await response.json(content_type=None) if status == 200 else None
+            phases['items'] = time.perf_counter() - start
+            
+            if status == 401 and self.username and attempt == 0:
+                # Token révoqué ou expiré côté serveur: nouvelle connexion
+                self.token = None
+                continue
+            return status, data
+    
+    async def check(self):
+        """Vérifier le statut, la version, la base (listing) et la latence de l'API"""
+        from app import ServiceStatus
+        
+        phases: Dict[str, float] = {}
+        details = []
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                status_data = await self._status(session, phases)
+                build = status_data.get('build')
+                version = (build.get('version') if isinstance(build, dict) else None) or '?'
+                
+                if not status_data.get('health'):
+                    raise RuntimeError(f"Homebox se déclare en mauvaise santé (version {version})")
+                details.append(f"✅ Health endpoint OK (version {version})")
+                
+                if self.min_version and _version_tuple(version) < _version_tuple(self.min_version):
+                    raise ValueError(f"Version {version} inférieure à {self.min_version}")
+                
+                items_status, items_data = await self._items(session, phases)
+        
+        except PermissionError as e:
+            self.token = None
+            return self._failure(str(e), phases, details)
+        except aiohttp.ClientConnectorError as e:
+            return self._failure(f"Connexion impossible: {e}", phases, details)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            return self._failure(f"Erreur HTTP: {e or 'timeout'}", phases, details)
+        except (RuntimeError, ValueError) as e:
+            return self._failure(str(e), phases, details)
+        
+        error = None
+        if items_status == 200:
+            total = items_data.get('total') if isinstance(items_data, dict) else None
+            details.append(
+                f"✅ Base de données (listing items {phases['items']:.2f}s"
+                + (f", {total} item(s)" if total is not None else "") + ")"
+            )
+        elif items_status == 401 and not self.username:
+            details.append("🔒 Listing items: auth requise (HOMEBOX_API_USERNAME non défini)")
+        else:
+            error = f"Listing items: HTTP {items_status}"
+            details.append(f"❌ {error} (base de données ?)")
+        
+        phases['total'] = phases['status'] + phases['items']
+        result = ServiceStatus(
+            service_name=self.name,
+            is_healthy=error is None,
+            response_time=phases['total'],
+            status_code=items_status,
+            error=error
+        )
+        result.details = "\n   ".join(details)
+        result.phases = phases
+        # Sans compte, seul le statut déclaré est vérifié
+        result.critical = bool(self.username)
+        logger.debug("🔬 %s: %s", self.name, result.details)
+        return result
+    
+    def _failure(self, error: str, phases: Dict[str, float], details):
+        """Résultat DOWN avec les détails déjà collectés"""
+        from app import ServiceStatus
+        
+        logger.error("❌ %s: %s", self.name, error)
+        result = ServiceStatus(
+            service_name=self.name,
+            is_healthy=False,
+            response_time=sum(phases.values()),
+            error=error
+        )
+        result.details = "\n   ".join(details + [f"❌ {error}"])
+        result.critical = bool(self.username)
+        return result
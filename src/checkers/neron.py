@@ -27,7 +27,15 @@ import time
 import logging
 import json
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Awaitable, Callable, Optional, Dict, List
+
+from src.checkers.assertions import ResponseAssertion
+from src.checkers.backoff import ProbeBackoff, precheck_status, tcp_probe
+from src.checkers.dependencies import dependency_levels, root_cause, unreachable_status
+from src.checkers.discovery import TargetDiscovery
+from src.checkers.hedging import HedgePolicy
+from src.checkers.timeouts import AdaptiveTimeout, LatencyWindows
+from src.checkers.tracing import PhaseTimer, create_trace_config
 
 logger = logging.getLogger(__name__)
 
@@ -35,75 +43,116 @@ logger = logging.getLogger(__name__)
 class NeronServiceChecker:
     """Vérificateur pour un service Neron individuel"""
     
-    def __init__(self, name: str, url: str, timeout: int = 10, 
-                 critical: bool = True, description: str = None):
+    def __init__(self, name: str, url: str, timeout: float = 10, 
+                 critical: bool = True, description: str = None,
+                 assertions: Optional[Dict] = None,
+                 depends_on: Optional[List[str]] = None,
+                 tags: Optional[List[str]] = None,
+                 adaptive_timeout: bool = True):
         """
         Args:
             name: Nom du service
             url: URL complète avec port
-            timeout: Timeout en secondes
+            timeout: Timeout en secondes (configuré, remplacé par le timeout adaptatif)
             critical: Si True, une panne déclenche une alerte critique
             description: Description du service (optionnel)
+            assertions: Assertions sur le corps de la réponse (optionnel)
+            depends_on: Services dont dépend ce service (optionnel)
+            tags: Étiquettes libres du service, pour filtrer les événements (optionnel)
+            adaptive_timeout: Si False, le timeout configuré s'applique toujours
         """
         self.name = name
         self.url = url.rstrip('/')
         self.timeout = timeout
+        self.base_timeout = timeout
+        self.adaptive_timeout = adaptive_timeout
+        # Délai avant relance de la sonde (fixé par le groupe, None = pas de relance)
+        self.hedge_after: Optional[float] = None
         self.critical = critical
         self.description = description
-        logger.info(f"✓ {name} checker initialisé: {url}" + 
-                   (f" ({description})" if description else ""))
+        self.assertions = assertions
+        self.assertion = ResponseAssertion.from_config(assertions)
+        self.depends_on = list(depends_on or [])
+        self.tags = list(tags or [])
+        self._trace_config = create_trace_config()
+        logger.info("✓ %s checker initialisé: %s%s", name, url,
+                    f" ({description})" if description else "")
     
-    async def check(self):
-        """Vérifier l'état du service"""
+    def spec(self) -> Dict:
+        """Paramètres de construction (pour recréer le checker dans un worker)"""
+        return {
+            'name': self.name,
+            'url': self.url,
+            'timeout': self.timeout,
+            'critical': self.critical,
+            'description': self.description,
+            'assertions': self.assertions,
+            'depends_on': self.depends_on,
+            'tags': self.tags,
+            'adaptive_timeout': self.adaptive_timeout
+        }
+    
+    async def _probe(self, timeout_seconds: float):
+        """Sonder le service une fois, sur une nouvelle connexion"""
         from app import ServiceStatus
         
         start_time = time.time()
+        timer = PhaseTimer()
         
         try:
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            timeout = aiohttp.ClientTimeout(total=timeout_seconds)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(self.url) as response:
+            async with aiohttp.ClientSession(timeout=timeout,
+                                             trace_configs=[self._trace_config]) as session:
+                async with session.get(self.url, trace_request_ctx=timer) as response:
                     response_time = time.time() - start_time
                     
                     # 200 = OK, 401 = Auth required mais service UP
                     is_healthy = response.status in [200, 401]
+                    error = None if is_healthy else f"HTTP {response.status}"
+                    
+                    # Assertions sur un préfixe borné du corps (réponses 200 uniquement)
+                    if response.status == 200 and self.assertion:
+                        error = await self.assertion.evaluate(response)
+                        is_healthy = error is None
                     
                     if is_healthy:
-                        logger.debug(f"✅ {self.name}: UP ({response_time:.2f}s)")
+                        logger.debug("✅ %s: UP (%.2fs)", self.name, response_time)
                     else:
-                        logger.warning(f"❌ {self.name}: DOWN (HTTP {response.status})")
+                        logger.warning("❌ %s: DOWN (%s)", self.name, error)
                     
                     result = ServiceStatus(
                         service_name=self.name,
                         is_healthy=is_healthy,
                         response_time=response_time,
                         status_code=response.status,
-                        error=None if is_healthy else f"HTTP {response.status}"
+                        error=error
                     )
                     
                     # Ajouter les attributs personnalisés
                     result.critical = self.critical
                     result.description = self.description
+                    result.phases = dict(timer.phases)
                     
                     return result
         
         except asyncio.TimeoutError:
             response_time = time.time() - start_time
-            logger.error(f"⏱️ {self.name}: Timeout après {self.timeout}s")
+            logger.error("⏱️ %s: Timeout après %ss", self.name, timeout_seconds)
             result = ServiceStatus(
                 service_name=self.name,
                 is_healthy=False,
                 response_time=response_time,
-                error=f"Timeout après {self.timeout}s"
+                error=f"Timeout après {timeout_seconds}s"
             )
             result.critical = self.critical
             result.description = self.description
+            result.phases = dict(timer.phases)
             return result
         
         except Exception as e:
             response_time = time.time() - start_time
-            logger.error(f"❌ {self.name}: {str(e)}")
+            logger.error("❌ %s: %s", self.name, e)
             result = ServiceStatus(
                 service_name=self.name,
                 is_healthy=False,
@@ -112,7 +161,45 @@ class NeronServiceChecker:
             )
             result.critical = self.critical
             result.description = self.description
+            result.phases = dict(timer.phases)
             return result
+    
+    async def check(self):
+        """Vérifier l'état du service (avec relance si `hedge_after` est fixé)"""
+        if not self.hedge_after:
+            return await self._probe(self.timeout)
+        
+        start_time = time.time()
+        first = asyncio.create_task(self._probe(self.timeout))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+        
+        # Pas de réponse au p95: seconde sonde dans le temps restant, la première UP l'emporte
+        logger.info("🔀 %s: pas de réponse après %ss, sonde relancée", self.name, self.hedge_after)
+        second = asyncio.create_task(self._probe(self.timeout - self.hedge_after))
+        pending = {first, second}
+        results = {}
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[task] = task.result()
+                    if winner is None and results[task].is_healthy:
+                        winner = task
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        if winner is None:
+            winner = first if first in results else second
+        result = results[winner]
+        result.response_time = time.time() - start_time
+        result.hedged = True
+        result.phases['hedge'] = self.hedge_after
+        return result
 
 
 class NeronChecker:
@@ -123,16 +210,28 @@ class NeronChecker:
     """
     
     def __init__(self, config_file: str = "config/neron.json", 
-                 fallback_url: str = None, fallback_timeout: int = 10):
+                 fallback_url: str = None, fallback_timeout: int = 10,
+                 fallback_services: Optional[Dict[str, int]] = None,
+                 backoff: Optional[ProbeBackoff] = None):
         """
         Args:
             config_file: Chemin vers le fichier JSON de configuration
             fallback_url: URL de fallback si le JSON n'existe pas
             fallback_timeout: Timeout de fallback
+            fallback_services: Services du fallback (nom -> port sur fallback_url)
+            backoff: Espacement des sondes des services DOWN (optionnel)
         """
         self.name = "Neron"
         self.config_file = Path(config_file)
         self.service_checkers = []
+        self.levels = []
+        self.backoff = backoff
+        self.timeouts: Optional[AdaptiveTimeout] = None
+        self.hedging: Optional[HedgePolicy] = None
+        self.latencies: Optional[LatencyWindows] = None
+        self.discovery: Optional[TargetDiscovery] = None
+        # Cibles découvertes actuellement surveillées (nom -> cible)
+        self.discovered: Dict[str, Dict] = {}
         
         # Charger la configuration depuis le JSON
         if self.config_file.exists():
@@ -140,10 +239,12 @@ class NeronChecker:
             self._load_from_json()
         elif fallback_url:
             logger.warning(f"⚠️ Fichier {config_file} non trouvé, utilisation du fallback")
-            self._load_fallback(fallback_url, fallback_timeout)
+            self._load_fallback(fallback_url, fallback_timeout, fallback_services)
         else:
             logger.error(f"❌ Fichier {config_file} non trouvé et pas de fallback")
         
+        self.levels = dependency_levels(self.service_checkers)
+        
         logger.info(f"✅ Neron checker initialisé avec {len(self.service_checkers)} service(s)")
     
     def _load_from_json(self):
@@ -158,12 +259,30 @@ class NeronChecker:
             
             # Extraire les paramètres
             timeout = settings.get('timeout', 10)
+            self.base_url = base_url
+            self.default_timeout = timeout
+            self.discovery = TargetDiscovery.from_config(config.get('discovery'))
             self.max_response_time = settings.get('max_response_time', 5.0)
             self.check_parallel = settings.get('check_parallel', True)
+            self.timeouts = AdaptiveTimeout.from_config(settings.get('adaptive_timeout'))
+            self.hedging = HedgePolicy.from_config(settings.get('hedging'))
+            if self.timeouts or self.hedging:
+                self.latencies = LatencyWindows(self.timeouts.window if self.timeouts else 500)
             
             logger.info(f"🔧 Configuration chargée:")
             logger.info(f"   URL de base: {base_url}")
             logger.info(f"   Timeout: {timeout}s")
+            if self.timeouts:
+                logger.info(
+                    f"   Timeout adaptatif: p{self.timeouts.percentile * 100:g} "
+                    f"x{self.timeouts.multiplier:g}, entre {self.timeouts.min_timeout:g}s "
+                    f"et {self.timeouts.max_timeout:g}s"
+                )
+            if self.hedging:
+                logger.info(
+                    f"   Relance des sondes: après p{self.hedging.percentile * 100:g}, "
+                    f"au plus {self.hedging.max_rate:.0%} des sondes"
+                )
             logger.info(f"   Max response time: {self.max_response_time}s")
             logger.info(f"   Services configurés:")
             
@@ -173,24 +292,12 @@ class NeronChecker:
                     logger.info(f"   ⊗ {service['name']} (désactivé)")
                     continue
                 
-                name = service['name']
-                port = service['port']
-                url = f"{base_url.rstrip('/')}:{port}"
-                critical = service.get('critical', True)
-                description = service.get('description')
-                
-                checker = NeronServiceChecker(
-                    name=name,
-                    url=url,
-                    timeout=timeout,
-                    critical=critical,
-                    description=description
-                )
-                self.service_checkers.append(checker)
-                
-                # Afficher dans les logs
-                critical_marker = "🔴" if critical else "🟡"
-                logger.info(f"      {critical_marker} {name}:{port}")
+                self.service_checkers.append(self._create_checker(service))
+            
+            # Cibles découvertes (stacks docker compose, labels Docker)
+            self.discovered = {}
+            if self.discovery:
+                self._merge_discovered(self.discovery.scan())
         
         except json.JSONDecodeError as e:
             logger.error(f"❌ Erreur de parsing JSON: {e}")
@@ -198,32 +305,237 @@ class NeronChecker:
         except Exception as e:
             logger.error(f"❌ Erreur lors du chargement de la configuration: {e}")
     
-    def _load_fallback(self, url: str, timeout: int):
-        """Charger une configuration de fallback simple"""
-        logger.info(f"🔧 Utilisation de la configuration fallback")
-        logger.info(f"   URL: {url}")
+    def _service_url(self, service: Dict) -> str:
+        """URL sondée d'un service: `url`, ou base_url + port + path"""
+        if service.get('url'):
+            return service['url']
+        return f"{self.base_url.rstrip('/')}:{service['port']}{service.get('path', '')}"
+    
+    def _create_checker(self, service: Dict) -> NeronServiceChecker:
+        """Créer le checker d'un service (format des services du JSON)"""
+        name = service['name']
+        port = service.get('port')
+        url = self._service_url(service)
+        critical = service.get('critical', True)
+        depends_on = service.get('depends_on')
         
         checker = NeronServiceChecker(
-            name="Neron",
+            name=name,
             url=url,
-            timeout=timeout,
-            critical=True,
-            description="Service unique (fallback)"
+            timeout=service.get('timeout', self.default_timeout),
+            critical=critical,
+            description=service.get('description'),
+            assertions=service.get('assertions'),
+            depends_on=depends_on,
+            tags=service.get('tags'),
+            adaptive_timeout=service.get('adaptive_timeout', True)
+        )
+        
+        # Afficher dans les logs
+        critical_marker = "🔴" if critical else "🟡"
+        deps = f" (dépend de: {', '.join(depends_on)})" if depends_on else ""
+        logger.info("      %s %s:%s%s", critical_marker, name, port or url, deps)
+        return checker
+    
+    def _merge_discovered(self, targets: List[Dict]) -> bool:
+        """
+        Fusionner les cibles découvertes avec les services statiques
+        
+        Les services du JSON restent prioritaires (même nom ou même URL).
+        Les checkers des cibles inchangées sont conservés.
+        
+        Returns:
+            True si la liste des services a changé
+        """
+        static = [c for c in self.service_checkers if c.name not in self.discovered]
+        static_names = {c.name for c in static}
+        static_urls = {c.url for c in static}
+        current = {c.name: c for c in self.service_checkers if c.name in self.discovered}
+        
+        discovered = {}
+        checkers = []
+        for target in targets:
+            if target['name'] in static_names or self._service_url(target).rstrip('/') in static_urls:
+                continue
+            checker = current.get(target['name'])
+            if checker is None or self.discovered[target['name']] != target:
+                checker = self._create_checker(target)
+            discovered[target['name']] = target
+            checkers.append(checker)
+        
+        added = set(discovered) - set(self.discovered)
+        removed = set(self.discovered) - set(discovered)
+        changed = added or removed or any(
+            self.discovered[name] != discovered[name] for name in discovered if name in self.discovered
         )
-        self.service_checkers.append(checker)
+        if not changed:
+            return False
+        
+        if added:
+            logger.info("🔎 Service(s) découvert(s): %s", ", ".join(sorted(added)))
+        if removed:
+            logger.info("🔎 Service(s) disparu(s): %s", ", ".join(sorted(removed)))
+            if self.backoff:
+                for name in removed:
+                    self.backoff.reset(name)
+        self.discovered = discovered
+        self.service_checkers = static + checkers
+        return True
+    
+    async def refresh_discovery(self):
+        """Re-scanner les cibles découvertes si le scan est dû (fichiers modifiés seulement)"""
+        if not self.discovery or not self.discovery.due():
+            return
+        targets = await asyncio.get_running_loop().run_in_executor(None, self.discovery.scan)
+        if self._merge_discovered(targets):
+            self.levels = dependency_levels(self.service_checkers)
+    
+    def _load_fallback(self, url: str, timeout: int, services: Optional[Dict[str, int]] = None):
+        """Charger une configuration de fallback (service unique, ou un service par port)"""
+        logger.info(f"🔧 Utilisation de la configuration fallback")
+        logger.info(f"   URL: {url}")
+        
+        if services:
+            for name, port in services.items():
+                self.service_checkers.append(NeronServiceChecker(
+                    name=name,
+                    url=f"{url.rstrip('/')}:{port}",
+                    timeout=timeout,
+                    critical=True,
+                    description=f"Port {port} (fallback)"
+                ))
+        else:
+            self.service_checkers.append(NeronServiceChecker(
+                name="Neron",
+                url=url,
+                timeout=timeout,
+                critical=True,
+                description="Service unique (fallback)"
+            ))
         self.max_response_time = 5.0
         self.check_parallel = True
     
     def reload_config(self):
         """Recharger la configuration depuis le JSON"""
         logger.info("🔄 Rechargement de la configuration...")
+        previous_latencies = self.latencies
         self.service_checkers = []
         self._load_from_json()
+        if previous_latencies and self.latencies:
+            # Conserver les latences déjà observées
+            self.latencies.samples = previous_latencies.samples
+        self.levels = dependency_levels(self.service_checkers)
+        if self.backoff:
+            self.backoff.reset()
     
-    async def check(self):
-        """Vérifier tous les services"""
+    async def _run_checks(self, checkers: List[NeronServiceChecker]) -> List:
+        """Exécuter les vérifications dans la boucle courante (parallèle ou séquentiel)"""
+        if self.check_parallel:
+            return await asyncio.gather(
+                *[checker.check() for checker in checkers],
+                return_exceptions=True
+            )
+        
+        results = []
+        for checker in checkers:
+            result = await checker.check()
+            results.append(result)
+        return results
+    
+    async def _check_levels(self, runner: Callable[[List], Awaitable[List]]) -> List:
+        """
+        Vérifier les services niveau par niveau du graphe de dépendances
+        
+        Les dépendants d'un parent DOWN ne sont pas sondés: ils sont marqués
+        injoignables avec le parent en cause racine. Les services en backoff
+        dont la prochaine sonde n'est pas due reconduisent leur dernier résultat.
+        """
+        by_name = {}
+        backoff = self.backoff
+        
+        for level in self.levels:
+            to_probe = []
+            for checker in level:
+                cause = root_cause(checker, by_name)
+                if cause:
+                    logger.debug("⛓️ %s: non sondé (parent DOWN: %s)", checker.name, cause)
+                    by_name[checker.name] = unreachable_status(checker, cause)
+                elif backoff and not backoff.due(checker.name):
+                    logger.debug("⏪ %s: non sondé (backoff)", checker.name)
+                    by_name[checker.name] = backoff.skipped_status(checker.name)
+                else:
+                    to_probe.append(checker)
+            
+            if to_probe and backoff and backoff.tcp_precheck:
+                to_probe = await self._tcp_precheck(to_probe, by_name)
+            
+            if to_probe:
+                self._apply_timeouts(to_probe)
+                if self.hedging:
+                    self.hedging.plan(to_probe, self.latencies)
+                level_results = await runner(to_probe)
+                for checker, result in zip(to_probe, level_results):
+                    by_name[checker.name] = result
+                    if isinstance(result, Exception):
+                        continue
+                    result.timeout = checker.timeout
+                    if self.latencies and result.is_healthy:
+                        self.latencies.observe(checker.name, result.response_time)
+                    if self.hedging:
+                        self.hedging.record(result)
+                    if backoff:
+                        backoff.record(checker.name, result)
+        
+        return [by_name[checker.name] for checker in self.service_checkers]
+    
+    def _apply_timeouts(self, checkers: List[NeronServiceChecker]):
+        """Fixer le timeout de chaque service d'après sa latence récente"""
+        if not self.timeouts:
+            return
+        for checker in checkers:
+            if not checker.adaptive_timeout:
+                continue
+            timeout = self.timeouts.timeout_for(self.latencies, checker.name, checker.base_timeout)
+            if timeout != checker.timeout:
+                logger.debug("⏱️ %s: timeout %ss -> %ss", checker.name, checker.timeout, timeout)
+                checker.timeout = timeout
+    
+    async def _tcp_precheck(self, checkers: List[NeronServiceChecker], by_name: Dict) -> List:
+        """
+        Tester la connexion TCP des services en backoff avant la sonde HTTP
+        
+        Returns:
+            Checkers dont le port répond (à sonder normalement)
+        """
+        in_backoff = [c for c in checkers if self.backoff.in_backoff(c.name)]
+        if not in_backoff:
+            return checkers
+        
+        errors = await asyncio.gather(
+            *[tcp_probe(c.url, self.backoff.tcp_timeout) for c in in_backoff]
+        )
+        closed = set()
+        for checker, error in zip(in_backoff, errors):
+            if error:
+                logger.debug("⏪ %s: %s", checker.name, error)
+                result = precheck_status(checker, error)
+                by_name[checker.name] = result
+                self.backoff.record(checker.name, result)
+                closed.add(checker.name)
+        return [c for c in checkers if c.name not in closed]
+    
+    async def check(self, runner: Optional[Callable[[List], Awaitable[List]]] = None):
+        """
+        Vérifier tous les services
+        
+        Args:
+            runner: Coroutine exécutant une liste de service checkers et
+                    retournant leurs résultats (défaut: exécution locale)
+        """
         from app import ServiceStatus
         
+        await self.refresh_discovery()
+        
         if not self.service_checkers:
             return ServiceStatus(
                 service_name=self.name,
@@ -232,21 +544,13 @@ class NeronChecker:
                 error="Aucun service configuré"
             )
         
-        logger.debug(f"🔍 Vérification de {len(self.service_checkers)} service(s)...")
+        logger.debug("🔍 Vérification de %d service(s)...", len(self.service_checkers))
         
-        # Vérifier en parallèle ou séquentiel
+        # Vérifier en parallèle ou séquentiel (ou via les workers de sondage)
         start_time = time.time()
         
-        if self.check_parallel:
-            results = await asyncio.gather(
-                *[checker.check() for checker in self.service_checkers],
-                return_exceptions=True
-            )
-        else:
-            results = []
-            for checker in self.service_checkers:
-                result = await checker.check()
-                results.append(result)
+        runner = runner or self._run_checks
+        results = await self._check_levels(runner)
         
         total_check_time = time.time() - start_time
         
@@ -275,11 +579,17 @@ class NeronChecker:
         details_lines = []
         down_services = []
         critical_down = []
+        unreachable = []
         up_count = 0
         
         for result in valid_results:
             # Icône selon statut et criticité
-            if result.is_healthy:
+            if getattr(result, 'unreachable', False):
+                # Non sondé: un service dont il dépend est DOWN
+                status_icon = "⛓️"
+                status_text = f"INJOIGNABLE (parent DOWN: {result.root_cause})"
+                unreachable.append(result.service_name)
+            elif result.is_healthy:
                 status_icon = "✅"
                 status_text = "UP"
                 up_count += 1
@@ -311,14 +621,16 @@ class NeronChecker:
             error_msg = f"Services critiques DOWN: {', '.join(critical_down)}"
         elif down_services:
             error_msg = f"Services DOWN: {', '.join(down_services)}"
+        if error_msg and unreachable:
+            error_msg += f" (injoignables: {', '.join(unreachable)})"
         
         # Log
         if critical_down:
-            logger.error(f"🔴 Services critiques DOWN: {', '.join(critical_down)}")
+            logger.error("🔴 Services critiques DOWN: %s", ", ".join(critical_down))
         elif down_services:
-            logger.warning(f"🟡 Services non-critiques DOWN: {', '.join(down_services)}")
+            logger.warning("🟡 Services non-critiques DOWN: %s", ", ".join(down_services))
         else:
-            logger.info(f"✅ Tous les services UP ({up_count}/{len(valid_results)})")
+            logger.info("✅ Tous les services UP (%d/%d)", up_count, len(valid_results))
         
         # Résultat agrégé
         result = ServiceStatus(
@@ -329,7 +641,18 @@ class NeronChecker:
             error=error_msg
         )
         result.details = details
+        result.services = valid_results
+        # Services DOWN à l'origine de l'indisponibilité (hors injoignables)
+        result.root_causes = down_services
+        # Aucun service sondé à ce cycle (backoff, ou parent en backoff): résultat reconduit
+        result.cached = all(
+            getattr(r, 'cached', False) or getattr(r, 'unreachable', False)
+            for r in valid_results
+        )
+        if self.hedging:
+            result.hedge_rate = round(self.hedging.rate, 3)
         
-        logger.info(f"📊 Résumé:\n   {details}")
+        # Formatage différé: rien n'est formaté si le message est filtré ou échantillonné
+        logger.info("📊 Résumé:\n   %s", details)
         
         return result
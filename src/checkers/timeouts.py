@@ -0,0 +1,114 @@
+"""
+Adaptive Timeouts
+Timeout de chaque service déduit de sa propre distribution de latence
+
+timeout = clamp(percentile(latences récentes) * multiplier, min, max)
+
+Seules les sondes UP alimentent la distribution (fenêtre glissante des
+`window` dernières). Tant qu'un service n'a pas `min_samples` mesures, son
+timeout configuré s'applique. Un service du LAN qui répond en quelques
+millisecondes échoue ainsi vite quand il est DOWN, tandis qu'un service lent
+mais sain (LLM) n'est pas coupé par un timeout de groupe trop court.
+
+Configuration (champ `adaptive_timeout` de `settings` dans le JSON):
+{
+  "multiplier": 3,       # Facteur appliqué au percentile
+  "percentile": 0.99,    # Percentile de référence
+  "min": 1,              # Timeout minimal (secondes)
+  "max": 30,             # Timeout maximal (secondes)
+  "min_samples": 20,     # Mesures nécessaires avant adaptation
+  "window": 500          # Mesures conservées par service
+}
+`true` utilise ces valeurs par défaut. Un service peut s'en exclure avec
+`"adaptive_timeout": false` et fixer son propre `timeout`.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyWindows:
+    """Dernières latences des sondes UP, par service"""
+    
+    def __init__(self, window: int = 500):
+        """
+        Args:
+            window: Mesures conservées par service
+        """
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+    
+    def observe(self, name: str, response_time: float):
+        """Ajouter la latence d'une sonde UP"""
+        window = self.samples.get(name)
+        if window is None:
+            window = self.samples[name] = deque(maxlen=self.window)
+        window.append(response_time)
+    
+    def seed(self, name: str, response_times: Iterable[float]):
+        """Pré-remplir la fenêtre d'un service (du plus ancien au plus récent)"""
+        for response_time in response_times:
+            self.observe(name, response_time)
+    
+    def quantile(self, name: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Percentile `q` des latences récentes (None si moins de `min_samples` mesures)"""
+        window = self.samples.get(name)
+        if not window or len(window) < max(1, min_samples):
+            return None
+        ordered = sorted(window)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+class AdaptiveTimeout:
+    """Timeout dérivé des latences récentes d'un service"""
+    
+    def __init__(self, multiplier: float = 3.0, percentile: float = 0.99,
+                 min_timeout: float = 1.0, max_timeout: float = 30.0,
+                 min_samples: int = 20, window: int = 500):
+        """
+        Args:
+            multiplier: Facteur appliqué au percentile
+            percentile: Percentile de référence (0-1)
+            min_timeout: Borne basse du timeout (secondes)
+            max_timeout: Borne haute du timeout (secondes)
+            min_samples: Mesures nécessaires avant adaptation
+            window: Mesures conservées par service
+        """
+        self.multiplier = multiplier
+        self.percentile = percentile
+        self.min_timeout = min_timeout
+        self.max_timeout = max(max_timeout, min_timeout)
+        self.min_samples = max(1, min_samples)
+        self.window = window
+    
+    @classmethod
+    def from_config(cls, config: Union[bool, Dict, None]) -> Optional['AdaptiveTimeout']:
+        """Construire depuis la configuration JSON (None si désactivé)"""
+        if not config:
+            return None
+        if config is True:
+            config = {}
+        if not config.get('enabled', True):
+            return None
+        
+        return cls(
+            multiplier=config.get('multiplier', 3.0),
+            percentile=config.get('percentile', 0.99),
+            min_timeout=config.get('min', 1.0),
+            max_timeout=config.get('max', 30.0),
+            min_samples=config.get('min_samples', 20),
+            window=config.get('window', 500)
+        )
+    
+    def timeout_for(self, latencies: LatencyWindows, name: str, default: float) -> float:
+        """Timeout à appliquer à la prochaine sonde du service"""
+        reference = latencies.quantile(name, self.percentile, self.min_samples)
+        if reference is None:
+            return default
+        timeout = reference * self.multiplier
+        return round(min(self.max_timeout, max(self.min_timeout, timeout)), 2)
@@ -0,0 +1,284 @@
+"""
+TLS Certificate Checker
+Vérifie les certificats TLS (expiration, émetteur, SAN) et la latence du handshake
+
+Les résultats sont mis en cache par hôte:port et rafraîchis selon
+`tls_refresh_interval` (1h par défaut) plutôt qu'à chaque cycle: un
+handshake complet n'est donc payé qu'une fois par intervalle. Le nombre
+de jours restants est recalculé à chaque cycle depuis la date en cache.
+
+Configuration (config/config.yaml):
+tls_checks:
+  - host: homebox.mondomaine.com
+    port: 443
+    name: Homebox TLS        # optionnel
+tls_refresh_interval: 3600
+tls_expiry_thresholds: [30, 14, 7, 1]
+"""
+
+import asyncio
+import ipaddress
+import logging
+import ssl
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Durée de cache d'un échec (nouvelle tentative plus rapide qu'un succès)
+ERROR_CACHE_SECONDS = 300
+
+
+def _hostname_matches(pattern: str, hostname: str) -> bool:
+    """Comparer un nom DNS du certificat (wildcard sur le premier label) à l'hôte"""
+    pattern = pattern.lower().rstrip('.')
+    hostname = hostname.lower().rstrip('.')
+    
+    if pattern.startswith('*.'):
+        suffix = pattern[1:]
+        prefix = hostname[:-len(suffix)] if hostname.endswith(suffix) else ''
+        return bool(prefix) and '.' not in prefix
+    return pattern == hostname
+
+
+def san_matches(cert: Dict, host: str) -> bool:
+    """Vérifier que l'hôte figure dans le subjectAltName du certificat"""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        address = None
+    
+    for kind, value in cert.get('subjectAltName', ()):
+        if address is not None and kind == 'IP Address':
+            if ipaddress.ip_address(value.strip()) == address:
+                return True
+        elif address is None and kind == 'DNS' and _hostname_matches(value, host):
+            return True
+    return False
+
+
+def _name_field(name: tuple, field: str) -> Optional[str]:
+    """Extraire un champ (commonName, organizationName...) d'un nom X.509"""
+    for rdn in name:
+        for key, value in rdn:
+            if key == field:
+                return value
+    return None
+
+
+class TLSTarget:
+    """Cible TLS et dernier résultat en cache"""
+    
+    def __init__(self, host: str, port: int = 443, name: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.name = name or f"TLS {host}:{port}"
+        self.key = f"{host}:{port}"
+        
+        self.fetched_at: Optional[float] = None  # horloge monotone
+        self.info: Dict = {}
+        self.error: Optional[str] = None
+        
+        # Plus petit seuil (jours) déjà notifié, et certificat concerné
+        self.notified_threshold: Optional[int] = None
+        self.notified_not_after: Optional[datetime] = None
+    
+    def is_stale(self, refresh_interval: float) -> bool:
+        if self.fetched_at is None:
+            return True
+        ttl = min(refresh_interval, ERROR_CACHE_SECONDS) if self.error else refresh_interval
+        return time.monotonic() - self.fetched_at >= ttl
+    
+    def days_left(self) -> Optional[float]:
+        not_after = self.info.get('not_after')
+        if not_after is None:
+            return None
+        return (not_after - datetime.now(timezone.utc)).total_seconds() / 86400
+
+
+class TLSChecker:
+    """Vérificateur des certificats TLS avec cache par hôte:port"""
+    
+    def __init__(self, targets: List[Dict], refresh_interval: int = 3600,
+                 expiry_thresholds: Optional[List[int]] = None, timeout: int = 10):
+        """
+        Args:
+            targets: Liste de {host, port, name}
+            refresh_interval: Intervalle de rafraîchissement du cache (secondes)
+            expiry_thresholds: Seuils d'alerte en jours avant expiration
+            timeout: Timeout de connexion et de handshake (secondes)
+        """
+        self.name = "TLS"
+        self.refresh_interval = refresh_interval
+        self.expiry_thresholds = sorted(expiry_thresholds or [30, 14, 7, 1], reverse=True)
+        self.timeout = timeout
+        self.targets = [
+            TLSTarget(t['host'], int(t.get('port', 443)), t.get('name'))
+            for t in targets
+        ]
+        
+        logger.info(
+            f"✅ TLS checker initialisé avec {len(self.targets)} cible(s) "
+            f"(rafraîchissement: {refresh_interval}s)"
+        )
+    
+    async def _handshake(self, target: TLSTarget):
+        """Établir une connexion TLS et relever le certificat"""
+        context = ssl.create_default_context()
+        # Le SAN est vérifié séparément pour pouvoir le rapporter
+        context.check_hostname = False
+        
+        start = time.perf_counter()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(target.host, target.port),
+            timeout=self.timeout
+        )
+        connect_time = time.perf_counter() - start
+        
+        try:
+            start = time.perf_counter()
+            await asyncio.wait_for(
+                writer.start_tls(context, server_hostname=target.host),
+                timeout=self.timeout
+            )
+            handshake_time = time.perf_counter() - start
+            cert = writer.get_extra_info('peercert') or {}
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ssl.SSLError, ConnectionError):
+                pass
+        
+        not_after = datetime.fromtimestamp(
+            ssl.cert_time_to_seconds(cert['notAfter']), tz=timezone.utc
+        )
+        issuer = cert.get('issuer', ())
+        
+        target.info = {
+            'not_after': not_after,
+            'issuer': (_name_field(issuer, 'organizationName')
+                       or _name_field(issuer, 'commonName')),
+            'subject': _name_field(cert.get('subject', ()), 'commonName'),
+            'san_match': san_matches(cert, target.host),
+            'connect_time': connect_time,
+            'handshake_time': handshake_time,
+        }
+        target.error = None
+    
+    async def _refresh(self, target: TLSTarget) -> bool:
+        """Rafraîchir une cible si son cache a expiré (True si rafraîchie)"""
+        if not target.is_stale(self.refresh_interval):
+            return False
+        
+        try:
+            await self._handshake(target)
+            logger.debug(f"🔒 {target.key}: handshake {target.info['handshake_time']:.3f}s")
+        except ssl.SSLCertVerificationError as e:
+            target.info = {}
+            target.error = f"Certificat invalide: {e.verify_message}"
+        except asyncio.TimeoutError:
+            target.info = {}
+            target.error = f"Timeout TLS après {self.timeout}s"
+        except Exception as e:
+            target.info = {}
+            target.error = f"Erreur TLS: {e}"
+        
+        if target.error:
+            logger.error(f"🔒 {target.key}: {target.error}")
+        
+        target.fetched_at = time.monotonic()
+        return True
+    
+    def _threshold_warning(self, target: TLSTarget, days_left: float) -> Optional[str]:
+        """Retourner un avertissement si un nouveau seuil d'expiration est franchi"""
+        crossed = [t for t in self.expiry_thresholds if days_left <= t]
+        if not crossed:
+            return None
+        
+        # Certificat renouvelé: réarmer les seuils d'alerte
+        if target.notified_not_after != target.info['not_after']:
+            target.notified_not_after = target.info['not_after']
+            target.notified_threshold = None
+        
+        threshold = crossed[-1]
+        if target.notified_threshold is not None and threshold >= target.notified_threshold:
+            return None
+        
+        target.notified_threshold = threshold
+        return (
+            f"🔒 <b>CERTIFICAT TLS - Expiration proche</b>\n\n"
+            f"<b>Cible:</b> {target.name} ({target.key})\n"
+            f"<b>Expire le:</b> {target.info['not_after'].strftime('%Y-%m-%d %H:%M')} UTC\n"
+            f"<b>Jours restants:</b> {days_left:.1f} (seuil {threshold}j)\n"
+            f"<b>Émetteur:</b> {target.info.get('issuer') or 'inconnu'}"
+        )
+    
+    def _target_status(self, target: TLSTarget, refreshed: bool):
+        """Construire le ServiceStatus d'une cible depuis son cache"""
+        from app import ServiceStatus
+        
+        days_left = target.days_left()
+        error = target.error
+        if not error and days_left is not None and days_left <= 0:
+            error = "Certificat expiré"
+        elif not error and not target.info.get('san_match'):
+            error = f"Le certificat ne couvre pas {target.host} (SAN)"
+        
+        result = ServiceStatus(
+            service_name=target.name,
+            is_healthy=error is None,
+            response_time=target.info.get('handshake_time', 0),
+            error=error
+        )
+        result.critical = True
+        result.cached = not refreshed
+        result.refreshed = refreshed
+        result.certificate = dict(target.info, days_left=days_left) if target.info else None
+        return result
+    
+    async def check(self):
+        """Vérifier les certificats (handshake uniquement si le cache a expiré)"""
+        from app import ServiceStatus
+        
+        if not self.targets:
+            return ServiceStatus(
+                service_name=self.name,
+                is_healthy=False,
+                response_time=0,
+                error="Aucune cible TLS configurée"
+            )
+        
+        refreshed = await asyncio.gather(*[self._refresh(t) for t in self.targets])
+        
+        results = []
+        warnings = []
+        details_lines = []
+        for target, was_refreshed in zip(self.targets, refreshed):
+            result = self._target_status(target, was_refreshed)
+            results.append(result)
+            
+            days_left = target.days_left()
+            if result.is_healthy and days_left is not None:
+                warning = self._threshold_warning(target, days_left)
+                if warning:
+                    warnings.append(warning)
+                details_lines.append(
+                    f"✅ {target.name}: {days_left:.0f}j restants "
+                    f"(handshake {target.info['handshake_time']:.2f}s)"
+                )
+            else:
+                details_lines.append(f"🔴 {target.name}: {result.error}")
+        
+        down = [r.service_name for r in results if not r.is_healthy]
+        result = ServiceStatus(
+            service_name=self.name,
+            is_healthy=not down,
+            response_time=sum(r.response_time for r in results) / len(results),
+            error=f"Certificats en erreur: {', '.join(down)}" if down else None
+        )
+        result.details = "\n   ".join(details_lines)
+        result.services = results
+        result.warnings = warnings
+        return result
@@ -0,0 +1,123 @@
+"""
+HTTP Phase Tracing
+Décomposition du temps de réponse HTTP via aiohttp TraceConfig
+
+Phases mesurées pour chaque sonde:
+- dns: résolution du nom d'hôte (absente pour une adresse IP)
+- connect: établissement de la connexion TCP (handshake TLS inclus en HTTPS,
+  aiohttp n'exposant pas de signal dédié au TLS)
+- ttfb: envoi des en-têtes jusqu'à la réception des en-têtes de réponse
+- total: début de la requête jusqu'à la réception des en-têtes de réponse
+
+Vérification approfondie de l'API Homebox (homebox_api.py): login, status
+et items (durée de chaque requête), total = status + items.
+"""
+
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+# Libellés affichés dans les notifications
+PHASE_LABELS = {
+    'dns': 'DNS',
+    'connect': 'Connexion',
+    'ttfb': 'TTFB',
+    'login': 'Login',
+    'status': 'Statut',
+    'items': 'Items',
+    'total': 'Total',
+    'hedge': 'Relance',
+}
+
+
+class PhaseTimer:
+    """Chronomètre des phases d'une requête (passé comme trace_request_ctx)"""
+    
+    def __init__(self):
+        self.marks: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+    
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter()
+    
+    def elapsed_since(self, name: str) -> Optional[float]:
+        start = self.marks.get(name)
+        return time.perf_counter() - start if start is not None else None
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.trace_request_ctx.mark('request')
+
+
+async def _on_dns_resolvehost_start(session, ctx, params):
+    ctx.trace_request_ctx.mark('dns')
+
+
+async def _on_dns_resolvehost_end(session, ctx, params):
+    timer = ctx.trace_request_ctx
+    timer.phases['dns'] = timer.elapsed_since('dns')
+
+
+async def _on_connection_create_start(session, ctx, params):
+    ctx.trace_request_ctx.mark('connect')
+
+
+async def _on_connection_create_end(session, ctx, params):
+    # La résolution DNS a lieu pendant la création de la connexion
+    timer = ctx.trace_request_ctx
+    timer.phases['connect'] = timer.elapsed_since('connect') - timer.phases.get('dns', 0.0)
+
+
+async def _on_request_headers_sent(session, ctx, params):
+    ctx.trace_request_ctx.mark('headers_sent')
+
+
+async def _on_request_end(session, ctx, params):
+    timer = ctx.trace_request_ctx
+    timer.phases['ttfb'] = timer.elapsed_since('headers_sent')
+    timer.phases['total'] = timer.elapsed_since('request')
+
+
+class _TraceContext:
+    """Contexte de trace (chronomètre jetable si la requête n'en fournit pas)"""
+    
+    def __init__(self, trace_request_ctx=None):
+        self.trace_request_ctx = trace_request_ctx or PhaseTimer()
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Créer un TraceConfig alimentant le PhaseTimer de chaque requête"""
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=_TraceContext)
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+def format_phases(phases: Dict[str, Optional[float]]) -> str:
+    """Formater les phases pour une notification ("DNS 0.01s · TTFB 2.30s")"""
+    parts = [
+        f"{label} {phases[name]:.2f}s"
+        for name, label in PHASE_LABELS.items()
+        if phases.get(name) is not None
+    ]
+    return " · ".join(parts)
+
+
+def diagnose_phases(phases: Dict[str, Optional[float]]) -> Optional[str]:
+    """Indiquer si la lenteur vient plutôt du réseau ou du service"""
+    total = phases.get('total')
+    if not total:
+        return None
+    
+    network = (phases.get('dns') or 0.0) + (phases.get('connect') or 0.0)
+    server = phases.get('ttfb') or 0.0
+    
+    if server >= network:
+        return "côté service (TTFB)"
+    return "côté réseau (DNS/connexion)"
@@ -0,0 +1,123 @@
+"""
+State Checkpoint
+Point de reprise de l'état courant pour un redémarrage à chaud
+
+Contenu (fichier JSON compact, `data/state.json` par défaut):
+- dernier résultat de chaque service suivi (sous-services inclus)
+- état UP/DOWN et début de l'état courant
+- état de backoff des sondes par groupe de services
+
+Au démarrage, l'état restauré évite de réalerter pour un service déjà DOWN
+avant l'arrêt et rend la page de statut et les commandes immédiatement
+utilisables. L'écriture passe par un fichier temporaire et `os.replace`:
+un arrêt brutal laisse toujours l'ancien ou le nouveau point de reprise,
+jamais un fichier tronqué.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+# Attributs optionnels des résultats conservés dans le point de reprise
+RESULT_EXTRAS = ('critical', 'description', 'details', 'unreachable', 'root_cause',
+                 'root_causes', 'timeout', 'hedged', 'hedge_rate')
+
+
+def result_to_dict(result) -> Dict:
+    """Sérialiser un ServiceStatus (et ses sous-services)"""
+    data = {
+        'name': result.service_name,
+        'healthy': result.is_healthy,
+        'response_time': round(result.response_time, 4),
+        'status_code': result.status_code,
+        'error': result.error,
+        'timestamp': result.timestamp.isoformat(),
+    }
+    for attr in RESULT_EXTRAS:
+        value = getattr(result, attr, None)
+        if value is not None:
+            data[attr] = value
+    if getattr(result, 'services', None):
+        data['services'] = [result_to_dict(r) for r in result.services]
+    return data
+
+
+def result_from_dict(data: Dict):
+    """Reconstruire un ServiceStatus sérialisé par `result_to_dict`"""
+    from app import ServiceStatus
+    
+    result = ServiceStatus(
+        service_name=data['name'],
+        is_healthy=data['healthy'],
+        response_time=data['response_time'],
+        status_code=data.get('status_code'),
+        error=data.get('error')
+    )
+    result.timestamp = datetime.fromisoformat(data['timestamp'])
+    for attr in RESULT_EXTRAS:
+        if attr in data:
+            setattr(result, attr, data[attr])
+    if data.get('services'):
+        result.services = [result_from_dict(d) for d in data['services']]
+    return result
+
+
+def write_checkpoint(path: str, state: Dict):
+    """Écrire le point de reprise de façon atomique (fichier temporaire + os.replace)"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = {'version': CHECKPOINT_VERSION, 'saved_at': datetime.now().isoformat(), **state}
+    
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", dir=target.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_checkpoint(path: str, max_age: float) -> Optional[Dict]:
+    """
+    Lire le point de reprise
+    
+    Args:
+        path: Fichier du point de reprise
+        max_age: Âge maximal accepté (secondes)
+    
+    Returns:
+        Contenu du point de reprise, ou None s'il est absent, illisible ou trop ancien
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Point de reprise illisible ({path}): {e}")
+        return None
+    
+    if payload.get('version') != CHECKPOINT_VERSION:
+        logger.warning(f"⚠️ Point de reprise ignoré: version {payload.get('version')}")
+        return None
+    
+    saved_at = datetime.fromisoformat(payload['saved_at'])
+    age = (datetime.now() - saved_at).total_seconds()
+    if age > max_age:
+        logger.info(f"💾 Point de reprise ignoré: trop ancien ({age / 3600:.1f}h)")
+        return None
+    return payload
@@ -4,6 +4,7 @@ Charge les paramètres depuis les variables d'environnement et config.yaml
 """
 
 import os
+import socket
 import yaml
 import logging
 from pathlib import Path
@@ -16,11 +17,24 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def _as_bool(value) -> bool:
+    """Interpréter une valeur booléenne issue du YAML ou de l'environnement"""
+    return str(value).strip().lower() in ('true', '1', 'yes', 'on')
+
+
 class Config:
     """Classe de configuration centralisée"""
     
-    def __init__(self, config_file: str = "config/config.yaml"):
+    def __init__(self, config_file: str = "config/config.yaml",
+                 require_telegram: bool = True):
+        """
+        Args:
+            config_file: Chemin vers le fichier YAML
+            require_telegram: Exiger les identifiants Telegram (False pour
+                              les commandes hors ligne, ex: `history`)
+        """
         self.config_file = config_file
+        self.require_telegram = require_telegram
         self._load_config()
     
     def _load_config(self):
@@ -33,7 +47,64 @@ class Config:
             'max_response_time': 5.0,  # 5 secondes
             'retry_attempts': 3,
             'retry_delay': 30,
-            'database_path': 'data/history.db'
+            'database_path': 'data/history.db',
+            'coordination_enabled': False,
+            'coordination_backend': 'sqlite',
+            'coordination_db_path': None,
+            'instance_id': None,
+            'lease_ttl': 60,
+            'probe_workers': 0,
+            'tls_checks': [],
+            'tls_refresh_interval': 3600,
+            'tls_expiry_thresholds': [30, 14, 7, 1],
+            'history_read_connections': 4,
+            'history_storage': 'raw',
+            'history_rle_band': 0.5,
+            'history_flush_interval': 900,
+            'retention_days': 0,
+            'archive_enabled': True,
+            'archive_dir': 'data/archive',
+            'anomaly_detection': True,
+            'baseline_lookback_days': 28,
+            'anomaly_z_threshold': 3.0,
+            'anomaly_min_samples': 10,
+            'anomaly_ewma_alpha': 0.3,
+            'report_schedules': ['08:00 daily'],
+            'status_server_enabled': False,
+            'status_host': '127.0.0.1',
+            'status_port': 8765,
+            'events_queue_size': 100,
+            'telegram_commands_enabled': False,
+            'telegram_commands_per_minute': 10,
+            'notifiers': [{'type': 'telegram'}],
+            'notifier_queue_size': 100,
+            'notifier_timeout': 10,
+            'notifier_failure_threshold': 3,
+            'notifier_reset_timeout': 60,
+            'probe_backoff': True,
+            'probe_backoff_after': 3,
+            'probe_backoff_max_interval': 3600,
+            'probe_tcp_precheck': False,
+            'probe_tcp_timeout': 2,
+            'log_level': 'INFO',
+            'log_file': 'logs/control-plane.log',
+            'log_format': 'text',
+            'log_rotation': 'size',
+            'log_max_bytes': 10 * 1024 * 1024,
+            'log_backup_count': 5,
+            'log_rotate_when': 'midnight',
+            'log_sampling': {},
+            'checkpoint_path': 'data/state.json',
+            'checkpoint_interval': 60,
+            'checkpoint_max_age': 86400,
+            'resource_sample_interval': 300,
+            'resource_growth_threshold': 0.5,
+            'resource_growth_window': 24,
+            'tracemalloc_frames': 10,
+            'tracemalloc_dir': 'logs',
+            'homebox_api_url': None,
+            'homebox_api_username': None,
+            'homebox_api_min_version': None
         }
         
         # Charger depuis YAML si le fichier existe
@@ -47,7 +118,15 @@ class Config:
         self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
         
-        if not self.telegram_bot_token or not self.telegram_chat_id:
+        # Commandes interactives du bot (/status, /history, /uptime, /check)
+        self.telegram_commands_enabled = _as_bool(
+            os.getenv('TELEGRAM_COMMANDS_ENABLED', defaults['telegram_commands_enabled'])
+        )
+        self.telegram_commands_per_minute = int(
+            os.getenv('TELEGRAM_COMMANDS_PER_MINUTE', defaults['telegram_commands_per_minute'])
+        )
+        
+        if self.require_telegram and not (self.telegram_bot_token and self.telegram_chat_id):
             raise ValueError(
                 "TELEGRAM_BOT_TOKEN et TELEGRAM_CHAT_ID doivent être définis "
                 "dans les variables d'environnement ou le fichier .env"
@@ -91,12 +170,151 @@ class Config:
         
         # Vérification détaillée des services (Homebox API)
         self.check_homebox_services = os.getenv('CHECK_HOMEBOX_SERVICES', 'true').lower() == 'true'
+        # Avec HOMEBOX_SERVICES, HOMEBOX_URL n'a pas de port: API du premier service (Homebox Main)
+        default_api_url = self.homebox_url
+        if self.homebox_services:
+            default_api_url = f"{self.homebox_base_url}:{next(iter(self.homebox_services.values()))}"
+        self.homebox_api_url = os.getenv('HOMEBOX_API_URL', defaults['homebox_api_url']) or default_api_url
+        self.homebox_api_username = os.getenv('HOMEBOX_API_USERNAME', defaults['homebox_api_username']) or None
+        # Mot de passe uniquement depuis l'environnement (.env), jamais dans config.yaml
+        self.homebox_api_password = os.getenv('HOMEBOX_API_PASSWORD') or None
+        self.homebox_api_min_version = os.getenv('HOMEBOX_API_MIN_VERSION', defaults['homebox_api_min_version']) or None
         
         # Base de données
         self.database_path = os.getenv('DATABASE_PATH', defaults['database_path'])
         
         # Créer le dossier data si nécessaire
         Path(self.database_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Connexions en lecture seule (rapports, statistiques)
+        self.history_read_connections = int(
+            os.getenv('HISTORY_READ_CONNECTIONS', defaults['history_read_connections'])
+        )
+        
+        # Stockage des vérifications: raw (une ligne par check) ou rle (runs compressés)
+        self.history_storage = os.getenv('HISTORY_STORAGE', defaults['history_storage'])
+        self.history_rle_band = float(os.getenv('HISTORY_RLE_BAND', defaults['history_rle_band']))
+        self.history_flush_interval = int(
+            os.getenv('HISTORY_FLUSH_INTERVAL', defaults['history_flush_interval'])
+        )
+        
+        # Rétention (0 = tout conserver) et archivage froid avant suppression
+        self.retention_days = int(os.getenv('RETENTION_DAYS', defaults['retention_days']))
+        self.archive_enabled = _as_bool(os.getenv('ARCHIVE_ENABLED', defaults['archive_enabled']))
+        self.archive_dir = os.getenv('ARCHIVE_DIR', defaults['archive_dir'])
+        
+        # Détection d'anomalies de latence (références par heure de la semaine)
+        self.anomaly_detection = _as_bool(
+            os.getenv('ANOMALY_DETECTION', defaults['anomaly_detection'])
+        )
+        self.baseline_lookback_days = int(
+            os.getenv('BASELINE_LOOKBACK_DAYS', defaults['baseline_lookback_days'])
+        )
+        self.anomaly_z_threshold = float(os.getenv('ANOMALY_Z_THRESHOLD', defaults['anomaly_z_threshold']))
+        self.anomaly_min_samples = int(os.getenv('ANOMALY_MIN_SAMPLES', defaults['anomaly_min_samples']))
+        self.anomaly_ewma_alpha = float(os.getenv('ANOMALY_EWMA_ALPHA', defaults['anomaly_ewma_alpha']))
+        
+        # Rapports planifiés (ex: "08:00 daily", "monday 08:00 weekly")
+        # Format env: SPEC,SPEC (ex: 08:00 daily,monday 08:00 weekly)
+        report_schedule_str = os.getenv('REPORT_SCHEDULE')
+        if report_schedule_str is not None:
+            self.report_schedules = [s.strip() for s in report_schedule_str.split(',') if s.strip()]
+        else:
+            self.report_schedules = list(defaults['report_schedules'] or [])
+        
+        # Point de reprise de l'état courant (redémarrage à chaud, vide = désactivé)
+        self.checkpoint_path = os.getenv('CHECKPOINT_PATH', defaults['checkpoint_path']) or None
+        self.checkpoint_interval = int(os.getenv('CHECKPOINT_INTERVAL', defaults['checkpoint_interval']))
+        self.checkpoint_max_age = int(os.getenv('CHECKPOINT_MAX_AGE', defaults['checkpoint_max_age']))
+        
+        # Relevés des ressources du démon (0 = désactivé) et diagnostic tracemalloc
+        self.resource_sample_interval = int(
+            os.getenv('RESOURCE_SAMPLE_INTERVAL', defaults['resource_sample_interval'])
+        )
+        self.resource_growth_threshold = float(
+            os.getenv('RESOURCE_GROWTH_THRESHOLD', defaults['resource_growth_threshold'])
+        )
+        self.resource_growth_window = float(
+            os.getenv('RESOURCE_GROWTH_WINDOW', defaults['resource_growth_window'])
+        )
+        self.tracemalloc_frames = int(os.getenv('TRACEMALLOC_FRAMES', defaults['tracemalloc_frames']))
+        self.tracemalloc_dir = os.getenv('TRACEMALLOC_DIR', defaults['tracemalloc_dir'])
+        
+        # Journalisation (file d'attente + thread d'écriture)
+        self.log_level = os.getenv('LOG_LEVEL', defaults['log_level']).upper()
+        self.log_file = os.getenv('LOG_FILE', defaults['log_file']) or None
+        self.log_format = os.getenv('LOG_FORMAT', defaults['log_format']).lower()
+        self.log_rotation = os.getenv('LOG_ROTATION', defaults['log_rotation']).lower()
+        self.log_max_bytes = int(os.getenv('LOG_MAX_BYTES', defaults['log_max_bytes']))
+        self.log_backup_count = int(os.getenv('LOG_BACKUP_COUNT', defaults['log_backup_count']))
+        self.log_rotate_when = os.getenv('LOG_ROTATE_WHEN', defaults['log_rotate_when'])
+        self.log_sampling = dict(defaults['log_sampling'] or {})
+        
+        # Espacement des sondes des services DOWN depuis longtemps
+        self.probe_backoff = _as_bool(os.getenv('PROBE_BACKOFF', defaults['probe_backoff']))
+        self.probe_backoff_after = int(os.getenv('PROBE_BACKOFF_AFTER', defaults['probe_backoff_after']))
+        self.probe_backoff_max_interval = int(
+            os.getenv('PROBE_BACKOFF_MAX_INTERVAL', defaults['probe_backoff_max_interval'])
+        )
+        self.probe_tcp_precheck = _as_bool(
+            os.getenv('PROBE_TCP_PRECHECK', defaults['probe_tcp_precheck'])
+        )
+        self.probe_tcp_timeout = float(os.getenv('PROBE_TCP_TIMEOUT', defaults['probe_tcp_timeout']))
+        
+        # Backends de notification (telegram, webhook, smtp, ntfy) et routage par gravité
+        self.notifiers = list(defaults['notifiers'] or [])
+        self.notifier_queue_size = int(os.getenv('NOTIFIER_QUEUE_SIZE', defaults['notifier_queue_size']))
+        self.notifier_timeout = float(os.getenv('NOTIFIER_TIMEOUT', defaults['notifier_timeout']))
+        self.notifier_failure_threshold = int(
+            os.getenv('NOTIFIER_FAILURE_THRESHOLD', defaults['notifier_failure_threshold'])
+        )
+        self.notifier_reset_timeout = float(
+            os.getenv('NOTIFIER_RESET_TIMEOUT', defaults['notifier_reset_timeout'])
+        )
+        
+        # Page de statut et API JSON locales (servies depuis la mémoire)
+        self.status_server_enabled = _as_bool(
+            os.getenv('STATUS_SERVER_ENABLED', defaults['status_server_enabled'])
+        )
+        self.status_host = os.getenv('STATUS_HOST', defaults['status_host'])
+        self.status_port = int(os.getenv('STATUS_PORT', defaults['status_port']))
+        self.events_queue_size = int(os.getenv('EVENTS_QUEUE_SIZE', defaults['events_queue_size']))
+        
+        # Coordination multi-instances (optionnelle)
+        self.coordination_enabled = _as_bool(
+            os.getenv('COORDINATION_ENABLED', defaults['coordination_enabled'])
+        )
+        self.coordination_backend = os.getenv('COORDINATION_BACKEND', defaults['coordination_backend'])
+        self.coordination_db_path = os.getenv(
+            'COORDINATION_DB_PATH', defaults['coordination_db_path'] or self.database_path
+        )
+        self.instance_id = os.getenv(
+            'INSTANCE_ID', defaults['instance_id'] or f"{socket.gethostname()}-{os.getpid()}"
+        )
+        self.lease_ttl = int(os.getenv('LEASE_TTL', defaults['lease_ttl']))
+        
+        # Processus workers de sondage (0 = tout dans la boucle principale)
+        self.probe_workers = int(os.getenv('PROBE_WORKERS', defaults['probe_workers']))
+        
+        # Vérification des certificats TLS
+        # Format env: HOST:PORT,HOST:PORT (ex: homebox.mondomaine.com:443)
+        tls_checks_str = os.getenv('TLS_CHECKS', '')
+        if tls_checks_str:
+            self.tls_checks = []
+            for target in tls_checks_str.split(','):
+                host, _, port = target.strip().partition(':')
+                try:
+                    self.tls_checks.append({'host': host, 'port': int(port or 443)})
+                except ValueError:
+                    logger.warning(f"Port TLS invalide pour {host}: {port}")
+        else:
+            self.tls_checks = defaults['tls_checks'] or []
+        self.tls_refresh_interval = int(os.getenv('TLS_REFRESH_INTERVAL', defaults['tls_refresh_interval']))
+        thresholds = os.getenv('TLS_EXPIRY_THRESHOLDS')
+        self.tls_expiry_thresholds = (
+            [int(t) for t in thresholds.split(',')] if thresholds
+            else list(defaults['tls_expiry_thresholds'])
+        )
     
     def __repr__(self):
         return (
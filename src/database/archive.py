@@ -0,0 +1,296 @@
+"""
+History Export & Archive
+Export en streaming de l'historique et archivage froid avant rétention
+
+Les lignes sont lues par lots bornés (pagination par id) et écrites au fil
+de l'eau: la mémoire utilisée ne dépend pas du nombre de lignes.
+
+Formats d'export:
+- ndjson: une ligne JSON par enregistrement, compressée gzip (.ndjson.gz)
+- csv: CSV compressé gzip (.csv.gz)
+- parquet: format colonnaire (.parquet), si pyarrow est installé
+
+Avant suppression par la rétention, les lignes sont archivées dans des
+fichiers datés data/archive/<table>/<AAAA-MM-JJ>.ndjson.gz, relus par
+ArchiveReader.
+"""
+
+import csv
+import gzip
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Dépendance optionnelle (export parquet)
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes lues par lot
+CHUNK_SIZE = 1000
+
+# Tables exportables et colonne temporelle de chacune
+TIME_COLUMNS = {
+    'checks': 'timestamp',
+    'check_runs': 'ended_at',
+    'state_transitions': 'timestamp',
+    'phase_timings': 'timestamp',
+    'tls_checks': 'timestamp',
+    'resource_samples': 'timestamp',
+}
+
+Column = Tuple[str, str]  # (nom, type déclaré SQLite)
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[Column]:
+    """Colonnes d'une table et leur type déclaré"""
+    if table not in TIME_COLUMNS:
+        raise ValueError(
+            f"Table inconnue: {table} (disponibles: {', '.join(TIME_COLUMNS)})"
+        )
+    return [(row[1], (row[2] or '').upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def iter_chunks(conn: sqlite3.Connection, table: str,
+                since: Optional[datetime] = None, until: Optional[datetime] = None,
+                chunk_size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """
+    Lire une table par lots, dans l'ordre des id
+    
+    La pagination par id (et non OFFSET) garde un coût constant par lot et
+    ne maintient pas de transaction de lecture ouverte entre deux lots.
+    """
+    time_column = TIME_COLUMNS[table]
+    columns = [name for name, _ in table_columns(conn, table)]
+    
+    where = ["id > ?"]
+    bounds: List = []
+    if since:
+        where.append(f"{time_column} >= ?")
+        bounds.append(since)
+    if until:
+        where.append(f"{time_column} < ?")
+        bounds.append(until)
+    
+    query = f"""
+        SELECT {', '.join(columns)} FROM {table}
+        WHERE {' AND '.join(where)}
+        ORDER BY id
+        LIMIT ?
+    """
+    id_index = columns.index('id')
+    last_id = 0
+    
+    while True:
+        rows = conn.execute(query, [last_id] + bounds + [chunk_size]).fetchall()
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+        last_id = rows[-1][id_index]
+
+
+def _converter(columns: List[Column]) -> Callable[[tuple], tuple]:
+    """Convertir les booléens SQLite (0/1) en bool"""
+    booleans = [i for i, (_, kind) in enumerate(columns) if kind == 'BOOLEAN']
+    
+    def convert(row: tuple) -> tuple:
+        if not booleans:
+            return row
+        row = list(row)
+        for i in booleans:
+            if row[i] is not None:
+                row[i] = bool(row[i])
+        return tuple(row)
+    
+    return convert
+
+
+def write_ndjson(columns: List[Column], chunks: Iterator[List[tuple]],
+                 path: Path, append: bool = False) -> int:
+    """Écrire des lots en NDJSON compressé gzip (append: nouveau membre gzip)"""
+    names = [name for name, _ in columns]
+    convert = _converter(columns)
+    count = 0
+    
+    with gzip.open(path, 'at' if append else 'wt', encoding='utf-8') as f:
+        for chunk in chunks:
+            for row in chunk:
+                f.write(json.dumps(dict(zip(names, convert(row))), ensure_ascii=False) + "\n")
+            count += len(chunk)
+    return count
+
+
+def write_csv(columns: List[Column], chunks: Iterator[List[tuple]], path: Path) -> int:
+    """Écrire des lots en CSV compressé gzip"""
+    convert = _converter(columns)
+    count = 0
+    
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for chunk in chunks:
+            writer.writerows(convert(row) for row in chunk)
+            count += len(chunk)
+    return count
+
+
+def _arrow_type(kind: str):
+    if kind == 'INTEGER':
+        return pyarrow.int64()
+    if kind == 'REAL':
+        return pyarrow.float64()
+    if kind == 'BOOLEAN':
+        return pyarrow.bool_()
+    return pyarrow.string()  # TEXT et DATETIME (ISO 8601)
+
+
+def write_parquet(columns: List[Column], chunks: Iterator[List[tuple]], path: Path) -> int:
+    """Écrire des lots en Parquet, un row group par lot (nécessite pyarrow)"""
+    if pyarrow is None:
+        raise RuntimeError("L'export parquet nécessite pyarrow (pip install pyarrow)")
+    
+    schema = pyarrow.schema([(name, _arrow_type(kind)) for name, kind in columns])
+    convert = _converter(columns)
+    count = 0
+    
+    with pyarrow.parquet.ParquetWriter(str(path), schema, compression='zstd') as writer:
+        for chunk in chunks:
+            rows = [convert(row) for row in chunk]
+            arrays = [
+                pyarrow.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(chunk)
+    return count
+
+
+# Formats d'export: (extension, fonction d'écriture)
+FORMATS: Dict[str, Tuple[str, Callable]] = {
+    'ndjson': ('.ndjson.gz', write_ndjson),
+    'csv': ('.csv.gz', write_csv),
+    'parquet': ('.parquet', write_parquet),
+}
+
+
+def export_table(conn: sqlite3.Connection, table: str, path: Path, fmt: str = 'ndjson',
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+    """
+    Exporter une table (éventuellement sur une période) dans un fichier
+    
+    Returns:
+        Nombre de lignes exportées
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (disponibles: {', '.join(FORMATS)})")
+    
+    columns = table_columns(conn, table)
+    if not columns:
+        raise ValueError(f"Table absente de la base: {table}")
+    
+    _, writer = FORMATS[fmt]
+    return writer(columns, iter_chunks(conn, table, since, until), Path(path))
+
+
+def archive_before(conn: sqlite3.Connection, cutoff: datetime,
+                   archive_dir: str = "data/archive") -> Dict[str, int]:
+    """
+    Archiver les lignes antérieures à `cutoff` dans des fichiers datés
+    
+    Les lignes sont ajoutées au fichier du jour correspondant
+    (<archive_dir>/<table>/<AAAA-MM-JJ>.ndjson.gz), un même jour pouvant
+    être complété par plusieurs passages de la rétention. La dernière
+    transition d'état de chaque service, conservée par la rétention, n'est
+    pas archivée (elle le sera au passage qui la supprime).
+    
+    Returns:
+        {table: nombre de lignes archivées}
+    """
+    archived = {}
+    
+    for table, time_column in TIME_COLUMNS.items():
+        columns = table_columns(conn, table)
+        if not columns:
+            continue  # Table absente (base antérieure)
+        
+        table_dir = Path(archive_dir) / table
+        names = [name for name, _ in columns]
+        time_index = names.index(time_column)
+        id_index = names.index('id')
+        count = 0
+        
+        kept = set()
+        if table == 'state_transitions':
+            kept = {row[0] for row in conn.execute("""
+                SELECT id, MAX(timestamp) FROM state_transitions
+                WHERE timestamp < ?
+                GROUP BY service_name
+            """, (cutoff,))}
+        
+        for chunk in iter_chunks(conn, table, until=cutoff):
+            # Regrouper le lot par jour (les id suivent l'ordre chronologique)
+            days: Dict[str, List[tuple]] = {}
+            for row in chunk:
+                if row[id_index] in kept:
+                    continue
+                days.setdefault(str(row[time_index])[:10], []).append(row)
+            
+            table_dir.mkdir(parents=True, exist_ok=True)
+            for day, rows in days.items():
+                count += write_ndjson(columns, [rows], table_dir / f"{day}.ndjson.gz", append=True)
+        
+        if count:
+            archived[table] = count
+            logger.info(f"📦 Archivage: {count} ligne(s) de {table} vers {table_dir}")
+    
+    return archived
+
+
+class ArchiveReader:
+    """Lecture des fichiers archivés (data/archive/<table>/<AAAA-MM-JJ>.ndjson.gz)"""
+    
+    def __init__(self, archive_dir: str = "data/archive"):
+        self.archive_dir = Path(archive_dir)
+    
+    def days(self, table: str) -> List[str]:
+        """Jours archivés pour une table (AAAA-MM-JJ, ordre chronologique)"""
+        table_dir = self.archive_dir / table
+        if not table_dir.exists():
+            return []
+        return sorted(path.name[:10] for path in table_dir.glob("*.ndjson.gz"))
+    
+    def read(self, table: str, since: Optional[datetime] = None,
+             until: Optional[datetime] = None,
+             service_name: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Relire les lignes archivées d'une période, dans l'ordre chronologique
+        
+        Seuls les fichiers des jours concernés sont ouverts, et lus ligne à ligne.
+        """
+        time_column = TIME_COLUMNS[table]
+        since_key = str(since) if since else None
+        until_key = str(until) if until else None
+        
+        for day in self.days(table):
+            if since_key and day < since_key[:10]:
+                continue
+            if until_key and day > until_key[:10]:
+                break
+            
+            with gzip.open(self.archive_dir / table / f"{day}.ndjson.gz", 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    timestamp = str(record.get(time_column))
+                    if since_key and timestamp < since_key:
+                        continue
+                    if until_key and timestamp >= until_key:
+                        continue
+                    if service_name and record.get('service_name') != service_name:
+                        continue
+                    yield record
@@ -0,0 +1,361 @@
+"""
+History CLI
+Consultation de l'historique en ligne de commande: python app.py history
+Export de l'historique vers des fichiers compressés: python app.py export
+
+La base est ouverte en lecture seule (`mode=ro`): la commande peut tourner
+pendant que le daemon écrit, sans le bloquer. Les lignes sont lues par lots
+et écrites au fur et à mesure, sans charger tout le résultat en mémoire.
+
+Exemples:
+  python app.py history --service "Homebox Main" --since 24h
+  python app.py history --since 7d --aggregate day --format csv
+  python app.py history --since 2026-02-01 --until 2026-02-02 --format json
+  python app.py history --since 30d --incidents
+  python app.py history --since 2025-01-01 --until 2025-02-01 --archive
+  python app.py export --table checks --format csv --since 30d
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from src.database import archive, transitions
+from src.database.runs import RAW_SAMPLES_QUERY
+
+# Taille des lots lus depuis SQLite
+FETCH_SIZE = 500
+
+# Durées relatives acceptées par --since/--until (ex: 30m, 24h, 7d)
+_RELATIVE = re.compile(r'^(\d+)\s*([mhdw])$')
+_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+# Regroupement temporel (format strftime SQLite du début de période)
+BUCKETS = {
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+}
+
+RAW_COLUMNS = [
+    ('timestamp', 26),
+    ('service_name', 24),
+    ('is_healthy', 10),
+    ('response_time', 13),
+    ('status_code', 11),
+    ('count', 6),
+    ('error', 0),
+]
+
+AGGREGATE_COLUMNS = [
+    ('period', 16),
+    ('service_name', 24),
+    ('checks', 8),
+    ('uptime', 8),
+    ('avg_response_time', 17),
+    ('min_response_time', 17),
+    ('max_response_time', 17),
+]
+
+INCIDENT_COLUMNS = [
+    ('service_name', 24),
+    ('start', 26),
+    ('end', 26),
+    ('duration', 10),
+    ('error', 0),
+]
+
+
+def parse_time(value: str, now: Optional[datetime] = None) -> datetime:
+    """Interpréter une date ISO ou une durée relative (24h = il y a 24 heures)"""
+    now = now or datetime.now()
+    match = _RELATIVE.match(value.strip())
+    if match:
+        amount, unit = match.groups()
+        return now - timedelta(**{_UNITS[unit]: int(amount)})
+    
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"date invalide: {value!r} (ISO 8601 ou durée comme 30m, 24h, 7d)"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python app.py history",
+        description="Consulter l'historique des vérifications (lecture seule)"
+    )
+    parser.add_argument('--db', help="Chemin de la base (défaut: database_path)")
+    parser.add_argument('--service', action='append',
+                        help="Filtrer sur un service (option répétable)")
+    parser.add_argument('--since', type=parse_time, default=parse_time('24h'),
+                        help="Début de la période (défaut: 24h)")
+    parser.add_argument('--until', type=parse_time,
+                        help="Fin de la période (défaut: maintenant)")
+    parser.add_argument('--status', choices=['up', 'down'],
+                        help="Uniquement les vérifications UP ou DOWN")
+    parser.add_argument('--aggregate', choices=['none', 'hour', 'day', 'service'],
+                        default='none',
+                        help="Agréger par heure, jour ou service (défaut: none)")
+    parser.add_argument('--incidents', action='store_true',
+                        help="Chronologie des incidents (depuis les transitions d'état)")
+    parser.add_argument('--archive', action='store_true',
+                        help="Lire les vérifications archivées au lieu de la base")
+    parser.add_argument('--format', choices=['table', 'csv', 'json'], default='table',
+                        help="Format de sortie (json = une ligne JSON par résultat)")
+    parser.add_argument('--limit', type=int, help="Nombre maximum de lignes")
+    return parser
+
+
+def samples_source(conn: sqlite3.Connection) -> str:
+    """
+    Source des vérifications: vue `check_samples` (lignes brutes et runs du
+    stockage rle), ou table `checks` seule pour une base antérieure
+    """
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'check_samples'"
+    ).fetchone()
+    return "check_samples" if row else f"({RAW_SAMPLES_QUERY})"
+
+
+def build_query(args: argparse.Namespace, source: str = "check_samples") -> Tuple[str, List]:
+    """
+    Construire la requête SQL et ses paramètres depuis les arguments
+    
+    Un run est daté de sa fin (`ended_at`) et pèse `count` vérifications.
+    """
+    where = ["ended_at > ?"]
+    params: List = [args.since]
+    
+    if args.until:
+        where.append("ended_at <= ?")
+        params.append(args.until)
+    if args.service:
+        where.append(f"service_name IN ({', '.join('?' * len(args.service))})")
+        params.extend(args.service)
+    if args.status:
+        where.append("is_healthy = ?")
+        params.append(args.status == 'up')
+    
+    conditions = " AND ".join(where)
+    
+    if args.aggregate == 'none':
+        query = f"""
+            SELECT ended_at as timestamp, service_name, is_healthy,
+                   rt_sum / count as response_time, status_code, count, error
+            FROM {source}
+            WHERE {conditions}
+            ORDER BY ended_at
+        """
+    else:
+        if args.aggregate == 'service':
+            period = "MIN(started_at) || ' → ' || MAX(ended_at)"
+            group_by = "service_name"
+        else:
+            period = "strftime(?, ended_at)"
+            params.insert(0, BUCKETS[args.aggregate])
+            group_by = "1, service_name"
+        
+        query = f"""
+            SELECT
+                {period} as period,
+                service_name,
+                SUM(count) as checks,
+                ROUND(100.0 * SUM(CASE WHEN is_healthy = 1 THEN count ELSE 0 END) / SUM(count), 2) as uptime,
+                ROUND(SUM(rt_sum) / SUM(count), 3) as avg_response_time,
+                ROUND(MIN(rt_min), 3) as min_response_time,
+                ROUND(MAX(rt_max), 3) as max_response_time
+            FROM {source}
+            WHERE {conditions}
+            GROUP BY {group_by}
+            ORDER BY {group_by}
+        """
+    
+    if args.limit:
+        query += " LIMIT ?"
+        params.append(args.limit)
+    
+    return query, params
+
+
+def stream_rows(conn: sqlite3.Connection, query: str, params: Sequence) -> Iterator[tuple]:
+    """Lire les résultats par lots"""
+    cursor = conn.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def incident_rows(conn: sqlite3.Connection, args: argparse.Namespace) -> Iterator[tuple]:
+    """Incidents de la période, par ordre chronologique (durée en secondes)"""
+    until = args.until or datetime.now()
+    intervals = transitions.load_intervals(conn, args.since, until, args.service)
+    
+    rows = [
+        (service_name, incident['start'], incident['end'],
+         round(incident['duration'], 1), incident['error'])
+        for service_name, service_intervals in intervals.items()
+        for incident in transitions.incidents(service_intervals, args.since, until)
+    ]
+    rows.sort(key=lambda row: row[1])
+    
+    for service_name, start, end, duration, error in rows[:args.limit or None]:
+        yield (service_name, str(start), str(end) if end else None, duration, error)
+
+
+def archive_rows(reader: archive.ArchiveReader, args: argparse.Namespace) -> Iterator[tuple]:
+    """Vérifications archivées de la période (mêmes colonnes que RAW_COLUMNS)"""
+    services = set(args.service or [])
+    count = 0
+    
+    for record in reader.read('checks', args.since, args.until):
+        if services and record['service_name'] not in services:
+            continue
+        if args.status and record['is_healthy'] != (args.status == 'up'):
+            continue
+        
+        yield (record['timestamp'], record['service_name'], int(record['is_healthy']),
+               record['response_time'], record['status_code'], 1, record['error'])
+        
+        count += 1
+        if args.limit and count >= args.limit:
+            break
+
+
+def write_rows(rows: Iterator[tuple], columns: List[Tuple[str, int]], fmt: str, out=None):
+    """Écrire les lignes au fur et à mesure dans le format demandé"""
+    out = out or sys.stdout
+    names = [name for name, _ in columns]
+    
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(row)
+    elif fmt == 'json':
+        for row in rows:
+            out.write(json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n")
+    else:
+        out.write("  ".join(f"{name:<{width}}" for name, width in columns).rstrip() + "\n")
+        for row in rows:
+            cells = ['' if value is None else str(value) for value in row]
+            out.write("  ".join(
+                f"{cell:<{width}}" for cell, (_, width) in zip(cells, columns)
+            ).rstrip() + "\n")
+
+
+def history_command(argv: List[str], db_path: str, archive_dir: str = "data/archive") -> int:
+    """
+    Exécuter la commande `history`
+    
+    Args:
+        argv: Arguments après `history`
+        db_path: Chemin de la base par défaut (database_path)
+        archive_dir: Dossier des archives (option --archive)
+    
+    Returns:
+        Code de sortie
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.archive:
+        if args.incidents or args.aggregate != 'none':
+            parser.error("--archive ne permet que la liste des vérifications")
+        try:
+            write_rows(archive_rows(archive.ArchiveReader(archive_dir), args),
+                       RAW_COLUMNS, args.format)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    
+    path = Path(args.db or db_path)
+    
+    if not path.exists():
+        print(f"Base d'historique introuvable: {path}", file=sys.stderr)
+        return 1
+    
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=10)
+    try:
+        if args.incidents:
+            rows, columns = incident_rows(conn, args), INCIDENT_COLUMNS
+        else:
+            query, params = build_query(args, samples_source(conn))
+            rows = stream_rows(conn, query, params)
+            columns = RAW_COLUMNS if args.aggregate == 'none' else AGGREGATE_COLUMNS
+        
+        write_rows(rows, columns, args.format)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Sortie fermée (ex: | head): rediriger le reste vers /dev/null
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except sqlite3.Error as e:
+        print(f"Erreur de lecture de l'historique: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    
+    return 0
+
+
+def build_export_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python app.py export",
+        description="Exporter l'historique vers un fichier compressé (lecture seule)"
+    )
+    parser.add_argument('--db', help="Chemin de la base (défaut: database_path)")
+    parser.add_argument('--table', choices=list(archive.TIME_COLUMNS), default='checks',
+                        help="Table à exporter (défaut: checks)")
+    parser.add_argument('--format', choices=list(archive.FORMATS), default='ndjson',
+                        help="ndjson.gz, csv.gz ou parquet (si pyarrow est installé)")
+    parser.add_argument('--since', type=parse_time, help="Début de la période (défaut: tout)")
+    parser.add_argument('--until', type=parse_time, help="Fin de la période (défaut: maintenant)")
+    parser.add_argument('--output', '-o',
+                        help="Fichier de sortie (défaut: <table>-<date><extension>)")
+    return parser
+
+
+def export_command(argv: List[str], db_path: str) -> int:
+    """
+    Exécuter la commande `export`
+    
+    Args:
+        argv: Arguments après `export`
+        db_path: Chemin de la base par défaut (database_path)
+    
+    Returns:
+        Code de sortie
+    """
+    args = build_export_parser().parse_args(argv)
+    path = Path(args.db or db_path)
+    
+    if not path.exists():
+        print(f"Base d'historique introuvable: {path}", file=sys.stderr)
+        return 1
+    
+    extension, _ = archive.FORMATS[args.format]
+    output = Path(args.output or f"{args.table}-{datetime.now():%Y%m%d-%H%M%S}{extension}")
+    
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=10)
+    try:
+        count = archive.export_table(conn, args.table, output, args.format,
+                                     args.since, args.until)
+    except (sqlite3.Error, ValueError, RuntimeError, OSError) as e:
+        print(f"Erreur d'export: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    
+    print(f"{count} ligne(s) de {args.table} exportée(s) vers {output}", file=sys.stderr)
+    return 0
@@ -0,0 +1,314 @@
+"""
+Coordination multi-instances
+Répartit les cibles entre plusieurs instances du Control Plane
+
+Chaque instance s'enregistre dans une table de coordination, les cibles
+sont réparties par hachage cohérent entre les instances vivantes et chaque
+cible est protégée par un bail (lease) renouvelable. Seule l'instance qui
+détient le bail d'une cible la vérifie et envoie ses alertes.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """Anneau de hachage cohérent avec nœuds virtuels"""
+    
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        """
+        Args:
+            nodes: Identifiants des instances
+            replicas: Nombre de nœuds virtuels par instance
+        """
+        self._keys: List[int] = []
+        self._ring: Dict[int, str] = {}
+        
+        for node in nodes:
+            for i in range(replicas):
+                key = self._hash(f"{node}#{i}")
+                self._ring[key] = node
+                self._keys.append(key)
+        
+        self._keys.sort()
+    
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:16], 16)
+    
+    def get_node(self, key: str) -> Optional[str]:
+        """Retourner l'instance propriétaire d'une clé (None si anneau vide)"""
+        if not self._keys:
+            return None
+        
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._ring[self._keys[index]]
+
+
+class CoordinationBackend:
+    """Interface d'un backend de coordination"""
+    
+    def heartbeat(self, instance_id: str, ttl: float):
+        """Enregistrer l'instance ou prolonger sa présence de `ttl` secondes"""
+        raise NotImplementedError
+    
+    def deregister(self, instance_id: str):
+        """Retirer l'instance de la table de coordination"""
+        raise NotImplementedError
+    
+    def live_instances(self) -> List[str]:
+        """Lister les instances dont la présence n'a pas expiré"""
+        raise NotImplementedError
+    
+    def acquire(self, target: str, instance_id: str, ttl: float) -> bool:
+        """Acquérir ou renouveler le bail d'une cible (True si détenu)"""
+        raise NotImplementedError
+    
+    def release(self, target: str, instance_id: str):
+        """Rendre le bail d'une cible s'il est détenu par l'instance"""
+        raise NotImplementedError
+    
+    def close(self):
+        """Libérer les ressources du backend"""
+
+
+class SQLiteCoordinationBackend(CoordinationBackend):
+    """Backend de coordination stocké dans le fichier SQLite partagé"""
+    
+    def __init__(self, db_path: str = "data/history.db"):
+        self.db_path = db_path
+        
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Autocommit: chaque UPSERT est atomique côté SQLite. Utilisée depuis le
+        # thread de renouvellement du coordinateur (un seul à la fois)
+        self.conn = sqlite3.connect(db_path, timeout=10, isolation_level=None,
+                                    check_same_thread=False)
+        self._create_tables()
+        
+        logger.info(f"Backend de coordination SQLite initialisé: {db_path}")
+    
+    def _create_tables(self):
+        """Créer les tables de coordination"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS instances (
+                instance_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                target TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                acquired_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+    
+    def heartbeat(self, instance_id: str, ttl: float):
+        now = time.time()
+        self.conn.execute("""
+            INSERT INTO instances (instance_id, heartbeat_at, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(instance_id) DO UPDATE SET
+                heartbeat_at = excluded.heartbeat_at,
+                expires_at = excluded.expires_at
+        """, (instance_id, now, now + ttl))
+    
+    def deregister(self, instance_id: str):
+        self.conn.execute("DELETE FROM instances WHERE instance_id = ?", (instance_id,))
+    
+    def live_instances(self) -> List[str]:
+        cursor = self.conn.execute("""
+            SELECT instance_id FROM instances
+            WHERE expires_at > ?
+            ORDER BY instance_id
+        """, (time.time(),))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def acquire(self, target: str, instance_id: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self.conn.execute("""
+            INSERT INTO leases (target, holder, acquired_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(target) DO UPDATE SET
+                holder = excluded.holder,
+                acquired_at = CASE WHEN leases.holder = excluded.holder
+                                   THEN leases.acquired_at
+                                   ELSE excluded.acquired_at END,
+                expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at <= ?
+        """, (target, instance_id, now, now + ttl, now))
+        return cursor.rowcount > 0
+    
+    def release(self, target: str, instance_id: str):
+        self.conn.execute(
+            "DELETE FROM leases WHERE target = ? AND holder = ?",
+            (target, instance_id)
+        )
+    
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+# Backends disponibles (clé = valeur de `coordination_backend`)
+BACKENDS: Dict[str, Callable[..., CoordinationBackend]] = {
+    'sqlite': SQLiteCoordinationBackend,
+}
+
+
+def create_backend(name: str, db_path: str) -> CoordinationBackend:
+    """Instancier un backend de coordination par son nom"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Backend de coordination inconnu: {name} "
+            f"(disponibles: {', '.join(sorted(BACKENDS))})"
+        )
+    return backend_class(db_path)
+
+
+class LeaseCoordinator:
+    """
+    Répartition des cibles entre instances par baux renouvelables
+    
+    Les baux sont renouvelés en tâche de fond tous les tiers de `lease_ttl`,
+    indépendamment de l'intervalle de vérification, dans un thread dédié:
+    l'attente d'un verrou SQLite tenu par une autre instance ne bloque pas la
+    boucle asyncio (sondes, page de statut). Si une instance meurt,
+    sa présence et ses baux expirent au plus tard `lease_ttl` secondes après
+    son dernier renouvellement et les instances survivantes les reprennent.
+    """
+    
+    def __init__(self, backend: CoordinationBackend, instance_id: str,
+                 lease_ttl: float = 60,
+                 on_acquire: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            backend: Backend de coordination
+            instance_id: Identifiant unique de l'instance
+            lease_ttl: Durée de validité d'un bail en secondes
+            on_acquire: Callback appelé lorsqu'une cible est acquise
+        """
+        self.backend = backend
+        self.instance_id = instance_id
+        self.lease_ttl = lease_ttl
+        self.on_acquire = on_acquire
+        self.targets: List[str] = []
+        
+        # Cible -> échéance locale du bail (horloge monotone)
+        self._held: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+        # Un seul thread: les accès au backend restent sérialisés
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="coordination")
+    
+    def set_targets(self, targets: Iterable[str]):
+        """Définir la liste des cibles à répartir"""
+        self.targets = list(dict.fromkeys(targets))
+    
+    def holds(self, target: str) -> bool:
+        """L'instance détient-elle un bail valide pour cette cible ?"""
+        expires = self._held.get(target)
+        return expires is not None and expires > time.monotonic()
+    
+    def refresh(self) -> List[str]:
+        """
+        Signaler la présence de l'instance et rééquilibrer les baux
+        
+        Returns:
+            Cibles nouvellement acquises
+        """
+        acquired = []
+        self.backend.heartbeat(self.instance_id, self.lease_ttl)
+        
+        instances = self.backend.live_instances()
+        if self.instance_id not in instances:
+            instances.append(self.instance_id)
+        ring = HashRing(instances)
+        
+        for target in self.targets:
+            if ring.get_node(target) == self.instance_id:
+                # Échéance calculée avant l'écriture: jamais plus optimiste que la base
+                deadline = time.monotonic() + self.lease_ttl
+                if self.backend.acquire(target, self.instance_id, self.lease_ttl):
+                    newly_acquired = target not in self._held
+                    self._held[target] = deadline
+                    if newly_acquired:
+                        logger.info(f"🔐 Bail acquis: {target} ({self.instance_id})")
+                        acquired.append(target)
+                else:
+                    # Encore tenu par une autre instance jusqu'à expiration
+                    self._held.pop(target, None)
+            elif target in self._held:
+                # Cible réattribuée à une autre instance
+                self.backend.release(target, self.instance_id)
+                del self._held[target]
+                logger.info(f"🔓 Bail rendu: {target} ({self.instance_id})")
+        return acquired
+    
+    def _notify_acquired(self, targets: List[str]):
+        """Appeler `on_acquire` (dans la boucle asyncio) pour les cibles acquises"""
+        if self.on_acquire:
+            for target in targets:
+                self.on_acquire(target)
+    
+    async def run(self):
+        """Boucle de renouvellement des baux"""
+        interval = max(1.0, self.lease_ttl / 3)
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            try:
+                self._notify_acquired(await loop.run_in_executor(self._executor, self.refresh))
+            except sqlite3.Error as e:
+                logger.error(f"Erreur lors du renouvellement des baux: {e}")
+            await asyncio.sleep(interval)
+    
+    def start(self):
+        """Acquérir les baux initiaux et lancer le renouvellement en tâche de fond"""
+        # Au démarrage, les vérifications attendent de toute façon les baux initiaux
+        self._notify_acquired(self.refresh())
+        self._task = asyncio.create_task(self.run())
+        logger.info(
+            f"Coordination démarrée: instance {self.instance_id}, "
+            f"bail {self.lease_ttl}s, {len(self._held)}/{len(self.targets)} cible(s)"
+        )
+    
+    async def stop(self):
+        """Rendre tous les baux et quitter la coordination"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        # Après un éventuel renouvellement encore en cours dans le thread
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._release_all)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la libération des baux: {e}")
+        
+        self._held.clear()
+        self._executor.shutdown(wait=True)
+        self.backend.close()
+    
+    def _release_all(self):
+        for target in list(self._held):
+            self.backend.release(target, self.instance_id)
+        self.backend.deregister(self.instance_id)
@@ -1,22 +1,55 @@
 """
 History Manager
 Gère l'historique des vérifications dans une base SQLite
+
+Les écritures passent par une connexion unique. Les lectures utilisent un
+pool de connexions en lecture seule (mode WAL) et peuvent être exécutées
+dans un thread via `read()` pour ne pas bloquer la boucle asyncio.
+
+Deux modes de stockage des vérifications (`history_storage`):
+- raw: une ligne par vérification (défaut)
+- rle: runs compressés en régime stable (voir src/database/runs.py)
 """
 
+import asyncio
+import heapq
 import sqlite3
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 
+from src.database.readers import ReadConnectionPool
+from src.database import archive, runs, transitions
+
 logger = logging.getLogger(__name__)
 
 
 class HistoryManager:
     """Gestionnaire de l'historique des vérifications"""
     
-    def __init__(self, db_path: str = "data/history.db"):
+    def __init__(self, db_path: str = "data/history.db", read_connections: int = 4,
+                 storage: str = "raw", rle_latency_band: float = 0.5,
+                 rle_flush_interval: float = 900):
+        """
+        Args:
+            db_path: Chemin de la base SQLite
+            read_connections: Taille du pool de connexions en lecture seule
+            storage: Mode de stockage des vérifications (raw ou rle)
+            rle_latency_band: Écart relatif de latence toléré dans un run (mode rle)
+            rle_flush_interval: Intervalle d'écriture des runs ouverts (mode rle)
+        """
+        if storage not in ('raw', 'rle'):
+            raise ValueError(f"Mode de stockage inconnu: {storage} (disponibles: raw, rle)")
+        
         self.db_path = db_path
+        self.storage = storage
+        self.encoder = (
+            runs.RunLengthEncoder(rle_latency_band, rle_flush_interval)
+            if storage == 'rle' else None
+        )
         
         # Créer le dossier si nécessaire
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -24,8 +57,22 @@ class HistoryManager:
         # Initialiser la base de données
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
+        
+        # WAL: les lecteurs ne bloquent pas l'écrivain (et inversement)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
         self._create_tables()
         
+        # Dernier état enregistré par service (évite une lecture par écriture)
+        self._states: Dict[str, bool] = {}
+        
+        # Lectures: connexions en lecture seule, exécutées hors boucle asyncio
+        self.readers = ReadConnectionPool(db_path, size=read_connections)
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=read_connections,
+            thread_name_prefix="history-read"
+        )
+        
         logger.info(f"Base de données d'historique initialisée: {db_path}")
     
     def _create_tables(self):
@@ -56,7 +103,150 @@ class HistoryManager:
             ON checks(timestamp DESC)
         """)
         
+        # Table des phases HTTP (DNS, connexion, TTFB, total) par service
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS phase_timings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                service_name TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                phase TEXT NOT NULL,
+                duration REAL NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_phase_timings_service_time 
+            ON phase_timings(service_name, timestamp DESC)
+        """)
+        
+        # Table des vérifications de certificats TLS
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tls_checks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                service_name TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                not_after DATETIME,
+                days_left REAL,
+                issuer TEXT,
+                san_match BOOLEAN,
+                handshake_time REAL,
+                error TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tls_checks_service_time 
+            ON tls_checks(service_name, timestamp DESC)
+        """)
+        
+        # Table des relevés de ressources du démon (fuites mémoire, descripteurs)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS resource_samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME NOT NULL,
+                rss_bytes INTEGER,
+                open_fds INTEGER,
+                asyncio_tasks INTEGER,
+                threads INTEGER,
+                sqlite_memory INTEGER,
+                gc_objects INTEGER,
+                workers_rss_bytes INTEGER
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_resource_samples_time 
+            ON resource_samples(timestamp DESC)
+        """)
+        
+        # Table des changements d'état (une ligne par transition UP/DOWN)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS state_transitions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                service_name TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                is_healthy BOOLEAN NOT NULL,
+                error TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_state_transitions_service_time 
+            ON state_transitions(service_name, timestamp)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_state_transitions_timestamp 
+            ON state_transitions(timestamp)
+        """)
+        
+        # Références de latence par service et heure de la semaine
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS latency_baselines (
+                service_name TEXT NOT NULL,
+                hour_of_week INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                mean REAL NOT NULL,
+                m2 REAL NOT NULL,
+                updated_at DATETIME NOT NULL,
+                PRIMARY KEY (service_name, hour_of_week)
+            )
+        """)
+        
+        # Runs compressés (mode rle) et vue unifiée `check_samples`
+        runs.create_tables(cursor)
+        
+        self.conn.commit()
+        self._backfill_transitions()
+    
+    def _backfill_transitions(self):
+        """Reconstruire les transitions depuis les checks existants (une seule fois)"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM state_transitions LIMIT 1")
+        if cursor.fetchone():
+            return
+        
+        cursor.execute("""
+            INSERT INTO state_transitions (service_name, timestamp, is_healthy, error)
+            SELECT service_name, timestamp, is_healthy, error
+            FROM (
+                SELECT 
+                    service_name, timestamp, is_healthy, error,
+                    LAG(is_healthy) OVER (
+                        PARTITION BY service_name ORDER BY timestamp
+                    ) as previous
+                FROM checks
+            )
+            WHERE previous IS NULL OR previous != is_healthy
+            ORDER BY service_name, timestamp
+        """)
         self.conn.commit()
+        
+        if cursor.rowcount > 0:
+            logger.info(f"Transitions d'état reconstruites depuis l'historique: {cursor.rowcount}")
+    
+    def _last_state(self, service_name: str) -> Optional[bool]:
+        """Dernier état enregistré d'un service (cache, sinon base)"""
+        if service_name not in self._states:
+            row = self.conn.execute("""
+                SELECT is_healthy FROM state_transitions
+                WHERE service_name = ?
+                ORDER BY timestamp DESC
+                LIMIT 1
+            """, (service_name,)).fetchone()
+            if row is None:
+                return None
+            self._states[service_name] = bool(row['is_healthy'])
+        return self._states[service_name]
+    
+    def forget_state(self, service_name: str):
+        """
+        Invalider le dernier état en cache d'un service
+        
+        À appeler lorsqu'une autre instance a pu écrire des transitions pour
+        ce service (ex: reprise d'un bail en mode coordonné).
+        """
+        self._states.pop(service_name, None)
     
     def add_check(self, service_name: str, is_healthy: bool, 
                   response_time: float, status_code: Optional[int] = None,
@@ -71,26 +261,164 @@ class HistoryManager:
             status_code: Code HTTP (optionnel)
             error: Message d'erreur (optionnel)
         """
+        try:
+            cursor = self.conn.cursor()
+            timestamp = datetime.now()
+            
+            if self.encoder:
+                # Ligne complète uniquement sur changement d'état ou de latence
+                self.encoder.add(cursor, service_name, timestamp, is_healthy,
+                                 response_time, status_code, error)
+            else:
+                cursor.execute("""
+                    INSERT INTO checks (service_name, timestamp, is_healthy, response_time, status_code, error)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    service_name,
+                    timestamp,
+                    is_healthy,
+                    response_time,
+                    status_code,
+                    error
+                ))
+            
+            # Transition d'état: uniquement si l'état a changé
+            changed = self._last_state(service_name) != bool(is_healthy)
+            if changed:
+                cursor.execute("""
+                    INSERT INTO state_transitions (service_name, timestamp, is_healthy, error)
+                    VALUES (?, ?, ?, ?)
+                """, (service_name, timestamp, is_healthy, error))
+            
+            self.conn.commit()
+            if changed:
+                self._states[service_name] = bool(is_healthy)
+            logger.debug(f"Check enregistré: {service_name} - {'OK' if is_healthy else 'FAIL'}")
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement du check: {e}")
+    
+    def add_phase_timings(self, service_name: str, phases: Dict[str, Optional[float]],
+                          timestamp: Optional[datetime] = None):
+        """
+        Enregistrer la décomposition du temps de réponse d'une sonde
+        
+        Args:
+            service_name: Nom du service
+            phases: Durées par phase en secondes (None = phase non mesurée)
+            timestamp: Horodatage de la sonde (défaut: maintenant)
+        """
+        rows = [
+            (service_name, timestamp or datetime.now(), phase, duration)
+            for phase, duration in phases.items()
+            if duration is not None
+        ]
+        if not rows:
+            return
+        
+        try:
+            cursor = self.conn.cursor()
+            cursor.executemany("""
+                INSERT INTO phase_timings (service_name, timestamp, phase, duration)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement des phases: {e}")
+    
+    def add_tls_check(self, service_name: str, certificate: Optional[Dict],
+                      error: Optional[str] = None):
+        """
+        Enregistrer le résultat d'un handshake TLS
+        
+        Args:
+            service_name: Nom de la cible TLS
+            certificate: Infos du certificat (not_after, days_left, issuer,
+                         san_match, handshake_time) ou None en cas d'échec
+            error: Message d'erreur (optionnel)
+        """
+        certificate = certificate or {}
+        
         try:
             cursor = self.conn.cursor()
             
             cursor.execute("""
-                INSERT INTO checks (service_name, timestamp, is_healthy, response_time, status_code, error)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO tls_checks (service_name, timestamp, not_after, days_left,
+                                        issuer, san_match, handshake_time, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 service_name,
                 datetime.now(),
-                is_healthy,
-                response_time,
-                status_code,
+                certificate.get('not_after'),
+                certificate.get('days_left'),
+                certificate.get('issuer'),
+                certificate.get('san_match'),
+                certificate.get('handshake_time'),
                 error
             ))
             
             self.conn.commit()
-            logger.debug(f"Check enregistré: {service_name} - {'OK' if is_healthy else 'FAIL'}")
             
         except sqlite3.Error as e:
-            logger.error(f"Erreur lors de l'enregistrement du check: {e}")
+            logger.error(f"Erreur lors de l'enregistrement du check TLS: {e}")
+    
+    def add_resource_sample(self, sample: Dict[str, Optional[int]]):
+        """
+        Enregistrer un relevé des ressources du démon
+        
+        Args:
+            sample: Mesures (rss_bytes, open_fds, asyncio_tasks, threads,
+                    sqlite_memory, gc_objects, workers_rss_bytes)
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO resource_samples (timestamp, rss_bytes, open_fds, asyncio_tasks,
+                                              threads, sqlite_memory, gc_objects, workers_rss_bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                datetime.now(),
+                sample.get('rss_bytes'),
+                sample.get('open_fds'),
+                sample.get('asyncio_tasks'),
+                sample.get('threads'),
+                sample.get('sqlite_memory'),
+                sample.get('gc_objects'),
+                sample.get('workers_rss_bytes')
+            ))
+            
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement des ressources: {e}")
+    
+    def _query(self, query: str, params=()) -> List[sqlite3.Row]:
+        """Exécuter une requête de lecture sur une connexion du pool"""
+        with self.readers.connection() as conn:
+            return conn.execute(query, params).fetchall()
+    
+    async def read(self, method: Callable, *args, **kwargs):
+        """
+        Exécuter une méthode de lecture dans l'exécuteur dédié
+        
+        Exemple: stats = await history.read(history.get_uptime_stats, hours=24)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._read_executor, partial(method, *args, **kwargs)
+        )
+    
+    def flush(self):
+        """Écrire les compteurs des runs ouverts (mode rle)"""
+        if not self.encoder:
+            return
+        try:
+            self.encoder.flush(self.conn.cursor())
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'écriture des runs: {e}")
     
     def get_recent_checks(self, service_name: Optional[str] = None, 
                          limit: int = 100) -> List[Dict]:
@@ -105,32 +433,88 @@ class HistoryManager:
             Liste des vérifications
         """
         try:
-            cursor = self.conn.cursor()
+            if self.encoder:
+                return self._recent_samples(service_name, limit)
             
             if service_name:
-                cursor.execute("""
+                rows = self._query("""
                     SELECT * FROM checks 
                     WHERE service_name = ?
                     ORDER BY timestamp DESC
                     LIMIT ?
                 """, (service_name, limit))
             else:
-                cursor.execute("""
+                rows = self._query("""
                     SELECT * FROM checks 
                     ORDER BY timestamp DESC
                     LIMIT ?
                 """, (limit,))
             
-            rows = cursor.fetchall()
             return [dict(row) for row in rows]
             
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de la récupération des checks: {e}")
             return []
     
+    def _load_intervals(self, hours: int, service_name: Optional[str] = None):
+        """Charger les intervalles d'état de la période depuis une connexion du pool"""
+        until = datetime.now()
+        since = until - timedelta(hours=hours)
+        with self.readers.connection() as conn:
+            intervals = transitions.load_intervals(
+                conn, since, until, [service_name] if service_name else None
+            )
+        return intervals, since, until
+    
+    def get_state_intervals(self, hours: int = 24):
+        """
+        Intervalles d'état de la période (amorçage des agrégats en mémoire)
+        
+        Returns:
+            ({service_name: [(début, fin, sain, erreur), ...]}, since, until)
+        """
+        try:
+            return self._load_intervals(hours)
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du chargement des transitions: {e}")
+            until = datetime.now()
+            return {}, until - timedelta(hours=hours), until
+    
+    def _recent_samples(self, service_name: Optional[str], limit: int) -> List[Dict]:
+        """
+        Vérifications récentes en mode rle: lignes brutes et runs fusionnés
+        
+        Un run est présenté comme une vérification datée de sa fin, avec le
+        temps de réponse moyen et le nombre de vérifications (`count`).
+        """
+        service_filter = "WHERE service_name = ?" if service_name else ""
+        params = ([service_name] if service_name else []) + [limit]
+        
+        raw = self._query(f"""
+            SELECT service_name, timestamp, is_healthy, response_time,
+                   status_code, error, 1 as count
+            FROM checks {service_filter}
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, params)
+        
+        compressed = self._query(f"""
+            SELECT service_name, ended_at as timestamp, is_healthy,
+                   rt_sum / count as response_time, status_code, error, count
+            FROM check_runs {service_filter}
+            ORDER BY ended_at DESC
+            LIMIT ?
+        """, params)
+        
+        merged = heapq.merge(
+            [dict(row) for row in raw], [dict(row) for row in compressed],
+            key=lambda row: row['timestamp'], reverse=True
+        )
+        return list(merged)[:limit]
+    
     def get_uptime_stats(self, hours: int = 24) -> Dict[str, float]:
         """
-        Calculer les statistiques d'uptime
+        Calculer l'uptime pondéré par le temps depuis les transitions d'état
         
         Args:
             hours: Période en heures
@@ -139,29 +523,12 @@ class HistoryManager:
             Dictionnaire {service_name: uptime_percentage}
         """
         try:
-            cursor = self.conn.cursor()
-            since = datetime.now() - timedelta(hours=hours)
-            
-            cursor.execute("""
-                SELECT 
-                    service_name,
-                    COUNT(*) as total_checks,
-                    SUM(CASE WHEN is_healthy = 1 THEN 1 ELSE 0 END) as healthy_checks
-                FROM checks
-                WHERE timestamp > ?
-                GROUP BY service_name
-            """, (since,))
-            
-            rows = cursor.fetchall()
+            intervals, since, until = self._load_intervals(hours)
             
             stats = {}
-            for row in rows:
-                service_name = row['service_name']
-                total = row['total_checks']
-                healthy = row['healthy_checks']
-                
-                if total > 0:
-                    uptime = (healthy / total) * 100
+            for service_name, service_intervals in intervals.items():
+                uptime = transitions.uptime(service_intervals, since, until)
+                if uptime is not None:
                     stats[service_name] = uptime
             
             return stats
@@ -170,39 +537,56 @@ class HistoryManager:
             logger.error(f"Erreur lors du calcul des stats: {e}")
             return {}
     
-    def get_downtime_incidents(self, hours: int = 24) -> List[Dict]:
+    def get_downtime_incidents(self, hours: int = 24,
+                               service_name: Optional[str] = None) -> List[Dict]:
         """
-        Récupérer les incidents de downtime
+        Récupérer les incidents de downtime (une entrée par panne, pas par check)
         
         Args:
             hours: Période en heures
+            service_name: Nom du service (None = tous)
         
         Returns:
-            Liste des incidents
+            Liste des incidents {service_name, start, end, duration, ongoing, error},
+            du plus récent au plus ancien (`end` = None si en cours)
         """
         try:
-            cursor = self.conn.cursor()
-            since = datetime.now() - timedelta(hours=hours)
-            
-            cursor.execute("""
-                SELECT 
-                    service_name,
-                    timestamp,
-                    response_time,
-                    status_code,
-                    error
-                FROM checks
-                WHERE timestamp > ? AND is_healthy = 0
-                ORDER BY timestamp DESC
-            """, (since,))
+            intervals, since, until = self._load_intervals(hours, service_name)
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            incidents = [
+                dict(incident, service_name=name)
+                for name, service_intervals in intervals.items()
+                for incident in transitions.incidents(service_intervals, since, until)
+            ]
+            incidents.sort(key=lambda incident: incident['start'], reverse=True)
+            return incidents
             
         except sqlite3.Error as e:
             logger.error(f"Erreur lors de la récupération des incidents: {e}")
             return []
     
+    def get_reliability_stats(self, hours: int = 24) -> Dict[str, Dict]:
+        """
+        Calculer uptime, nombre d'incidents, temps d'arrêt, MTTR et MTBF
+        
+        Args:
+            hours: Période en heures
+        
+        Returns:
+            {service_name: {'uptime': %, 'incidents': n, 'downtime': s,
+                            'mttr': s ou None, 'mtbf': s ou None}}
+        """
+        try:
+            intervals, since, until = self._load_intervals(hours)
+            return {
+                name: transitions.reliability(service_intervals, since, until)
+                for name, service_intervals in intervals.items()
+            }
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du calcul de la fiabilité: {e}")
+            return {}
+    
     def get_average_response_time(self, service_name: str, hours: int = 24) -> Optional[float]:
         """
         Calculer le temps de réponse moyen
@@ -215,32 +599,194 @@ class HistoryManager:
             Temps de réponse moyen en secondes, ou None
         """
         try:
-            cursor = self.conn.cursor()
             since = datetime.now() - timedelta(hours=hours)
             
-            cursor.execute("""
-                SELECT AVG(response_time) as avg_time
-                FROM checks
-                WHERE service_name = ? AND timestamp > ? AND is_healthy = 1
+            rows = self._query("""
+                SELECT SUM(rt_sum) / SUM(count) as avg_time
+                FROM check_samples
+                WHERE service_name = ? AND ended_at > ? AND is_healthy = 1
             """, (service_name, since))
             
-            row = cursor.fetchone()
-            return row['avg_time'] if row else None
+            return rows[0]['avg_time'] if rows else None
             
         except sqlite3.Error as e:
             logger.error(f"Erreur lors du calcul du temps moyen: {e}")
             return None
     
-    def cleanup_old_records(self, days: int = 30):
+    def get_latency_profile(self, days: int = 28) -> List[tuple]:
+        """
+        Agréger les temps de réponse sains par service et heure de la semaine
+        
+        Une seule passe GROUP BY sur `check_samples` (lignes brutes et runs);
+        un run est rattaché à l'heure de sa fin.
+        
+        Returns:
+            [(service_name, hour_of_week, nombre, somme, somme des carrés), ...]
+        """
+        try:
+            since = datetime.now() - timedelta(days=days)
+            
+            # strftime('%w'): 0 = dimanche, ramené à 0 = lundi
+            rows = self._query("""
+                SELECT service_name,
+                       ((CAST(strftime('%w', ended_at) AS INTEGER) + 6) % 7) * 24
+                           + CAST(strftime('%H', ended_at) AS INTEGER) as hour_of_week,
+                       SUM(count) as count,
+                       SUM(rt_sum) as rt_sum,
+                       SUM(rt_sumsq) as rt_sumsq
+                FROM check_samples
+                WHERE ended_at > ? AND is_healthy = 1
+                GROUP BY service_name, hour_of_week
+            """, (since,))
+            
+            return [tuple(row) for row in rows]
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du calcul du profil de latence: {e}")
+            return []
+    
+    def get_latency_baselines(self) -> List[tuple]:
+        """Références enregistrées: [(service_name, hour_of_week, nombre, moyenne, m2), ...]"""
+        try:
+            rows = self._query("""
+                SELECT service_name, hour_of_week, count, mean, m2
+                FROM latency_baselines
+            """)
+            return [tuple(row) for row in rows]
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de la lecture des références de latence: {e}")
+            return []
+    
+    def save_latency_baselines(self, rows: List[tuple]):
+        """Enregistrer des références (service_name, hour_of_week, nombre, moyenne, m2)"""
+        if not rows:
+            return
+        try:
+            now = datetime.now()
+            self.conn.executemany("""
+                INSERT INTO latency_baselines (service_name, hour_of_week, count, mean, m2, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(service_name, hour_of_week) DO UPDATE SET
+                    count = excluded.count,
+                    mean = excluded.mean,
+                    m2 = excluded.m2,
+                    updated_at = excluded.updated_at
+            """, [row + (now,) for row in rows])
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors de l'enregistrement des références de latence: {e}")
+    
+    def get_phase_stats(self, hours: int = 24,
+                        service_name: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Agréger les phases HTTP par service
+        
+        Args:
+            hours: Période en heures
+            service_name: Nom du service (None = tous)
+        
+        Returns:
+            {service_name: {phase: {'avg': s, 'min': s, 'max': s, 'count': n}}}
+        """
+        try:
+            since = datetime.now() - timedelta(hours=hours)
+            
+            query = """
+                SELECT 
+                    service_name,
+                    phase,
+                    AVG(duration) as avg_duration,
+                    MIN(duration) as min_duration,
+                    MAX(duration) as max_duration,
+                    COUNT(*) as samples
+                FROM phase_timings
+                WHERE timestamp > ?
+            """
+            params = [since]
+            if service_name:
+                query += " AND service_name = ?"
+                params.append(service_name)
+            query += " GROUP BY service_name, phase"
+            
+            stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for row in self._query(query, params):
+                stats.setdefault(row['service_name'], {})[row['phase']] = {
+                    'avg': row['avg_duration'],
+                    'min': row['min_duration'],
+                    'max': row['max_duration'],
+                    'count': row['samples']
+                }
+            
+            return stats
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du calcul des stats de phases: {e}")
+            return {}
+    
+    def get_recent_phase_durations(self, phase: str = 'total',
+                                   limit: int = 500) -> Dict[str, List[float]]:
+        """
+        Dernières durées d'une phase HTTP par service (amorçage des timeouts adaptatifs)
+        
+        Args:
+            phase: Phase mesurée (dns, connect, ttfb, total)
+            limit: Nombre maximal de mesures par service
+        
+        Returns:
+            {service_name: [durée, ...]} du plus ancien au plus récent
+        """
+        try:
+            rows = self._query("""
+                SELECT service_name, duration FROM (
+                    SELECT service_name, duration, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY service_name ORDER BY timestamp DESC
+                           ) as rank
+                    FROM phase_timings
+                    WHERE phase = ?
+                )
+                WHERE rank <= ?
+                ORDER BY service_name, timestamp
+            """, (phase, limit))
+            
+            durations: Dict[str, List[float]] = {}
+            for row in rows:
+                durations.setdefault(row['service_name'], []).append(row['duration'])
+            return durations
+            
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du chargement des durées de phase: {e}")
+            return {}
+    
+    def archive_old_records(self, cutoff: datetime,
+                            archive_dir: str = "data/archive") -> Dict[str, int]:
+        """
+        Archiver les enregistrements antérieurs à `cutoff` avant leur suppression
+        
+        Lecture seule (connexion du pool): peut être exécuté via `read()`.
+        Les erreurs sont propagées pour que la rétention ne supprime rien
+        qui n'ait été archivé.
+        
+        Returns:
+            {table: nombre de lignes archivées}
+        """
+        with self.readers.connection() as conn:
+            return archive.archive_before(conn, cutoff, archive_dir)
+    
+    def cleanup_old_records(self, days: int = 30, cutoff: Optional[datetime] = None):
         """
         Nettoyer les anciens enregistrements
         
         Args:
             days: Supprimer les enregistrements plus vieux que X jours
+            cutoff: Date limite explicite (prioritaire sur `days`), pour
+                    supprimer exactement ce qui vient d'être archivé
         """
         try:
             cursor = self.conn.cursor()
-            cutoff = datetime.now() - timedelta(days=days)
+            cutoff = cutoff or datetime.now() - timedelta(days=days)
             
             cursor.execute("""
                 DELETE FROM checks
@@ -248,15 +794,55 @@ class HistoryManager:
             """, (cutoff,))
             
             deleted = cursor.rowcount
+            
+            cursor.execute("""
+                DELETE FROM phase_timings
+                WHERE timestamp < ?
+            """, (cutoff,))
+            
+            cursor.execute("""
+                DELETE FROM tls_checks
+                WHERE timestamp < ?
+            """, (cutoff,))
+            
+            cursor.execute("""
+                DELETE FROM resource_samples
+                WHERE timestamp < ?
+            """, (cutoff,))
+            
+            cursor.execute("""
+                DELETE FROM check_runs
+                WHERE ended_at < ?
+            """, (cutoff,))
+            
+            # Conserver la dernière transition antérieure: elle fixe l'état initial
+            cursor.execute("""
+                DELETE FROM state_transitions
+                WHERE timestamp < ? AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, MAX(timestamp) FROM state_transitions
+                        WHERE timestamp < ?
+                        GROUP BY service_name
+                    )
+                )
+            """, (cutoff, cutoff))
+            
             self.conn.commit()
             
-            logger.info(f"Nettoyage: {deleted} enregistrements supprimés (> {days} jours)")
+            logger.info(f"Nettoyage: {deleted} enregistrements supprimés (avant {cutoff:%Y-%m-%d %H:%M})")
             
         except sqlite3.Error as e:
             logger.error(f"Erreur lors du nettoyage: {e}")
     
     def close(self):
-        """Fermer la connexion à la base de données"""
+        """Fermer les connexions à la base de données"""
+        self._read_executor.shutdown(wait=True)
+        self.readers.close()
+        
+        # Écrire les compteurs des runs ouverts
+        if self.encoder:
+            self.flush()
+        
         if self.conn:
             self.conn.close()
             logger.info("Connexion à la base de données fermée")
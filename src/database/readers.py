@@ -0,0 +1,73 @@
+"""
+Read Connection Pool
+Pool de connexions SQLite en lecture seule pour l'historique
+
+La base est en mode WAL: les lecteurs travaillent sur un instantané et ne
+bloquent jamais l'écrivain (ni l'inverse). Les connexions sont ouvertes en
+`mode=ro` et partagées entre les threads de l'exécuteur de lecture.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class ReadConnectionPool:
+    """Pool borné de connexions SQLite en lecture seule"""
+    
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 10):
+        """
+        Args:
+            db_path: Chemin de la base SQLite (doit exister)
+            size: Nombre maximum de connexions ouvertes simultanément
+            timeout: Attente maximale sur un verrou SQLite (secondes)
+        """
+        self.uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        self.size = size
+        self.timeout = timeout
+        
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.uri,
+            uri=True,
+            timeout=self.timeout,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Emprunter une connexion (ouverte à la demande, rendue au pool ensuite)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Pool de lecture fermé")
+        
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            
+            try:
+                yield conn
+            finally:
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+    
+    def close(self):
+        """Fermer les connexions inactives (les connexions empruntées le seront au retour)"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
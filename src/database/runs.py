@@ -0,0 +1,191 @@
+"""
+Run-Length Storage
+Stockage compressé des vérifications en régime stable (history_storage: rle)
+
+Une suite de vérifications de même état (santé, code HTTP, erreur) et de
+latence stable est regroupée dans un enregistrement de `check_runs`
+(début, fin, nombre, min/max/somme/somme des carrés des temps de réponse).
+Une ligne complète n'est écrite dans `checks` que lorsque l'état change ou
+que la latence sort de la bande autour de la moyenne courante; le run
+suivant démarre après cette ligne.
+
+Les runs ouverts sont tenus en mémoire et leurs compteurs écrits en base
+toutes les `flush_interval` secondes (et à la fermeture du run).
+
+La vue `check_samples` présente lignes brutes et runs sous une même forme
+(une ligne brute = un run de 1) pour les requêtes d'agrégation.
+"""
+
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Écart minimal toléré autour de la moyenne (secondes), pour les latences très faibles
+MIN_LATENCY_BAND = 0.05
+
+# Lignes brutes sous forme de runs d'un échantillon
+RAW_SAMPLES_QUERY = """
+    SELECT service_name, timestamp AS started_at, timestamp AS ended_at, 1 AS count,
+           is_healthy, status_code, error,
+           response_time AS rt_min, response_time AS rt_max,
+           response_time AS rt_sum, response_time * response_time AS rt_sumsq
+    FROM checks
+"""
+
+# Lignes brutes et runs sous une même forme
+SAMPLES_QUERY = RAW_SAMPLES_QUERY + """
+    UNION ALL
+    SELECT service_name, started_at, ended_at, count,
+           is_healthy, status_code, error,
+           rt_min, rt_max, rt_sum, rt_sumsq
+    FROM check_runs
+"""
+
+
+def create_tables(cursor: sqlite3.Cursor):
+    """Créer la table des runs et la vue `check_samples`"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS check_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service_name TEXT NOT NULL,
+            started_at DATETIME NOT NULL,
+            ended_at DATETIME NOT NULL,
+            count INTEGER NOT NULL,
+            is_healthy BOOLEAN NOT NULL,
+            status_code INTEGER,
+            error TEXT,
+            rt_min REAL NOT NULL,
+            rt_max REAL NOT NULL,
+            rt_sum REAL NOT NULL,
+            rt_sumsq REAL NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_check_runs_service_end
+        ON check_runs(service_name, ended_at DESC)
+    """)
+    
+    cursor.execute(f"CREATE VIEW IF NOT EXISTS check_samples AS {SAMPLES_QUERY}")
+
+
+class Run:
+    """Run ouvert d'un service (état de référence et agrégats en mémoire)"""
+    
+    def __init__(self, service_name: str, key: tuple, response_time: float):
+        self.service_name = service_name
+        self.key = key  # (is_healthy, status_code, error)
+        
+        # Référence de latence: ligne brute d'ouverture + échantillons du run
+        self.ref_sum = response_time
+        self.ref_count = 1
+        
+        self.id: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+        self.ended_at: Optional[datetime] = None
+        self.count = 0
+        self.rt_min = self.rt_max = response_time
+        self.rt_sum = self.rt_sumsq = 0.0
+        self.dirty = False
+    
+    def in_band(self, response_time: float, band: float) -> bool:
+        """Le temps de réponse reste-t-il dans la bande autour de la moyenne ?"""
+        mean = self.ref_sum / self.ref_count
+        return abs(response_time - mean) <= max(mean * band, MIN_LATENCY_BAND)
+    
+    def add(self, timestamp: datetime, response_time: float):
+        if self.count == 0:
+            self.started_at = timestamp
+            self.rt_min = self.rt_max = response_time
+        self.ended_at = timestamp
+        self.count += 1
+        self.rt_min = min(self.rt_min, response_time)
+        self.rt_max = max(self.rt_max, response_time)
+        self.rt_sum += response_time
+        self.rt_sumsq += response_time * response_time
+        self.ref_sum += response_time
+        self.ref_count += 1
+        self.dirty = True
+
+
+class RunLengthEncoder:
+    """Regroupement des vérifications stables en runs"""
+    
+    def __init__(self, latency_band: float = 0.5, flush_interval: float = 900):
+        """
+        Args:
+            latency_band: Écart relatif toléré autour de la latence moyenne du run
+            flush_interval: Intervalle d'écriture des runs ouverts (secondes)
+        """
+        self.latency_band = latency_band
+        self.flush_interval = flush_interval
+        self.runs: Dict[str, Run] = {}
+        self._last_flush = time.monotonic()
+    
+    def add(self, cursor: sqlite3.Cursor, service_name: str, timestamp: datetime,
+            is_healthy: bool, response_time: float, status_code: Optional[int],
+            error: Optional[str]) -> bool:
+        """
+        Enregistrer une vérification
+        
+        Returns:
+            True si une ligne brute a été écrite dans `checks`
+        """
+        key = (bool(is_healthy), status_code, error)
+        run = self.runs.get(service_name)
+        
+        if run and run.key == key and run.in_band(response_time, self.latency_band):
+            run.add(timestamp, response_time)
+            if run.id is None:
+                self._insert(cursor, run)
+            elif time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush(cursor)
+            return False
+        
+        # Changement d'état ou de latence: clore le run et écrire la ligne complète
+        if run:
+            self._update(cursor, run)
+        
+        cursor.execute("""
+            INSERT INTO checks (service_name, timestamp, is_healthy, response_time, status_code, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (service_name, timestamp, is_healthy, response_time, status_code, error))
+        
+        self.runs[service_name] = Run(service_name, key, response_time)
+        return True
+    
+    def _insert(self, cursor: sqlite3.Cursor, run: Run):
+        is_healthy, status_code, error = run.key
+        cursor.execute("""
+            INSERT INTO check_runs (service_name, started_at, ended_at, count,
+                                    is_healthy, status_code, error,
+                                    rt_min, rt_max, rt_sum, rt_sumsq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            run.service_name, run.started_at, run.ended_at, run.count,
+            is_healthy, status_code, error,
+            run.rt_min, run.rt_max, run.rt_sum, run.rt_sumsq
+        ))
+        run.id = cursor.lastrowid
+        run.dirty = False
+    
+    def _update(self, cursor: sqlite3.Cursor, run: Run):
+        if run.id is None or not run.dirty:
+            return
+        cursor.execute("""
+            UPDATE check_runs
+            SET ended_at = ?, count = ?, rt_min = ?, rt_max = ?, rt_sum = ?, rt_sumsq = ?
+            WHERE id = ?
+        """, (run.ended_at, run.count, run.rt_min, run.rt_max,
+              run.rt_sum, run.rt_sumsq, run.id))
+        run.dirty = False
+    
+    def flush(self, cursor: sqlite3.Cursor):
+        """Écrire les compteurs des runs ouverts"""
+        for run in self.runs.values():
+            self._update(cursor, run)
+        self._last_flush = time.monotonic()
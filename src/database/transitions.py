@@ -0,0 +1,140 @@
+"""
+State Transitions
+Uptime pondéré par le temps et chronologie des incidents
+
+La table `state_transitions` ne reçoit une ligne que lorsqu'un service
+change d'état. Chaque transition ouvre un intervalle qui dure jusqu'à la
+suivante (ou jusqu'à maintenant): uptime, incidents, MTTR et MTBF se
+calculent en fusionnant ces intervalles, en O(transitions) et non plus
+en O(vérifications). L'uptime ne dépend donc plus de l'intervalle de
+vérification ni des échantillons manquants.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Intervalle d'état: (début, fin ou None si en cours, sain ?, erreur)
+Interval = Tuple[datetime, Optional[datetime], bool, Optional[str]]
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def load_intervals(conn: sqlite3.Connection, since: datetime,
+                   until: Optional[datetime] = None,
+                   service_names: Optional[Sequence[str]] = None) -> Dict[str, List[Interval]]:
+    """
+    Charger les intervalles d'état qui recouvrent la période [since, until]
+    
+    La dernière transition antérieure à `since` fixe l'état au début de la
+    période. Les transitions consécutives de même état sont fusionnées.
+    
+    Returns:
+        {service_name: [(début, fin, sain, erreur), ...]} par ordre chronologique
+    """
+    until = until or datetime.now()
+    service_filter = ""
+    service_params: List = []
+    if service_names:
+        service_filter = f" AND service_name IN ({', '.join('?' * len(service_names))})"
+        service_params = list(service_names)
+    
+    # État au début de la période (colonnes de la ligne au MAX(timestamp))
+    anchors = conn.execute(f"""
+        SELECT service_name, MAX(timestamp) as timestamp, is_healthy, error
+        FROM state_transitions
+        WHERE timestamp < ?{service_filter}
+        GROUP BY service_name
+    """, [since] + service_params).fetchall()
+    
+    changes = conn.execute(f"""
+        SELECT service_name, timestamp, is_healthy, error
+        FROM state_transitions
+        WHERE timestamp >= ? AND timestamp <= ?{service_filter}
+        ORDER BY service_name, timestamp
+    """, [since, until] + service_params).fetchall()
+    
+    points: Dict[str, List] = {}
+    for service_name, timestamp, is_healthy, error in list(anchors) + list(changes):
+        points.setdefault(service_name, []).append(
+            (_as_datetime(timestamp), bool(is_healthy), error)
+        )
+    
+    intervals: Dict[str, List[Interval]] = {}
+    for service_name, service_points in points.items():
+        service_points.sort(key=lambda point: point[0])
+        merged: List[list] = []
+        for timestamp, is_healthy, error in service_points:
+            if merged and merged[-1][2] == is_healthy:
+                continue
+            if merged:
+                merged[-1][1] = timestamp
+            merged.append([timestamp, None, is_healthy, error])
+        intervals[service_name] = [tuple(interval) for interval in merged]
+    
+    return intervals
+
+
+def _clipped(interval: Interval, since: datetime, until: datetime) -> float:
+    """Durée (secondes) d'un intervalle à l'intérieur de la période"""
+    start, end, _, _ = interval
+    start = max(start, since)
+    end = min(end or until, until)
+    return max(0.0, (end - start).total_seconds())
+
+
+def uptime(intervals: List[Interval], since: datetime, until: datetime) -> Optional[float]:
+    """Pourcentage du temps observé passé UP (None si aucun état connu)"""
+    observed = up = 0.0
+    for interval in intervals:
+        duration = _clipped(interval, since, until)
+        observed += duration
+        if interval[2]:
+            up += duration
+    return (up / observed) * 100 if observed > 0 else None
+
+
+def incidents(intervals: List[Interval], since: datetime, until: datetime) -> List[Dict]:
+    """
+    Lister les incidents (intervalles DOWN) qui recouvrent la période
+    
+    Le début et la durée sont ceux de l'incident réel, même s'il a commencé
+    avant la période. `end` vaut None pour un incident en cours.
+    """
+    result = []
+    for start, end, is_healthy, error in intervals:
+        if is_healthy:
+            continue
+        result.append({
+            'start': start,
+            'end': end,
+            'duration': ((end or until) - start).total_seconds(),
+            'ongoing': end is None,
+            'error': error,
+        })
+    return result
+
+
+def reliability(intervals: List[Interval], since: datetime, until: datetime) -> Dict:
+    """
+    Calculer uptime, temps d'arrêt, MTTR et MTBF sur la période
+    
+    MTTR: durée moyenne des incidents résolus pendant la période.
+    MTBF: temps UP de la période divisé par le nombre de pannes survenues.
+    """
+    service_incidents = incidents(intervals, since, until)
+    resolved = [i for i in service_incidents if not i['ongoing'] and i['end'] >= since]
+    failures = [i for i in service_incidents if i['start'] >= since]
+    
+    up_time = sum(_clipped(i, since, until) for i in intervals if i[2])
+    down_time = sum(_clipped(i, since, until) for i in intervals if not i[2])
+    
+    return {
+        'uptime': uptime(intervals, since, until),
+        'incidents': len(service_incidents),
+        'downtime': down_time,
+        'mttr': (sum(i['duration'] for i in resolved) / len(resolved)) if resolved else None,
+        'mtbf': (up_time / len(failures)) if failures else None,
+    }
@@ -0,0 +1,228 @@
+"""
+Logging Setup
+Journalisation non bloquante: file d'attente et thread d'écriture
+
+Les appels `logger.info(...)` ne font que déposer l'enregistrement dans une
+file (QueueHandler); un thread d'écriture (QueueListener) formate le message
+et l'exception, puis écrit sur la console et dans le fichier de logs. Les écritures disque n'ajoutent
+ainsi jamais de latence à la boucle asyncio ni aux sondes.
+
+- format texte ou JSON (une ligne JSON par enregistrement)
+- rotation par taille ou par période dans `logs/`
+- échantillonnage par logger des messages répétitifs (DEBUG/INFO):
+  {"src.checkers.homebox": 0.1} garde 1 message sur 10, les WARNING et
+  au-delà sont toujours conservés
+- les workers de sondage envoient leurs logs au même thread d'écriture
+  via une file multiprocessing
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Handlers et threads d'écriture du processus principal
+_handlers: List[logging.Handler] = []
+_listeners: List[logging.handlers.QueueListener] = []
+_settings: Dict = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.processName != 'MainProcess':
+            entry['process'] = record.processName
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text  # Formatée dans le worker
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Dépôt dans la file sans formatage (contrairement à QueueHandler.prepare)
+    
+    Dans le même processus, l'enregistrement garde ses arguments et
+    `exc_info`: le formatage a lieu dans le thread d'écriture et le
+    formateur JSON écrit l'exception dans son champ `exception`. Vers un
+    processus parent (workers), il doit être picklable: message et trace
+    sont alors résolus avant l'envoi.
+    """
+    
+    def __init__(self, log_queue, local: bool = True):
+        super().__init__(log_queue)
+        self.local = local
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if self.local:
+            return record
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Garder 1 message DEBUG/INFO sur N pour les loggers configurés"""
+    
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Args:
+            rates: Préfixe de logger -> proportion conservée (0-1)
+        """
+        super().__init__()
+        # Préfixes les plus longs d'abord: le plus spécifique l'emporte
+        self.every = sorted(
+            ((prefix, max(1, round(1 / rate)) if rate > 0 else 0) for prefix, rate in rates.items()),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        self.counters: Dict[str, int] = {}
+    
+    def _every(self, name: str) -> Optional[int]:
+        for prefix, every in self.every:
+            if name == prefix or name.startswith(prefix + '.'):
+                return every
+        return None
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        every = self._every(record.name)
+        if every is None or every == 1:
+            return True
+        if every == 0:
+            return False
+        count = self.counters.get(record.name, 0)
+        self.counters[record.name] = count + 1
+        return count % every == 0
+
+
+def _file_handler(log_file: str, rotation: str, max_bytes: int,
+                  backup_count: int, when: str) -> logging.Handler:
+    """Handler du fichier de logs selon le mode de rotation"""
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    if rotation == 'none':
+        return logging.FileHandler(log_file, encoding='utf-8')
+    raise ValueError(f"Rotation des logs inconnue: {rotation} (disponibles: size, time, none)")
+
+
+def _install_queue_handler(log_queue, level, sampling: Optional[Dict[str, float]]):
+    """Remplacer les handlers du logger racine par un dépôt dans la file"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = DeferredQueueHandler(log_queue, local=isinstance(log_queue, queue.Queue))
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def setup_logging(level: str = 'INFO', log_file: Optional[str] = 'logs/control-plane.log',
+                  json_format: bool = False, rotation: str = 'size',
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                  when: str = 'midnight', sampling: Optional[Dict[str, float]] = None):
+    """
+    Configurer la journalisation du processus principal
+    
+    Args:
+        level: Niveau minimal (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_file: Fichier de logs (None = console uniquement)
+        json_format: Écrire des lignes JSON plutôt que du texte
+        rotation: size (max_bytes), time (when) ou none
+        max_bytes: Taille maximale d'un fichier avant rotation
+        backup_count: Nombre de fichiers archivés conservés
+        when: Période de rotation (ex: midnight, H, W0)
+        sampling: Proportion conservée des DEBUG/INFO par préfixe de logger
+    """
+    stop_logging()
+    
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(_file_handler(log_file, rotation, max_bytes, backup_count, when))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: queue.Queue = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    
+    _handlers.extend(handlers)
+    _listeners.append(listener)
+    _settings.update(level=level.upper(), sampling=dict(sampling or {}))
+    _install_queue_handler(log_queue, _settings['level'], sampling)
+
+
+def worker_logging(context) -> Optional[Tuple]:
+    """
+    File de logs pour les processus workers (None si le logging n'est pas configuré)
+    
+    Args:
+        context: Contexte multiprocessing des workers
+    
+    Returns:
+        Paramètres picklables à passer à `configure_worker`
+    """
+    if not _handlers:
+        return None
+    log_queue = context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return log_queue, _settings['level'], _settings['sampling']
+
+
+def configure_worker(settings: Optional[Tuple]):
+    """Dans un worker: envoyer les logs au thread d'écriture du processus principal"""
+    if settings is None:
+        return
+    log_queue, level, sampling = settings
+    _install_queue_handler(log_queue, level, sampling)
+
+
+def stop_logging():
+    """Vider les files, arrêter les threads d'écriture et fermer les fichiers"""
+    while _listeners:
+        _listeners.pop().stop()
+    while _handlers:
+        handler = _handlers.pop()
+        handler.flush()
+        handler.close()
+    
+    # Plus de thread d'écriture: revenir au handler de dernier recours (stderr)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+
+
+atexit.register(stop_logging)
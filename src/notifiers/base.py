@@ -0,0 +1,42 @@
+"""
+Notifier Base
+Interface commune des backends de notification
+
+Chaque backend reçoit une gravité et un message HTML (format Telegram).
+Les backends qui ne gèrent pas le HTML utilisent `plain_text()`.
+"""
+
+import html
+import re
+
+# Gravités, de la plus à la moins urgente
+SEVERITIES = ('alert', 'warning', 'success', 'info')
+
+_TAG = re.compile(r'<[^>]+>')
+
+
+def plain_text(message: str) -> str:
+    """Retirer les balises HTML d'un message (backends texte)"""
+    return html.unescape(_TAG.sub('', message))
+
+
+class Notifier:
+    """Interface d'un backend de notification"""
+    
+    name = "notifier"
+    
+    async def send(self, severity: str, message: str) -> bool:
+        """
+        Envoyer un message
+        
+        Args:
+            severity: Gravité (alert, warning, success, info)
+            message: Message HTML
+        
+        Returns:
+            True si le message a été accepté par le service distant
+        """
+        raise NotImplementedError
+    
+    async def close(self):
+        """Libérer les ressources du backend"""
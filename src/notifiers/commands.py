@@ -0,0 +1,180 @@
+"""
+Telegram Commands
+Commandes interactives du bot Telegram (long polling getUpdates)
+
+Une connexion HTTP persistante interroge `getUpdates` en long polling.
+Seuls les messages du chat configuré (TELEGRAM_CHAT_ID) sont traités, et
+le nombre de commandes est limité (seau à jetons). Les commandes en
+attente au démarrage sont ignorées: un ancien /check n'est pas rejoué.
+
+Chaque commande est exécutée dans sa propre tâche: une commande lente
+(ex: /check) ne retarde ni la réception des suivantes ni le monitoring.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Gestionnaire de commande: arguments -> réponse (HTML Telegram)
+CommandHandler = Callable[[List[str]], Awaitable[str]]
+
+
+class RateLimiter:
+    """Seau à jetons: `rate` commandes par `per` secondes, en rafale au plus `rate`"""
+    
+    def __init__(self, rate: int, per: float = 60.0):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+    
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class TelegramCommandBot:
+    """Réception et traitement des commandes Telegram"""
+    
+    def __init__(self, token: str, chat_id: str, handlers: Dict[str, CommandHandler],
+                 commands_per_minute: int = 10, poll_timeout: int = 30,
+                 base_url: Optional[str] = None):
+        """
+        Args:
+            token: Token du bot
+            chat_id: Seul chat autorisé à envoyer des commandes
+            handlers: {commande (sans /): gestionnaire}
+            commands_per_minute: Nombre de commandes acceptées par minute
+            poll_timeout: Durée du long polling (secondes)
+            base_url: URL de l'API (défaut: api.telegram.org)
+        """
+        self.chat_id = str(chat_id)
+        self.handlers = handlers
+        self.poll_timeout = poll_timeout
+        self.base_url = base_url or f"https://api.telegram.org/bot{token}"
+        self.limiter = RateLimiter(commands_per_minute)
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._commands: Set[asyncio.Task] = set()
+        self._limited_notice = False
+    
+    async def start(self):
+        # Connexion persistante; le délai couvre la durée du long polling
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.poll_timeout + 15)
+        )
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"🤖 Commandes Telegram actives ({', '.join('/' + c for c in self.handlers)})")
+    
+    async def stop(self):
+        for task in [self._task, *self._commands]:
+            if task:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in [self._task, *self._commands] if t), return_exceptions=True
+        )
+        self._task = None
+        self._commands.clear()
+        if self._session:
+            await self._session.close()
+            self._session = None
+    
+    async def _get_updates(self, offset: Optional[int], timeout: int) -> List[Dict]:
+        params = {'timeout': timeout, 'allowed_updates': '["message"]'}
+        if offset is not None:
+            params['offset'] = offset
+        async with self._session.get(f"{self.base_url}/getUpdates", params=params) as response:
+            data = await response.json(content_type=None)
+            if response.status != 200 or not data.get('ok'):
+                raise RuntimeError(f"getUpdates: {response.status} - {data.get('description')}")
+            return data.get('result', [])
+    
+    async def _run(self):
+        offset = None
+        backoff = 1
+        
+        while True:
+            try:
+                if offset is None:
+                    # Ignorer les commandes reçues pendant l'arrêt
+                    pending = await self._get_updates(-1, 0)
+                    offset = pending[-1]['update_id'] + 1 if pending else 0
+                
+                for update in await self._get_updates(offset, self.poll_timeout):
+                    offset = update['update_id'] + 1
+                    self._dispatch(update)
+                backoff = 1
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Réception des commandes Telegram: {e} (nouvel essai dans {backoff}s)")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+    
+    def _dispatch(self, update: Dict):
+        message = update.get('message') or {}
+        chat_id = str((message.get('chat') or {}).get('id'))
+        text = (message.get('text') or '').strip()
+        
+        if not text.startswith('/'):
+            return
+        if chat_id != self.chat_id:
+            logger.warning(f"🚫 Commande ignorée depuis un chat non autorisé ({chat_id})")
+            return
+        
+        if not self.limiter.allow():
+            # Un seul avertissement par rafale refusée
+            if not self._limited_notice:
+                self._limited_notice = True
+                self._spawn(self.reply("⏳ Trop de commandes, réessayez dans un instant."))
+            return
+        self._limited_notice = False
+        
+        command, *args = text.split()
+        command = command[1:].split('@', 1)[0].lower()
+        logger.info(f"🤖 Commande reçue: /{command} {' '.join(args)}".rstrip())
+        self._spawn(self._execute(command, args))
+    
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._commands.add(task)
+        task.add_done_callback(self._commands.discard)
+    
+    async def _execute(self, command: str, args: List[str]):
+        handler = self.handlers.get(command)
+        if handler is None:
+            await self.reply(
+                "Commandes disponibles: " + ", ".join(f"/{name}" for name in self.handlers)
+            )
+            return
+        try:
+            reply = await handler(args)
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la commande /{command}: {e}")
+            reply = f"❌ Erreur lors de la commande /{command}: {e}"
+        await self.reply(reply)
+    
+    async def reply(self, text: str) -> bool:
+        """Répondre dans le chat autorisé (connexion persistante)"""
+        try:
+            payload = {'chat_id': self.chat_id, 'text': text, 'parse_mode': 'HTML'}
+            async with self._session.post(f"{self.base_url}/sendMessage", json=payload) as response:
+                if response.status != 200:
+                    logger.error(f"Erreur lors de la réponse Telegram: {response.status} - {await response.text()}")
+                    return False
+                return True
+        except Exception as e:
+            logger.error(f"Exception lors de la réponse Telegram: {e}")
+            return False
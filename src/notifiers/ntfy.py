@@ -0,0 +1,66 @@
+"""
+Ntfy Notifier
+Notifications push via un serveur ntfy (https://ntfy.sh ou auto-hébergé)
+"""
+
+import logging
+from typing import Optional
+
+import aiohttp
+
+from src.notifiers.base import Notifier, plain_text
+
+logger = logging.getLogger(__name__)
+
+# Gravité -> (titre, priorité ntfy, tag)
+SEVERITY_HEADERS = {
+    'alert': ("Alerte", "urgent", "rotating_light"),
+    'warning': ("Avertissement", "high", "warning"),
+    'success': ("Retour à la normale", "default", "white_check_mark"),
+    'info': ("Information", "low", "information_source"),
+}
+
+
+class NtfyNotifier(Notifier):
+    """Publication d'un message texte sur un topic ntfy"""
+    
+    name = "ntfy"
+    
+    def __init__(self, url: str, token: Optional[str] = None,
+                 title: str = "Homebox Control Plane"):
+        """
+        Args:
+            url: URL du topic (ex: https://ntfy.sh/mon-topic)
+            token: Jeton d'accès (optionnel)
+            title: Préfixe du titre des notifications
+        """
+        self.url = url
+        self.token = token
+        self.title = title
+        self._session: Optional[aiohttp.ClientSession] = None
+        logger.info(f"Ntfy notifier initialisé ({url})")
+    
+    async def send(self, severity: str, message: str) -> bool:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        
+        title, priority, tag = SEVERITY_HEADERS[severity]
+        headers = {
+            'Title': f"{self.title} - {title}",
+            'Priority': priority,
+            'Tags': tag,
+        }
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        
+        async with self._session.post(self.url, data=plain_text(message).encode('utf-8'),
+                                      headers=headers) as response:
+            if response.status == 200:
+                return True
+            logger.error(f"Erreur ntfy {self.url}: {response.status} - {(await response.text())[:200]}")
+            return False
+    
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
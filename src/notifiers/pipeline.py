@@ -0,0 +1,300 @@
+"""
+Notifier Pipeline
+Diffusion des notifications vers plusieurs backends en parallèle
+
+Chaque backend a sa propre file bornée et sa propre tâche d'envoi, un
+timeout par envoi et un disjoncteur (circuit breaker):
+- l'appelant ne fait que déposer le message dans les files: un backend
+  lent ou en panne ne retarde ni les autres ni la boucle de vérification
+- un message en échec reste en tête de file et est renvoyé jusqu'à ce
+  qu'il passe: rien n'est perdu pendant une panne courte
+- après `failure_threshold` échecs consécutifs, le disjoncteur s'ouvre et
+  les messages attendent dans la file; le message de tête est retenté
+  (semi-ouvert) après `reset_timeout` secondes
+- si la file déborde, le message le plus ancien (celui en cours d'essai
+  compris) est écarté et compté dans `dropped`
+- le routage se fait par gravité (champ `severities` de chaque backend)
+
+Backends disponibles (clé `type` de la configuration `notifiers`):
+telegram, webhook, smtp, ntfy
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.notifiers.base import SEVERITIES, Notifier
+from src.notifiers.ntfy import NtfyNotifier
+from src.notifiers.smtp import SmtpNotifier
+from src.notifiers.telegram import TelegramNotifier
+from src.notifiers.webhook import WebhookNotifier
+
+logger = logging.getLogger(__name__)
+
+# Attente entre deux essais d'un message tant que le disjoncteur est fermé (secondes)
+RETRY_DELAY = 1.0
+
+
+class CircuitBreaker:
+    """Disjoncteur: fermé (envois), ouvert (pause), semi-ouvert (un essai)"""
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60):
+        """
+        Args:
+            failure_threshold: Échecs consécutifs avant ouverture
+            reset_timeout: Durée d'ouverture avant un nouvel essai (secondes)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+    
+    def retry_in(self) -> float:
+        """Secondes avant le prochain envoi autorisé (0 = maintenant)"""
+        if self.state != 'open':
+            return 0.0
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        if remaining <= 0:
+            self.state = 'half-open'
+            return 0.0
+        return remaining
+    
+    def record_success(self):
+        self.failures = 0
+        self.state = 'closed'
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half-open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+
+class Backend:
+    """Backend de notification avec sa file, son disjoncteur et ses gravités"""
+    
+    def __init__(self, notifier: Notifier, severities: Iterable[str],
+                 queue_size: int, timeout: float, breaker: CircuitBreaker):
+        self.notifier = notifier
+        self.severities = set(severities)
+        self.timeout = timeout
+        self.breaker = breaker
+        self.queue_size = queue_size
+        # Bornée par `enqueue` (message de tête en cours d'essai compris)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        
+        # Message de tête en échec, renvoyé jusqu'à ce qu'il passe
+        self.retrying = False
+        self.evicted = False
+    
+    def pending(self) -> int:
+        """Messages non encore livrés (file + message de tête en échec)"""
+        return self.queue.qsize() + (1 if self.retrying and not self.evicted else 0)
+    
+    def enqueue(self, severity: str, message: str):
+        if self.pending() >= self.queue_size:
+            # Garder les messages les plus récents
+            if self.retrying and not self.evicted:
+                self.evicted = True
+            else:
+                self.queue.get_nowait()
+                self.queue.task_done()
+            self.dropped += 1
+            logger.warning(f"📭 {self.notifier.name}: file pleine, message le plus ancien écarté")
+        self.queue.put_nowait((severity, message))
+    
+    async def _send(self, severity: str, message: str) -> bool:
+        """Un essai d'envoi, enregistré par le disjoncteur"""
+        name = self.notifier.name
+        try:
+            sent = await asyncio.wait_for(self.notifier.send(severity, message), self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ {name}: pas de réponse après {self.timeout}s")
+            sent = False
+        except Exception as e:
+            logger.error(f"❌ {name}: {e}")
+            sent = False
+        
+        was_open = self.breaker.state != 'closed'
+        if sent:
+            self.breaker.record_success()
+            if was_open:
+                logger.info(f"🔌 {name}: disjoncteur refermé")
+        else:
+            self.breaker.record_failure()
+            if self.breaker.state == 'open':
+                logger.warning(
+                    f"🔌 {name}: disjoncteur ouvert, nouvel essai dans "
+                    f"{self.breaker.reset_timeout:.0f}s"
+                )
+        return sent
+    
+    async def run(self):
+        while True:
+            severity, message = await self.queue.get()
+            self.evicted = False
+            try:
+                # Le message reste en tête jusqu'à son envoi (ou son éviction)
+                while True:
+                    delay = self.breaker.retry_in()
+                    if delay:
+                        await asyncio.sleep(delay)
+                        self.breaker.retry_in()
+                    elif self.retrying and self.breaker.state == 'closed':
+                        await asyncio.sleep(RETRY_DELAY)
+                    if self.evicted:
+                        break
+                    if await self._send(severity, message):
+                        if self.evicted:
+                            self.dropped -= 1  # Livré pendant son éviction
+                        break
+                    self.retrying = True
+            finally:
+                self.retrying = False
+                self.queue.task_done()
+
+
+class NotifierPipeline:
+    """Diffusion non bloquante vers plusieurs backends (interface TelegramNotifier)"""
+    
+    def __init__(self, queue_size: int = 100, timeout: float = 10,
+                 failure_threshold: int = 3, reset_timeout: float = 60):
+        """
+        Args:
+            queue_size: Messages en attente par backend
+            timeout: Timeout d'un envoi (secondes)
+            failure_threshold: Échecs consécutifs avant ouverture du disjoncteur
+            reset_timeout: Durée d'ouverture du disjoncteur (secondes)
+        """
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.backends: List[Backend] = []
+    
+    def add(self, notifier: Notifier, severities: Iterable[str] = SEVERITIES):
+        """Ajouter un backend pour les gravités données"""
+        unknown = set(severities) - set(SEVERITIES)
+        if unknown:
+            raise ValueError(
+                f"Gravité inconnue pour {notifier.name}: {', '.join(sorted(unknown))} "
+                f"(disponibles: {', '.join(SEVERITIES)})"
+            )
+        self.backends.append(Backend(
+            notifier, severities, self.queue_size, self.timeout,
+            CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        ))
+    
+    async def send(self, severity: str, message: str) -> bool:
+        """
+        Déposer un message dans la file des backends concernés (sans attente)
+        
+        Returns:
+            True si au moins un backend est concerné
+        """
+        routed = False
+        for backend in self.backends:
+            if severity not in backend.severities:
+                continue
+            if backend.task is None:
+                backend.task = asyncio.create_task(backend.run())
+            backend.enqueue(severity, message)
+            routed = True
+        return routed
+    
+    async def send_alert(self, message: str) -> bool:
+        return await self.send('alert', message)
+    
+    async def send_warning(self, message: str) -> bool:
+        return await self.send('warning', message)
+    
+    async def send_success(self, message: str) -> bool:
+        return await self.send('success', message)
+    
+    async def send_info(self, message: str) -> bool:
+        return await self.send('info', message)
+    
+    async def close(self, timeout: float = 10):
+        """Laisser `timeout` secondes aux files pour se vider, puis arrêter les backends"""
+        pending = [b.queue.join() for b in self.backends if b.task]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                for backend in self.backends:
+                    lost = backend.pending()
+                    if lost:
+                        backend.dropped += lost
+                        logger.warning(
+                            f"📭 {backend.notifier.name}: {lost} notification(s) non envoyée(s) "
+                            f"à l'arrêt (délai de {timeout}s dépassé)"
+                        )
+        
+        for backend in self.backends:
+            if backend.task:
+                backend.task.cancel()
+                try:
+                    await backend.task
+                except asyncio.CancelledError:
+                    pass
+                backend.task = None
+            await backend.notifier.close()
+
+
+# Backends disponibles (clé = `type` dans la configuration `notifiers`)
+NOTIFIERS: Dict[str, Callable[..., Notifier]] = {
+    'telegram': TelegramNotifier,
+    'webhook': WebhookNotifier,
+    'smtp': SmtpNotifier,
+    'ntfy': NtfyNotifier,
+}
+
+
+# Part du timeout d'envoi accordée à un envoi SMTP: le thread bloquant se
+# termine avant que le pipeline n'abandonne et ne retente l'envoi
+SMTP_TIMEOUT_SHARE = 0.8
+
+
+def create_notifier(spec: Dict, config) -> Notifier:
+    """Instancier un backend depuis sa configuration ({type, options...})"""
+    kind = spec.get('type')
+    try:
+        notifier_class = NOTIFIERS[kind]
+    except KeyError:
+        raise ValueError(
+            f"Notifier inconnu: {kind} (disponibles: {', '.join(sorted(NOTIFIERS))})"
+        )
+    
+    options = {k: v for k, v in spec.items() if k not in ('type', 'name', 'severities')}
+    if kind == 'telegram':
+        options.setdefault('token', config.telegram_bot_token)
+        options.setdefault('chat_id', config.telegram_chat_id)
+    elif kind == 'smtp':
+        options.setdefault('password', os.getenv('SMTP_PASSWORD'))
+        options['timeout'] = min(
+            float(options.get('timeout', config.notifier_timeout)),
+            config.notifier_timeout * SMTP_TIMEOUT_SHARE
+        )
+    
+    notifier = notifier_class(**options)
+    if spec.get('name'):
+        notifier.name = spec['name']
+    return notifier
+
+
+def build_pipeline(config) -> NotifierPipeline:
+    """Construire le pipeline de notifications depuis la configuration"""
+    pipeline = NotifierPipeline(
+        queue_size=config.notifier_queue_size,
+        timeout=config.notifier_timeout,
+        failure_threshold=config.notifier_failure_threshold,
+        reset_timeout=config.notifier_reset_timeout
+    )
+    for spec in config.notifiers:
+        pipeline.add(create_notifier(spec, config), spec.get('severities', SEVERITIES))
+    return pipeline
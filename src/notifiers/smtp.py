@@ -0,0 +1,98 @@
+"""
+SMTP Notifier
+Notifications par email (SMTP)
+
+smtplib est bloquant: chaque envoi est exécuté dans un thread pour ne pas
+bloquer la boucle asyncio. Le thread ne peut pas être interrompu: l'envoi
+entier (connexion, TLS, login, DATA) tient dans `timeout` secondes, sous le
+timeout du pipeline, pour qu'un nouvel essai ne double jamais un email
+encore en cours d'envoi.
+"""
+
+import asyncio
+import logging
+import smtplib
+import time
+from email.message import EmailMessage
+from typing import List, Optional, Union
+
+from src.notifiers.base import Notifier, plain_text
+
+logger = logging.getLogger(__name__)
+
+SUBJECTS = {
+    'alert': "ALERTE",
+    'warning': "Avertissement",
+    'success': "Retour à la normale",
+    'info': "Information",
+}
+
+
+class SmtpNotifier(Notifier):
+    """Envoi d'un email texte par notification"""
+    
+    name = "smtp"
+    
+    def __init__(self, host: str, sender: str, recipients: Union[str, List[str]],
+                 port: int = 587, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = True,
+                 ssl: bool = False, timeout: float = 10):
+        """
+        Args:
+            host: Serveur SMTP
+            sender: Adresse d'expédition
+            recipients: Destinataire(s)
+            port: Port SMTP (587 STARTTLS, 465 SSL, 25 en clair)
+            username: Identifiant SMTP (optionnel)
+            password: Mot de passe SMTP (optionnel, ex: variable SMTP_PASSWORD)
+            starttls: Passer en TLS après connexion (ignoré si ssl)
+            ssl: Connexion TLS implicite (SMTP_SSL)
+            timeout: Durée maximale d'un envoi, connexion comprise (secondes)
+        """
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = [recipients] if isinstance(recipients, str) else list(recipients)
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.ssl = ssl
+        self.timeout = timeout
+        logger.info(f"SMTP notifier initialisé ({host}:{port} -> {', '.join(self.recipients)})")
+    
+    def _remaining(self, deadline: float) -> float:
+        """Temps restant pour l'envoi (TimeoutError si dépassé)"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"SMTP: envoi non terminé après {self.timeout}s")
+        return remaining
+    
+    def _send_sync(self, severity: str, message: str, deadline: float):
+        email = EmailMessage()
+        email['Subject'] = f"[Control Plane] {SUBJECTS[severity]}"
+        email['From'] = self.sender
+        email['To'] = ", ".join(self.recipients)
+        email.set_content(plain_text(message))
+        
+        smtp_class = smtplib.SMTP_SSL if self.ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self._remaining(deadline))
+        try:
+            # Chaque étape ne dispose que du temps restant
+            if self.starttls and not self.ssl:
+                smtp.sock.settimeout(self._remaining(deadline))
+                smtp.starttls()
+            if self.username:
+                smtp.sock.settimeout(self._remaining(deadline))
+                smtp.login(self.username, self.password or "")
+            smtp.sock.settimeout(self._remaining(deadline))
+            smtp.send_message(email)
+        finally:
+            # Sans QUIT: une erreur après l'acceptation de l'email provoquerait un renvoi
+            smtp.close()
+    
+    async def send(self, severity: str, message: str) -> bool:
+        # Échéance fixée avant la mise en file du thread
+        deadline = time.monotonic() + self.timeout
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._send_sync, severity, message, deadline)
+        return True
@@ -7,16 +7,26 @@ import aiohttp
 import logging
 from typing import Optional
 
+from src.notifiers.base import Notifier
+
 logger = logging.getLogger(__name__)
 
 
-class TelegramNotifier:
+class TelegramNotifier(Notifier):
     """Gestionnaire des notifications Telegram"""
     
-    def __init__(self, token: str, chat_id: str):
+    name = "telegram"
+    
+    def __init__(self, token: str, chat_id: str, base_url: Optional[str] = None):
+        """
+        Args:
+            token: Token du bot
+            chat_id: Chat destinataire
+            base_url: URL de l'API (défaut: api.telegram.org, surchargeable pour les tests)
+        """
         self.token = token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.base_url = base_url or f"https://api.telegram.org/bot{token}"
         
         logger.info(f"Telegram notifier initialisé (chat_id: {chat_id})")
     
@@ -54,6 +64,16 @@ class TelegramNotifier:
             logger.error(f"Exception lors de l'envoi du message Telegram: {e}")
             return False
     
+    async def send(self, severity: str, message: str) -> bool:
+        """Envoyer un message selon sa gravité (interface Notifier)"""
+        senders = {
+            'alert': self.send_alert,
+            'warning': self.send_warning,
+            'success': self.send_success,
+            'info': self.send_info,
+        }
+        return await senders[severity](message)
+    
     async def send_alert(self, message: str) -> bool:
         """
         Envoyer une alerte critique (rouge)
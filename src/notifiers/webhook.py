@@ -0,0 +1,52 @@
+"""
+Webhook Notifier
+Envoie les notifications en JSON vers une URL HTTP générique
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import aiohttp
+
+from src.notifiers.base import Notifier, plain_text
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookNotifier(Notifier):
+    """POST JSON {severity, message, html, timestamp} vers une URL"""
+    
+    name = "webhook"
+    
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            url: URL appelée pour chaque notification
+            headers: En-têtes HTTP additionnels (ex: Authorization)
+        """
+        self.url = url
+        self.headers = dict(headers or {})
+        self._session: Optional[aiohttp.ClientSession] = None
+        logger.info(f"Webhook notifier initialisé ({url})")
+    
+    async def send(self, severity: str, message: str) -> bool:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers=self.headers)
+        
+        payload = {
+            'severity': severity,
+            'message': plain_text(message),
+            'html': message,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        }
+        async with self._session.post(self.url, json=payload) as response:
+            if 200 <= response.status < 300:
+                return True
+            logger.error(f"Erreur webhook {self.url}: {response.status} - {(await response.text())[:200]}")
+            return False
+    
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
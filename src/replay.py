@@ -0,0 +1,321 @@
+"""
+History Replay
+Rejouer l'historique dans la logique d'alerte: python app.py replay
+
+Les vérifications de `data/history.db` (lignes brutes et runs du stockage
+rle) sont relues dans l'ordre chronologique et passées à `handle_result`,
+puis au pipeline de notifications. Les notifications sont capturées au lieu
+d'être envoyées: on mesure l'effet d'un changement de seuil ou de logique
+d'alerte sans l'essayer en production.
+
+Comme en production, seul le résultat d'un groupe de plusieurs services
+(config/homebox.json, config/neron.json) est rejoué: les lignes de ses
+membres sont ignorées, sauf s'ils sont demandés avec `--service`.
+
+Une horloge virtuelle suit les horodatages de l'historique; `--speed N`
+rejoue N secondes d'historique par seconde réelle (0 = sans attente, des
+semaines d'historique en quelques secondes). La base est ouverte en lecture
+seule.
+
+Rapport: nombre de notifications par gravité, incidents détectés ou
+manqués, délai de détection (début de l'incident -> alerte) et débit.
+
+Exemples:
+  python app.py replay --from 7d
+  python app.py replay --from 2026-02-01 --to 2026-02-15 --service Homebox
+  MAX_RESPONSE_TIME=2 python app.py replay --from 30d --dump alerts.ndjson
+  python app.py replay --from 24h --speed 3600
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.database.cli import parse_time, samples_source, stream_rows
+from src.notifiers.base import SEVERITIES, Notifier
+from src.notifiers.pipeline import NotifierPipeline
+
+logger = logging.getLogger(__name__)
+
+REPLAY_QUERY = """
+    SELECT service_name, started_at, ended_at, count, is_healthy,
+           status_code, error, rt_sum
+    FROM {source}
+    WHERE ended_at > ? AND started_at <= ?{services}
+    ORDER BY started_at
+"""
+
+
+class VirtualClock:
+    """Horloge virtuelle alignée sur les horodatages rejoués"""
+    
+    def __init__(self, speed: float = 0):
+        """
+        Args:
+            speed: Secondes d'historique par seconde réelle (0 = sans attente)
+        """
+        self.speed = speed
+        self.current: Optional[datetime] = None
+    
+    def now(self) -> Optional[datetime]:
+        return self.current
+    
+    async def advance(self, timestamp: datetime):
+        """Avancer jusqu'à `timestamp` (en attendant selon la vitesse)"""
+        if self.current is not None and self.speed > 0 and timestamp > self.current:
+            await asyncio.sleep((timestamp - self.current).total_seconds() / self.speed)
+        if self.current is None or timestamp > self.current:
+            self.current = timestamp
+
+
+class CaptureNotifier(Notifier):
+    """Backend qui conserve les notifications (heure virtuelle, service, gravité)"""
+    
+    name = "capture"
+    
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.service: Optional[str] = None  # Service du résultat en cours de traitement
+        self.captured: List[Dict] = []
+    
+    async def send(self, severity: str, message: str) -> bool:
+        self.captured.append({
+            'at': self.clock.now(),
+            'service': self.service,
+            'severity': severity,
+            'message': message,
+        })
+        return True
+
+
+def _parse_timestamp(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def replay_samples(conn: sqlite3.Connection, since: datetime, until: datetime,
+                   services: Optional[List[str]] = None,
+                   exclude: Optional[Iterable[str]] = None) -> Iterator[Tuple]:
+    """
+    Vérifications de la période, dans l'ordre chronologique
+    
+    Un run de `count` vérifications est réparti régulièrement entre son
+    début et sa fin, avec son temps de réponse moyen.
+    
+    Args:
+        services: Services à rejouer (défaut: tous)
+        exclude: Services à ignorer (membres d'un groupe)
+    
+    Yields:
+        (horodatage, service, sain, temps de réponse, code HTTP, erreur)
+    """
+    filters = ""
+    params: List = [since, until]
+    if services:
+        filters = f" AND service_name IN ({', '.join('?' * len(services))})"
+        params.extend(services)
+    exclude = sorted(exclude or [])
+    if exclude:
+        filters += f" AND service_name NOT IN ({', '.join('?' * len(exclude))})"
+        params.extend(exclude)
+    query = REPLAY_QUERY.format(source=samples_source(conn), services=filters)
+    
+    pending: List[Tuple] = []
+    sequence = itertools.count()
+    for service_name, started_at, ended_at, count, is_healthy, status_code, error, rt_sum in \
+            stream_rows(conn, query, params):
+        started_at = _parse_timestamp(started_at)
+        ended_at = _parse_timestamp(ended_at)
+        
+        # Les runs commencés plus tôt peuvent encore avoir des échantillons à émettre
+        while pending and pending[0][0] <= started_at:
+            yield heapq.heappop(pending)[2]
+        
+        step = (ended_at - started_at) / (count - 1) if count > 1 else timedelta(0)
+        response_time = rt_sum / count
+        for index in range(count):
+            timestamp = started_at + step * index
+            if since < timestamp <= until:
+                heapq.heappush(pending, (timestamp, next(sequence), (
+                    timestamp, service_name, bool(is_healthy), response_time, status_code, error
+                )))
+    
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+class ReplayStats:
+    """Incidents rejoués, notifications capturées et délais de détection"""
+    
+    def __init__(self):
+        self.samples = 0
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+        self.healthy: Dict[str, bool] = {}
+        self.open_incidents: Dict[str, Dict] = {}
+        self.incidents: List[Dict] = []
+    
+    def observe(self, timestamp: datetime, service_name: str, is_healthy: bool):
+        """Suivre les incidents de l'historique (transitions UP -> DOWN -> UP)"""
+        self.samples += 1
+        self.first = self.first or timestamp
+        self.last = timestamp
+        
+        was_healthy = self.healthy.get(service_name, True)
+        if was_healthy and not is_healthy:
+            incident = {'service': service_name, 'start': timestamp, 'end': None, 'alerted_at': None}
+            self.open_incidents[service_name] = incident
+            self.incidents.append(incident)
+        elif not was_healthy and is_healthy:
+            incident = self.open_incidents.pop(service_name, None)
+            if incident:
+                incident['end'] = timestamp
+        self.healthy[service_name] = is_healthy
+    
+    def notified(self, notification: Dict):
+        """Rattacher une alerte à l'incident en cours du service"""
+        if notification['severity'] != 'alert':
+            return
+        incident = self.open_incidents.get(notification['service'])
+        if incident and incident['alerted_at'] is None:
+            incident['alerted_at'] = notification['at']
+    
+    def report(self, captured: List[Dict], elapsed: float) -> str:
+        """Rapport texte de la simulation"""
+        span = (self.last - self.first).total_seconds() if self.samples else 0.0
+        counts = {severity: 0 for severity in SEVERITIES}
+        for notification in captured:
+            counts[notification['severity']] += 1
+        
+        detected = [i for i in self.incidents if i['alerted_at'] is not None]
+        delays = sorted((i['alerted_at'] - i['start']).total_seconds() for i in detected)
+        
+        lines = [
+            "📼 Rejeu de l'historique",
+            f"   Période: {self.first:%Y-%m-%d %H:%M} → {self.last:%Y-%m-%d %H:%M}"
+            if self.samples else "   Période: aucune vérification",
+            f"   Vérifications: {self.samples} en {elapsed:.2f}s "
+            f"({self.samples / elapsed if elapsed else 0:.0f}/s, x{span / elapsed if elapsed else 0:.0f})",
+            "   Notifications: " + ", ".join(f"{severity} {count}" for severity, count in counts.items()),
+            f"   Incidents: {len(self.incidents)}, détectés {len(detected)}, "
+            f"manqués {len(self.incidents) - len(detected)}",
+        ]
+        if delays:
+            lines.append(
+                f"   Délai de détection: moyen {sum(delays) / len(delays):.0f}s, "
+                f"médian {delays[len(delays) // 2]:.0f}s, max {delays[-1]:.0f}s"
+            )
+        
+        by_service: Dict[str, List[Dict]] = {}
+        for incident in self.incidents:
+            by_service.setdefault(incident['service'], []).append(incident)
+        for service_name, incidents in sorted(by_service.items()):
+            alerted = sum(1 for i in incidents if i['alerted_at'] is not None)
+            lines.append(f"   - {service_name}: {len(incidents)} incident(s), {alerted} alerte(s)")
+        return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python app.py replay",
+        description="Rejouer l'historique dans la logique d'alerte (notifications capturées)"
+    )
+    parser.add_argument('--db', help="Chemin de la base (défaut: database_path)")
+    parser.add_argument('--from', dest='since', type=parse_time, default=parse_time('7d'),
+                        help="Début de la période (défaut: 7d)")
+    parser.add_argument('--to', dest='until', type=parse_time,
+                        help="Fin de la période (défaut: maintenant)")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="Secondes d'historique par seconde réelle (défaut: 0 = sans attente)")
+    parser.add_argument('--service', action='append',
+                        help="Filtrer sur un service (option répétable)")
+    parser.add_argument('--dump', help="Écrire les notifications capturées (une ligne JSON chacune)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Garder les logs de chaque résultat rejoué (UP, DOWN, lenteur)")
+    return parser
+
+
+async def replay_command(argv: List[str], config) -> int:
+    """
+    Exécuter la commande `replay`
+    
+    Args:
+        argv: Arguments après `replay`
+        config: Configuration (seuils et logique d'alerte à évaluer)
+    
+    Returns:
+        Code de sortie
+    """
+    from app import ControlPlane, ServiceStatus
+    
+    args = build_parser().parse_args(argv)
+    path = Path(args.db or config.database_path)
+    if not path.exists():
+        print(f"Base d'historique introuvable: {path}", file=sys.stderr)
+        return 1
+    
+    clock = VirtualClock(args.speed)
+    capture = CaptureNotifier(clock)
+    notifier = NotifierPipeline(queue_size=1000)
+    notifier.add(capture)
+    cp = ControlPlane.for_replay(config, notifier)
+    stats = ReplayStats()
+    
+    if not args.verbose:
+        for name in (ControlPlane.__module__, 'src.checkers'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    
+    # Les membres d'un groupe ont leurs propres lignes (références de latence),
+    # mais en production seul le résultat du groupe passe par `handle_result`
+    members = ControlPlane.group_members(cp.group_checkers()) - set(args.service or [])
+    
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=10)
+    start = time.perf_counter()
+    try:
+        samples = replay_samples(conn, args.since, args.until or datetime.now(), args.service,
+                                 exclude=members)
+        for timestamp, service_name, is_healthy, response_time, status_code, error in samples:
+            await clock.advance(timestamp)
+            stats.observe(timestamp, service_name, is_healthy)
+            
+            result = ServiceStatus(
+                service_name=service_name,
+                is_healthy=is_healthy,
+                response_time=response_time,
+                status_code=status_code,
+                error=error
+            )
+            result.timestamp = timestamp
+            
+            captured = len(capture.captured)
+            capture.service = service_name
+            await cp.handle_result(result)
+            # Livrer les notifications avant le résultat suivant (heure virtuelle exacte)
+            await asyncio.gather(*[b.queue.join() for b in notifier.backends if b.task])
+            for notification in capture.captured[captured:]:
+                stats.notified(notification)
+    except sqlite3.Error as e:
+        print(f"Erreur de lecture de l'historique: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+        await notifier.close()
+    
+    print(stats.report(capture.captured, time.perf_counter() - start))
+    
+    if args.dump:
+        with open(args.dump, 'w', encoding='utf-8') as f:
+            for notification in capture.captured:
+                f.write(json.dumps(
+                    {**notification, 'at': notification['at'].isoformat()}, ensure_ascii=False
+                ) + "\n")
+        print(f"{len(capture.captured)} notification(s) écrite(s) dans {args.dump}", file=sys.stderr)
+    return 0
@@ -0,0 +1,330 @@
+"""
+Resource Sampler
+Suivi des ressources du démon sur la durée (fuites mémoire, descripteurs)
+
+Toutes les `resource_sample_interval` secondes, le Control Plane relève:
+- rss_bytes: mémoire résidente du processus principal
+- open_fds: descripteurs de fichiers ouverts (sockets, fichiers, pipes)
+- asyncio_tasks: tâches asyncio en cours
+- threads: threads Python actifs
+- sqlite_memory: mémoire allouée par SQLite (cache de pages inclus)
+- gc_objects: objets suivis par le ramasse-miettes
+- workers_rss_bytes: mémoire résidente cumulée des workers de sondage
+
+Les relevés sont enregistrés dans la table `resource_samples` de
+l'historique. Une alerte est envoyée quand une mesure dépasse de
+`resource_growth_threshold` (50 % par défaut) son minimum sur la fenêtre
+`resource_growth_window` (après 15 minutes de démarrage, et au-delà d'une
+croissance absolue minimale par mesure).
+
+Diagnostic à la demande (SIGUSR1 ou `python app.py resources --tracemalloc PID`):
+le premier signal démarre `tracemalloc`, les suivants écrivent dans `logs/`
+les allocations qui ont le plus grossi depuis le signal précédent.
+
+Exemples:
+  python app.py resources --since 7d
+  python app.py resources --since 24h --format csv
+  python app.py resources --tracemalloc $(pidof -s python3)
+"""
+
+import argparse
+import asyncio
+import ctypes
+import gc
+import logging
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from src.database.cli import parse_time, stream_rows, write_rows
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('rss_bytes', 'open_fds', 'asyncio_tasks', 'threads',
+           'sqlite_memory', 'gc_objects', 'workers_rss_bytes')
+
+# Croissance absolue minimale avant alerte (évite les alertes sur de petits nombres)
+MIN_GROWTH = {
+    'rss_bytes': 32 * 1024 * 1024,
+    'open_fds': 32,
+    'asyncio_tasks': 50,
+    'threads': 8,
+    'sqlite_memory': 16 * 1024 * 1024,
+    'gc_objects': 100_000,
+    'workers_rss_bytes': 32 * 1024 * 1024,
+}
+
+# Démarrage: caches et connexions se remplissent, pas encore une référence
+WARMUP_SECONDS = 900
+
+# Libellés des alertes et des journaux
+LABELS = {
+    'rss_bytes': 'Mémoire (RSS)',
+    'open_fds': 'Descripteurs ouverts',
+    'asyncio_tasks': 'Tâches asyncio',
+    'threads': 'Threads',
+    'sqlite_memory': 'Mémoire SQLite',
+    'gc_objects': 'Objets Python',
+    'workers_rss_bytes': 'Mémoire des workers',
+}
+
+RESOURCE_COLUMNS = [
+    ('timestamp', 26),
+    ('rss_mb', 8),
+    ('open_fds', 8),
+    ('asyncio_tasks', 13),
+    ('threads', 7),
+    ('sqlite_mb', 9),
+    ('gc_objects', 10),
+    ('workers_rss_mb', 0),
+]
+
+RESOURCES_QUERY = """
+    SELECT timestamp, ROUND(rss_bytes / 1048576.0, 1), open_fds, asyncio_tasks, threads,
+           ROUND(sqlite_memory / 1048576.0, 1), gc_objects,
+           ROUND(workers_rss_bytes / 1048576.0, 1)
+    FROM resource_samples
+    WHERE timestamp >= ? AND timestamp <= ?
+    ORDER BY timestamp
+"""
+
+_sqlite_memory_used = None
+_previous_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+def format_metric(metric: str, value: Optional[int]) -> str:
+    """Valeur lisible (Mo pour les mesures en octets)"""
+    if value is None:
+        return "n/d"
+    if metric.endswith('_bytes') or metric == 'sqlite_memory':
+        return f"{value / (1024 * 1024):.1f} Mo"
+    return str(value)
+
+
+def _rss_bytes(pid: str = 'self') -> Optional[int]:
+    """Mémoire résidente d'un processus (/proc, Linux)"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _open_fds() -> Optional[int]:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def _sqlite_memory() -> Optional[int]:
+    """Mémoire allouée par SQLite (sqlite3_memory_used, via la bibliothèque chargée)"""
+    global _sqlite_memory_used
+    if _sqlite_memory_used is None:
+        try:
+            import _sqlite3
+            function = ctypes.CDLL(_sqlite3.__file__).sqlite3_memory_used
+            function.restype = ctypes.c_int64
+            _sqlite_memory_used = function
+        except (ImportError, OSError, AttributeError):
+            _sqlite_memory_used = False
+    return _sqlite_memory_used() if _sqlite_memory_used else None
+
+
+def _asyncio_tasks() -> Optional[int]:
+    try:
+        return len(asyncio.all_tasks())
+    except RuntimeError:
+        return None  # Pas de boucle en cours
+
+
+def sample_resources(worker_pids: Iterable[int] = ()) -> Dict[str, Optional[int]]:
+    """Relever les ressources du processus (None = mesure indisponible)"""
+    workers = [_rss_bytes(str(pid)) for pid in worker_pids]
+    workers = [rss for rss in workers if rss is not None]
+    return {
+        'rss_bytes': _rss_bytes(),
+        'open_fds': _open_fds(),
+        'asyncio_tasks': _asyncio_tasks(),
+        'threads': threading.active_count(),
+        'sqlite_memory': _sqlite_memory(),
+        'gc_objects': len(gc.get_objects()),
+        'workers_rss_bytes': sum(workers) if workers else None,
+    }
+
+
+class ResourceSampler:
+    """Relevés périodiques et détection d'une croissance anormale"""
+    
+    def __init__(self, growth_threshold: float = 0.5, window_hours: float = 24,
+                 worker_pids: Optional[Callable[[], Iterable[int]]] = None):
+        """
+        Args:
+            growth_threshold: Croissance relative déclenchant l'alerte (0.5 = +50 %)
+            window_hours: Fenêtre sur laquelle le minimum de référence est pris
+            worker_pids: PID des workers de sondage à inclure (optionnel)
+        """
+        self.growth_threshold = growth_threshold
+        self.window = window_hours * 3600
+        self.worker_pids = worker_pids or (lambda: ())
+        self.started = time.monotonic()
+        self.samples: Deque[Tuple[float, Dict]] = deque()
+        self.alerted: set = set()
+    
+    def sample(self, now: Optional[float] = None) -> Tuple[Dict, List[Tuple[str, int, int]]]:
+        """
+        Relever les ressources et comparer au minimum de la fenêtre
+        
+        Returns:
+            (relevé, [(mesure, référence, valeur)] des nouvelles croissances anormales)
+        """
+        now = time.monotonic() if now is None else now
+        sample = sample_resources(self.worker_pids())
+        if now - self.started < WARMUP_SECONDS:
+            return sample, []
+        
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+        self.samples.append((now, sample))
+        
+        growth = []
+        for metric in METRICS:
+            value = sample[metric]
+            history = [s[metric] for _, s in self.samples if s[metric] is not None]
+            if value is None or not history:
+                continue
+            reference = min(history)
+            growing = (value - reference >= MIN_GROWTH[metric]
+                       and value >= reference * (1 + self.growth_threshold))
+            if growing and metric not in self.alerted:
+                self.alerted.add(metric)
+                growth.append((metric, reference, value))
+            elif not growing:
+                self.alerted.discard(metric)
+        return sample, growth
+
+
+def tracemalloc_report(frames: int = 10, top: int = 15, output_dir: str = 'logs') -> Optional[str]:
+    """
+    Diagnostic mémoire à la demande
+    
+    Premier appel: démarrer tracemalloc (instantané de référence).
+    Appels suivants: écrire les `top` allocations qui ont le plus grossi
+    depuis l'appel précédent.
+    
+    Returns:
+        Chemin du rapport écrit (None au premier appel)
+    """
+    global _previous_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        _previous_snapshot = tracemalloc.take_snapshot()
+        logger.info(f"🧠 tracemalloc démarré ({frames} frame(s)), prochain signal: diff des allocations")
+        return None
+    
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    stats = snapshot.compare_to(_previous_snapshot, 'traceback')
+    _previous_snapshot = snapshot
+    
+    current, peak = tracemalloc.get_traced_memory()
+    path = Path(output_dir) / f"tracemalloc-{datetime.now():%Y%m%d-%H%M%S}.txt"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Mémoire suivie: {current / 1024 / 1024:.1f} Mo (pic {peak / 1024 / 1024:.1f} Mo)\n\n")
+        for stat in stats[:top]:
+            f.write(f"{stat.size_diff / 1024:+.1f} Ko ({stat.count_diff:+d} blocs), "
+                    f"total {stat.size / 1024:.1f} Ko\n")
+            for line in stat.traceback.format():
+                f.write(f"    {line}\n")
+            f.write("\n")
+    
+    if stats:
+        largest = stats[0]
+        logger.info(
+            f"🧠 Diff tracemalloc écrit dans {path} (plus forte croissance: "
+            f"{largest.size_diff / 1024:+.1f} Ko, {largest.traceback[0]})"
+        )
+    return str(path)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python app.py resources",
+        description="Relevés des ressources du démon (lecture seule) et diagnostic tracemalloc"
+    )
+    parser.add_argument('--db', help="Chemin de la base (défaut: database_path)")
+    parser.add_argument('--since', type=parse_time, default=parse_time('24h'),
+                        help="Début de la période (défaut: 24h)")
+    parser.add_argument('--until', type=parse_time, help="Fin de la période (défaut: maintenant)")
+    parser.add_argument('--format', choices=['table', 'csv', 'json'], default='table',
+                        help="Format de sortie (défaut: table)")
+    parser.add_argument('--tracemalloc', type=int, metavar='PID',
+                        help="Envoyer SIGUSR1 au démon: démarrer tracemalloc ou écrire le diff")
+    return parser
+
+
+def resources_command(argv: List[str], db_path: str) -> int:
+    """
+    Exécuter la commande `resources`
+    
+    Args:
+        argv: Arguments après `resources`
+        db_path: Chemin de la base par défaut (database_path)
+    
+    Returns:
+        Code de sortie
+    """
+    args = build_parser().parse_args(argv)
+    
+    if args.tracemalloc:
+        try:
+            os.kill(args.tracemalloc, signal.SIGUSR1)
+        except (OSError, AttributeError) as e:
+            print(f"Signal impossible (pid {args.tracemalloc}): {e}", file=sys.stderr)
+            return 1
+        print(f"SIGUSR1 envoyé au pid {args.tracemalloc} (voir les logs du démon)", file=sys.stderr)
+        return 0
+    
+    path = Path(args.db or db_path)
+    if not path.exists():
+        print(f"Base d'historique introuvable: {path}", file=sys.stderr)
+        return 1
+    
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=10)
+    try:
+        rows = list(stream_rows(conn, RESOURCES_QUERY, (args.since, args.until or datetime.now())))
+        write_rows(iter(rows), RESOURCE_COLUMNS, args.format)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except sqlite3.Error as e:
+        print(f"Erreur de lecture de l'historique: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    
+    # Croissance sur la période: dernier relevé comparé au minimum
+    if rows and args.format == 'table':
+        growth = []
+        for index, (name, _) in enumerate(RESOURCE_COLUMNS[1:], start=1):
+            values = [row[index] for row in rows if row[index] is not None]
+            if values and min(values) > 0:
+                growth.append(f"{name} {(values[-1] / min(values) - 1) * 100:+.0f} %")
+        print(f"\n{len(rows)} relevé(s), croissance (dernier / minimum): {', '.join(growth)}",
+              file=sys.stderr)
+    return 0
@@ -0,0 +1,141 @@
+"""
+Report Scheduler
+Planification des rapports sur l'horloge murale (style cron)
+
+Formats acceptés (insensibles à la casse):
+- "08:00 daily"           tous les jours à 08:00
+- "monday 08:00 weekly"   chaque lundi à 08:00
+- "monday weekly"         chaque lundi à l'heure par défaut (08:00)
+- "lundi 18:30"           jour de la semaine seul: hebdomadaire
+
+Les échéances sont calculées depuis l'heure courante: elles ne dépendent ni
+de l'intervalle de vérification ni de la date de démarrage du processus.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIME = time(8, 0)
+
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'lundi': 0, 'mardi': 1, 'mercredi': 2, 'jeudi': 3,
+    'vendredi': 4, 'samedi': 5, 'dimanche': 6,
+}
+
+# Période couverte par chaque fréquence (heures)
+PERIODS = {
+    'daily': 24,
+    'weekly': 24 * 7,
+}
+
+
+class Schedule:
+    """Échéance récurrente d'un rapport"""
+    
+    def __init__(self, spec: str):
+        """
+        Args:
+            spec: Expression de planification (ex: "08:00 daily", "monday 08:00 weekly")
+        
+        Raises:
+            ValueError: Si l'expression est invalide
+        """
+        self.spec = spec
+        self.at = DEFAULT_TIME
+        self.weekday: Optional[int] = None
+        frequency = None
+        
+        for token in spec.lower().split():
+            if token in PERIODS:
+                frequency = token
+            elif token in WEEKDAYS:
+                self.weekday = WEEKDAYS[token]
+            elif ':' in token:
+                try:
+                    hour, minute = token.split(':')
+                    self.at = time(int(hour), int(minute))
+                except ValueError:
+                    raise ValueError(f"Heure invalide dans la planification '{spec}': {token}")
+            else:
+                raise ValueError(f"Planification invalide '{spec}': {token} non reconnu")
+        
+        self.frequency = frequency or ('weekly' if self.weekday is not None else 'daily')
+        if self.frequency == 'weekly' and self.weekday is None:
+            raise ValueError(f"Planification hebdomadaire sans jour: '{spec}'")
+        if self.frequency == 'daily' and self.weekday is not None:
+            raise ValueError(f"Planification quotidienne avec un jour: '{spec}'")
+    
+    @property
+    def period_hours(self) -> int:
+        """Période couverte par le rapport (heures)"""
+        return PERIODS[self.frequency]
+    
+    def next_run(self, after: datetime) -> datetime:
+        """Prochaine échéance strictement postérieure à `after`"""
+        candidate = datetime.combine(after.date(), self.at)
+        if self.weekday is not None:
+            candidate += timedelta(days=(self.weekday - candidate.weekday()) % 7)
+        step = timedelta(days=7 if self.weekday is not None else 1)
+        while candidate <= after:
+            candidate += step
+        return candidate
+    
+    def __repr__(self):
+        return f"Schedule({self.spec!r})"
+
+
+class ReportScheduler:
+    """Exécution des rapports planifiés dans une tâche asyncio"""
+    
+    def __init__(self, schedules: List[Schedule],
+                 callback: Callable[[Schedule], Awaitable[None]]):
+        """
+        Args:
+            schedules: Planifications à suivre
+            callback: Coroutine appelée à chaque échéance avec sa planification
+        """
+        self.schedules = schedules
+        self.callback = callback
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self.schedules and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            for schedule in self.schedules:
+                logger.info(
+                    f"🗓️ Rapport '{schedule.spec}': prochain envoi "
+                    f"{schedule.next_run(datetime.now()):%Y-%m-%d %H:%M}"
+                )
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        now = datetime.now()
+        due = {schedule: schedule.next_run(now) for schedule in self.schedules}
+        
+        while True:
+            schedule, when = min(due.items(), key=lambda item: item[1])
+            delay = (when - datetime.now()).total_seconds()
+            if delay > 0:
+                # Réveils bornés: suit les changements d'heure et la mise en veille
+                await asyncio.sleep(min(delay, 60))
+                continue
+            
+            try:
+                await self.callback(schedule)
+            except Exception as e:
+                logger.error(f"❌ Erreur lors du rapport planifié '{schedule.spec}': {e}")
+            due[schedule] = schedule.next_run(max(when, datetime.now()))
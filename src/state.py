@@ -0,0 +1,348 @@
+"""
+Status Snapshot
+État courant des services et agrégats horaires tenus en mémoire
+
+Le snapshot est mis à jour à chaque résultat de vérification. Il contient:
+- le dernier résultat de chaque service
+- des agrégats par heure sur 7 jours (temps UP/DOWN, incidents, réparations,
+  temps de réponse), alimentés au fil des vérifications et amorcés au
+  démarrage depuis les transitions d'état de l'historique
+
+Les rapports et les réponses aux commandes Telegram sont rendus depuis ce
+snapshot, sans nouvelle vérification ni requête SQL; les rapports sont mis
+en cache jusqu'à la prochaine mise à jour (`version`).
+"""
+
+import html
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Durée couverte par les agrégats horaires
+ROLLUP_HOURS = 24 * 7
+
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def format_duration(seconds: float) -> str:
+    """Durée lisible (ex: 45s, 12 min, 3h05, 2j 4h)"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60} min"
+    if seconds < 86400:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}"
+    return f"{seconds // 86400}j {seconds % 86400 // 3600}h"
+
+
+class HourBucket:
+    """Agrégats d'un service sur une heure"""
+    
+    __slots__ = ('hour', 'up_seconds', 'down_seconds', 'incidents',
+                 'repairs', 'repair_seconds', 'healthy_checks', 'rt_sum')
+    
+    def __init__(self, hour: datetime):
+        self.hour = hour
+        self.up_seconds = 0.0
+        self.down_seconds = 0.0
+        self.incidents = 0
+        self.repairs = 0
+        self.repair_seconds = 0.0
+        self.healthy_checks = 0
+        self.rt_sum = 0.0
+
+
+class ServiceRollup:
+    """Agrégats horaires glissants d'un service"""
+    
+    def __init__(self):
+        self.buckets: Deque[HourBucket] = deque(maxlen=ROLLUP_HOURS + 1)
+        self.last_timestamp: Optional[datetime] = None
+        self.last_healthy: Optional[bool] = None
+        self.down_since: Optional[datetime] = None
+    
+    def _bucket(self, timestamp: datetime) -> HourBucket:
+        hour = _hour(timestamp)
+        if self.buckets and self.buckets[-1].hour >= hour:
+            # Heure déjà ouverte (ou horodatage légèrement en retard)
+            for bucket in reversed(self.buckets):
+                if bucket.hour <= hour:
+                    return bucket
+            return self.buckets[0]
+        bucket = HourBucket(hour)
+        self.buckets.append(bucket)
+        return bucket
+    
+    def _add_span(self, start: datetime, end: datetime, is_healthy: bool):
+        """Répartir un intervalle d'état sur les heures qu'il couvre"""
+        end = max(start, end)
+        while start < end:
+            boundary = min(_hour(start) + timedelta(hours=1), end)
+            bucket = self._bucket(start)
+            if is_healthy:
+                bucket.up_seconds += (boundary - start).total_seconds()
+            else:
+                bucket.down_seconds += (boundary - start).total_seconds()
+            start = boundary
+    
+    def _transition(self, timestamp: datetime, is_healthy: bool):
+        if self.last_healthy is not False and not is_healthy:
+            self._bucket(timestamp).incidents += 1
+            self.down_since = timestamp
+        elif self.last_healthy is False and is_healthy and self.down_since:
+            bucket = self._bucket(timestamp)
+            bucket.repairs += 1
+            bucket.repair_seconds += (timestamp - self.down_since).total_seconds()
+            self.down_since = None
+    
+    def observe(self, timestamp: datetime, is_healthy: bool, response_time: float):
+        """Intégrer un résultat: l'état précédent couvre l'écart depuis le dernier"""
+        if self.last_timestamp and timestamp < self.last_timestamp:
+            return  # Résultat en retard: déjà couvert
+        if self.last_timestamp is not None:
+            self._add_span(self.last_timestamp, timestamp, self.last_healthy)
+        self._transition(timestamp, is_healthy)
+        
+        if is_healthy:
+            bucket = self._bucket(timestamp)
+            bucket.healthy_checks += 1
+            bucket.rt_sum += response_time
+        
+        self.last_timestamp = timestamp
+        self.last_healthy = is_healthy
+    
+    def seed(self, intervals: List[Tuple], since: datetime, until: datetime):
+        """Amorcer depuis des intervalles d'état (début, fin, sain, erreur)"""
+        for start, end, is_healthy, _ in intervals:
+            start = max(start, since)
+            if self.last_healthy is None and not is_healthy:
+                # Incident déjà en cours au début de la période
+                self.last_healthy = True
+            self._transition(start, is_healthy)
+            self._add_span(start, end or until, is_healthy)
+            self.last_healthy = is_healthy
+        if intervals:
+            self.last_timestamp = until
+    
+    def timeline(self, since: datetime, until: datetime) -> List[Optional[bool]]:
+        """État par heure: True (UP), False (DOWN au moins une partie de l'heure), None (inconnu)"""
+        buckets = {bucket.hour: bucket for bucket in self.buckets}
+        hour = _hour(since)
+        states = []
+        while hour <= until:
+            bucket = buckets.get(hour)
+            if bucket is None or bucket.up_seconds + bucket.down_seconds == 0:
+                # Heure en cours (ou sans résultat): état courant si connu
+                states.append(self.last_healthy if hour == _hour(until) else None)
+            else:
+                states.append(bucket.down_seconds == 0)
+            hour += timedelta(hours=1)
+        return states
+    
+    def stats(self, since: datetime, until: datetime) -> Dict:
+        """Uptime pondéré, incidents, MTTR et latence moyenne sur la période"""
+        up = down = repair_seconds = rt_sum = 0.0
+        incidents = repairs = healthy_checks = 0
+        first_hour = _hour(since)
+        
+        for bucket in self.buckets:
+            if bucket.hour < first_hour:
+                continue
+            up += bucket.up_seconds
+            down += bucket.down_seconds
+            incidents += bucket.incidents
+            repairs += bucket.repairs
+            repair_seconds += bucket.repair_seconds
+            healthy_checks += bucket.healthy_checks
+            rt_sum += bucket.rt_sum
+        
+        # Intervalle en cours depuis le dernier résultat
+        if self.last_timestamp and until > self.last_timestamp:
+            pending = (until - self.last_timestamp).total_seconds()
+            if self.last_healthy:
+                up += pending
+            else:
+                down += pending
+        
+        return {
+            'uptime': (up / (up + down)) * 100 if up + down > 0 else None,
+            'incidents': incidents,
+            'downtime': down,
+            'mttr': (repair_seconds / repairs) if repairs else None,
+            'avg_response_time': (rt_sum / healthy_checks) if healthy_checks else None,
+        }
+
+
+class StatusSnapshot:
+    """État courant des services, agrégats et rapports matérialisés"""
+    
+    def __init__(self):
+        self.services: Dict = {}  # service_name -> dernier ServiceStatus
+        self.since: Dict[str, datetime] = {}  # service_name -> début de l'état courant
+        self.rollups: Dict[str, ServiceRollup] = {}
+        self.version = 0
+        self.updated_at: Optional[datetime] = None
+        self._reports: Dict[int, Tuple[int, str]] = {}
+    
+    def update(self, result):
+        """Intégrer un résultat de vérification"""
+        name = result.service_name
+        rollup = self.rollups.setdefault(name, ServiceRollup())
+        if name not in self.since or rollup.last_healthy != result.is_healthy:
+            self.since[name] = result.timestamp
+        
+        self.services[name] = result
+        rollup.observe(result.timestamp, result.is_healthy, result.response_time)
+        self.version += 1
+        self.updated_at = result.timestamp
+    
+    def seed(self, intervals: Dict[str, List[Tuple]], since: datetime, until: datetime):
+        """Amorcer les agrégats depuis l'historique (intervalles d'état par service)"""
+        for name, service_intervals in intervals.items():
+            self.rollups.setdefault(name, ServiceRollup()).seed(service_intervals, since, until)
+            if service_intervals:
+                self.since.setdefault(name, service_intervals[-1][0])
+        self.version += 1
+    
+    def restore(self, name: str, result, since: Optional[datetime]):
+        """Reprendre le dernier résultat d'un service depuis le point de reprise"""
+        self.services[name] = result
+        if since:
+            self.since[name] = since
+        self.version += 1
+        if self.updated_at is None or result.timestamp > self.updated_at:
+            self.updated_at = result.timestamp
+    
+    def stats(self, hours: int = 24, now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Statistiques par service sur les `hours` dernières heures"""
+        until = now or datetime.now()
+        since = until - timedelta(hours=hours)
+        return {
+            name: rollup.stats(since, until)
+            for name, rollup in sorted(self.rollups.items())
+        }
+    
+    def find(self, name: str) -> Optional[Tuple[str, object]]:
+        """
+        Retrouver un service (ou sous-service) par nom, sans tenir compte de la casse
+        
+        Returns:
+            (nom du service suivi, dernier résultat du service demandé) ou None
+        """
+        wanted = name.strip().lower()
+        for service_name, result in self.services.items():
+            if service_name.lower() == wanted:
+                return service_name, result
+            for service_result in getattr(result, 'services', None) or []:
+                if service_result.service_name.lower() == wanted:
+                    return service_name, service_result
+        return None
+    
+    def status_text(self) -> str:
+        """État courant de chaque service (réponse à /status)"""
+        if not self.services:
+            return "Aucun résultat pour le moment."
+        now = datetime.now()
+        lines = ["📊 <b>ÉTAT ACTUEL</b>\n"]
+        for name, result in sorted(self.services.items()):
+            icon = "✅" if result.is_healthy else "🔴"
+            since = self.since.get(name)
+            duration = f" depuis {format_duration((now - since).total_seconds())}" if since else ""
+            lines.append(f"{icon} <b>{html.escape(name)}</b> {result.response_time:.2f}s{duration}")
+            for service_result in getattr(result, 'services', None) or []:
+                if not service_result.is_healthy:
+                    lines.append(
+                        f"   🔴 {html.escape(service_result.service_name)}: "
+                        f"{html.escape(service_result.error or 'DOWN')}"
+                    )
+        return "\n".join(lines)
+    
+    def uptime_text(self) -> str:
+        """Uptime 24h et 7 jours de chaque service (réponse à /uptime)"""
+        day, week = self.stats(24), self.stats(24 * 7)
+        lines = ["📈 <b>UPTIME</b> (24h / 7j)\n"]
+        for name in day:
+            if day[name]['uptime'] is None:
+                continue
+            line = f"{html.escape(name)}: {day[name]['uptime']:.2f}% / {week[name]['uptime']:.2f}%"
+            if week[name]['incidents']:
+                line += f", {week[name]['incidents']} incident(s) sur 7j"
+            lines.append(line)
+        return "\n".join(lines) if len(lines) > 1 else "Aucune donnée d'uptime pour le moment."
+    
+    def history_text(self, name: str) -> str:
+        """Chronologie 24h et statistiques d'un service (réponse à /history)"""
+        found = self.find(name)
+        if not found:
+            return f"Service inconnu: {html.escape(name)}"
+        tracked, result = found
+        now = datetime.now()
+        
+        icon = "✅" if result.is_healthy else "🔴"
+        lines = [f"{icon} <b>{html.escape(result.service_name)}</b>"]
+        if result.service_name != tracked:
+            lines.append(f"(sous-service de {html.escape(tracked)}, statistiques du groupe)")
+        if result.error:
+            lines.append(f"Erreur: {html.escape(result.error)}")
+        
+        rollup = self.rollups[tracked]
+        timeline = rollup.timeline(now - timedelta(hours=23), now)
+        bars = "".join("▇" if s else ("▁" if s is False else "·") for s in timeline)
+        lines.append(f"\n24h: <code>{bars}</code>")
+        
+        for label, hours in (("24h", 24), ("7j", 24 * 7)):
+            stats = rollup.stats(now - timedelta(hours=hours), now)
+            if stats['uptime'] is None:
+                continue
+            line = f"{label}: {stats['uptime']:.2f}% uptime, {stats['incidents']} incident(s)"
+            if stats['mttr'] is not None:
+                line += f", MTTR {format_duration(stats['mttr'])}"
+            if stats['avg_response_time'] is not None:
+                line += f", {stats['avg_response_time']:.2f}s en moyenne"
+            lines.append(line)
+        return "\n".join(lines)
+    
+    def report(self, hours: int = 24) -> str:
+        """Rapport de statut (HTML Telegram), rendu une fois par version du snapshot"""
+        cached = self._reports.get(hours)
+        if not cached or cached[0] != self.version:
+            cached = (self.version, self._render_report(hours))
+            self._reports[hours] = cached
+        return cached[1] + f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    
+    def _render_report(self, hours: int) -> str:
+        title = "RAPPORT DE STATUT" if hours <= 24 else "RAPPORT HEBDOMADAIRE"
+        report = f"📊 <b>{title}</b>\n\n"
+        
+        for result in self.services.values():
+            status_icon = "✅" if result.is_healthy else "🔴"
+            report += (
+                f"{status_icon} <b>{result.service_name}</b>\n"
+                f"   Status: {'UP' if result.is_healthy else 'DOWN'}\n"
+                f"   Réponse: {result.response_time:.2f}s\n"
+            )
+            if result.status_code:
+                report += f"   Code HTTP: {result.status_code}\n"
+            if result.error:
+                report += f"   Erreur: {result.error}\n"
+            report += "\n"
+        
+        stats = self.stats(hours)
+        lines = []
+        for service, service_stats in stats.items():
+            if service_stats['uptime'] is None:
+                continue
+            line = f"   {service}: {service_stats['uptime']:.1f}% uptime"
+            if service_stats['incidents']:
+                line += f", {service_stats['incidents']} incident(s)"
+            if service_stats['mttr'] is not None:
+                line += f", MTTR {service_stats['mttr'] / 60:.0f} min"
+            lines.append(line)
+        if lines:
+            period = f"{hours}H" if hours < 48 else f"{hours // 24}J"
+            report += f"📈 <b>STATISTIQUES {period}</b>\n\n" + "\n".join(lines) + "\n"
+        
+        return report
@@ -0,0 +1,119 @@
+"""
+Live Events
+Diffusion des résultats de vérification en Server-Sent Events (/events)
+
+Chaque abonné reçoit une file bornée. La publication ne fait que déposer
+l'événement, déjà encodé, dans la file des abonnés concernés (sans attente):
+un abonné dont la file est pleine est déconnecté au lieu de ralentir la
+boucle de vérification.
+
+Filtres (paramètres de requête, répétables):
+- service=<nom>  service ou sous-service concerné
+- tag=<tag>      tag déclaré sur un service (champ `tags` du JSON)
+"""
+
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Événements en attente par abonné avant déconnexion
+DEFAULT_QUEUE_SIZE = 100
+
+
+class Subscriber:
+    """Abonné au flux d'événements, avec sa file bornée et ses filtres"""
+    
+    def __init__(self, services: Iterable[str] = (), tags: Iterable[str] = (),
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.services: Set[str] = set(services)
+        self.tags: Set[str] = set(tags)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+    
+    def matches(self, services: Set[str], tags: Set[str]) -> bool:
+        if self.services and not self.services & services:
+            return False
+        if self.tags and not self.tags & tags:
+            return False
+        return True
+    
+    def drop(self):
+        """Déconnecter: vider la file et réveiller le lecteur"""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """Publication des événements vers les abonnés SSE"""
+    
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 service_tags: Optional[Dict[str, Set[str]]] = None):
+        """
+        Args:
+            queue_size: Événements en attente par abonné avant déconnexion
+            service_tags: Tags déclarés par service (filtre `tag`)
+        """
+        self.queue_size = queue_size
+        self.service_tags = service_tags or {}
+        self.subscribers: Set[Subscriber] = set()
+        self._next_id = 0
+    
+    def scope(self, result) -> Tuple[Set[str], Set[str]]:
+        """Services (résultat et sous-services) et tags concernés par un résultat"""
+        services = {result.service_name} | {
+            r.service_name for r in getattr(result, 'services', None) or []
+        }
+        tags = set()
+        for name in services:
+            tags |= self.service_tags.get(name, set())
+        return services, tags
+    
+    def subscribe(self, services: Iterable[str] = (), tags: Iterable[str] = ()) -> Subscriber:
+        subscriber = Subscriber(services, tags, self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+    
+    @staticmethod
+    def encode(event: str, data: Dict, event_id: Optional[int] = None) -> bytes:
+        """Encoder un événement au format SSE"""
+        message = f"event: {event}\n"
+        if event_id is not None:
+            message += f"id: {event_id}\n"
+        message += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+        return message.encode('utf-8')
+    
+    def publish(self, event: str, data: Dict, services: Iterable[str] = (),
+                tags: Iterable[str] = ()):
+        """
+        Publier un événement (sans attente)
+        
+        Args:
+            event: Type d'événement (result, transition)
+            data: Contenu JSON
+            services: Services concernés (filtre `service`)
+            tags: Tags des services concernés (filtre `tag`)
+        """
+        if not self.subscribers:
+            return
+        
+        self._next_id += 1
+        message = self.encode(event, data, self._next_id)
+        services, tags = set(services), set(tags)
+        
+        for subscriber in list(self.subscribers):
+            if not subscriber.matches(services, tags):
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"🐢 Abonné /events trop lent, déconnecté ({self.queue_size} événements en attente)")
+                self.unsubscribe(subscriber)
+                subscriber.drop()
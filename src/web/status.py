@@ -0,0 +1,228 @@
+"""
+Status Server
+Page de statut HTML et API JSON locales, servies depuis la mémoire
+
+Endpoints:
+- GET /status.json  état courant de chaque service (JSON)
+- GET /             page de statut minimale (HTML)
+- GET /events       flux Server-Sent Events des résultats (voir events.py)
+
+Les réponses sont rendues depuis le StatusSnapshot, une seule fois par
+version du snapshot, et portent un ETag: un client qui renvoie
+If-None-Match reçoit 304 tant que l'état n'a pas changé. Aucune requête
+ne touche SQLite.
+"""
+
+import asyncio
+import html
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from aiohttp import web
+
+from src.state import StatusSnapshot
+from src.web.events import EventBroker, Subscriber
+
+logger = logging.getLogger(__name__)
+
+# Intervalle des commentaires de maintien de connexion SSE (secondes)
+SSE_HEARTBEAT = 15
+
+# Attente maximale des requêtes en cours à l'arrêt (secondes), sous le délai de `docker stop`
+SHUTDOWN_TIMEOUT = 2.0
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(timespec='seconds') if value else None
+
+
+def service_payload(result, since: Optional[datetime] = None) -> Dict:
+    """Représentation JSON d'un résultat de vérification"""
+    payload = {
+        'name': result.service_name,
+        'status': 'up' if result.is_healthy else 'down',
+        'response_time': round(result.response_time, 3),
+        'status_code': result.status_code,
+        'error': result.error,
+        'checked_at': _iso(result.timestamp),
+        'since': _iso(since),
+    }
+    if getattr(result, 'unreachable', False):
+        payload['unreachable'] = True
+    if getattr(result, 'timeout', None) is not None:
+        payload['timeout'] = result.timeout
+    if getattr(result, 'hedged', False):
+        payload['hedged'] = True
+    if getattr(result, 'hedge_rate', None) is not None:
+        payload['hedge_rate'] = result.hedge_rate
+    if getattr(result, 'backoff', False):
+        payload['next_probe_at'] = _iso(result.next_probe_at)
+    if getattr(result, 'root_causes', None):
+        payload['root_causes'] = list(result.root_causes)
+    if getattr(result, 'services', None):
+        payload['services'] = [service_payload(r) for r in result.services]
+    return payload
+
+
+def status_payload(snapshot: StatusSnapshot) -> Dict:
+    """Représentation JSON du snapshot complet"""
+    services = [
+        service_payload(result, snapshot.since.get(name))
+        for name, result in sorted(snapshot.services.items())
+    ]
+    down = sum(1 for s in services if s['status'] == 'down')
+    return {
+        'status': 'down' if down else 'up',
+        'updated_at': _iso(snapshot.updated_at),
+        'version': snapshot.version,
+        'summary': {'up': len(services) - down, 'down': down},
+        'services': services,
+    }
+
+
+def render_html(payload: Dict) -> str:
+    """Page de statut minimale"""
+    rows = []
+    for service in payload['services']:
+        icon = "✅" if service['status'] == 'up' else "🔴"
+        detail = html.escape(service['error'] or '')
+        if service.get('unreachable'):
+            detail = detail or "Injoignable"
+        rows.append(
+            f"<tr class=\"{service['status']}\"><td>{icon}</td>"
+            f"<td>{html.escape(service['name'])}</td>"
+            f"<td>{service['response_time']:.2f}s</td>"
+            f"<td>{html.escape(service['since'] or '-')}</td>"
+            f"<td>{detail}</td></tr>"
+        )
+    
+    title = "Tous les services sont opérationnels" if payload['status'] == 'up' else (
+        f"{payload['summary']['down']} service(s) indisponible(s)"
+    )
+    return (
+        "<!DOCTYPE html>\n<html lang=\"fr\"><head><meta charset=\"utf-8\">"
+        "<meta http-equiv=\"refresh\" content=\"30\">"
+        "<title>Homebox Control Plane</title>"
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+        "td,th{padding:.4em .8em;border-bottom:1px solid #ddd;text-align:left}"
+        "tr.down{background:#fdecea}</style></head><body>"
+        f"<h1>{html.escape(title)}</h1>"
+        "<table><tr><th></th><th>Service</th><th>Réponse</th><th>Depuis</th><th>Détail</th></tr>"
+        + "".join(rows) +
+        f"</table><p>Mis à jour: {html.escape(payload['updated_at'] or '-')}</p>"
+        "</body></html>\n"
+    )
+
+
+class StatusServer:
+    """Serveur HTTP de statut (aiohttp), rendu mis en cache par version"""
+    
+    def __init__(self, snapshot: StatusSnapshot, host: str = "127.0.0.1", port: int = 8765,
+                 broker: Optional[EventBroker] = None):
+        self.snapshot = snapshot
+        self.host = host
+        self.port = port
+        self.broker = broker
+        
+        # Préfixe d'ETag propre au processus: un redémarrage invalide les caches clients
+        self._boot = format(int(time.time()), 'x')
+        self._cache: Dict[str, Tuple[int, str, bytes]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        # Flux /events ouverts, fermés par stop()
+        self._streams: Set[Subscriber] = set()
+        
+        self.app = web.Application()
+        self.app.router.add_get('/status.json', self.handle_json)
+        self.app.router.add_get('/', self.handle_html)
+        if broker:
+            self.app.router.add_get('/events', self.handle_events)
+    
+    def _render(self, kind: str) -> Tuple[str, bytes]:
+        """(ETag, corps) du rendu courant, recalculé si le snapshot a changé"""
+        version = self.snapshot.version
+        cached = self._cache.get(kind)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        
+        payload = status_payload(self.snapshot)
+        if kind == 'json':
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        else:
+            body = render_html(payload).encode('utf-8')
+        etag = f'W/"{self._boot}-{version}"'
+        self._cache[kind] = (version, etag, body)
+        return etag, body
+    
+    def _respond(self, request: web.Request, kind: str, content_type: str) -> web.Response:
+        etag, body = self._render(kind)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in (tag.strip() for tag in if_none_match.split(',')) or if_none_match.strip() == '*':
+            return web.Response(status=304, headers=headers)
+        
+        return web.Response(body=body, content_type=content_type, charset='utf-8', headers=headers)
+    
+    async def handle_json(self, request: web.Request) -> web.Response:
+        return self._respond(request, 'json', 'application/json')
+    
+    async def handle_html(self, request: web.Request) -> web.Response:
+        return self._respond(request, 'html', 'text/html')
+    
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        """Flux SSE: état courant des services filtrés, puis chaque résultat"""
+        services = request.query.getall('service', [])
+        tags = request.query.getall('tag', [])
+        subscriber = self.broker.subscribe(services, tags)
+        self._streams.add(subscriber)
+        
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+        await response.prepare(request)
+        
+        try:
+            # Point de départ: dernier résultat connu de chaque service filtré
+            for name, result in sorted(self.snapshot.services.items()):
+                if subscriber.matches(*self.broker.scope(result)):
+                    await response.write(EventBroker.encode(
+                        'result', service_payload(result, self.snapshot.since.get(name))
+                    ))
+            
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    await response.write(b": ping\n\n")
+                    continue
+                if message is None:  # Abonné déconnecté (trop lent, ou arrêt du serveur)
+                    break
+                await response.write(message)
+        except ConnectionResetError:
+            pass
+        finally:
+            # Annulation (arrêt, client parti): nettoyer puis laisser remonter
+            self._streams.discard(subscriber)
+            self.broker.unsubscribe(subscriber)
+        
+        return response
+    
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None, shutdown_timeout=SHUTDOWN_TIMEOUT)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"🌐 Page de statut: http://{self.host}:{self.port}/ (JSON: /status.json)")
+    
+    async def stop(self):
+        # Réveiller les flux /events: sinon l'arrêt attend leurs clients
+        for subscriber in list(self._streams):
+            subscriber.drop()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
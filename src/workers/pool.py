@@ -0,0 +1,316 @@
+"""
+Probe Worker Pool
+Exécute les sondes dans plusieurs processus, chacun avec sa propre boucle asyncio
+
+Le coordinateur (ControlPlane) répartit les service checkers entre N
+processus workers. Chaque worker recrée ses checkers à partir de leur
+`spec()`, sonde sa partition à la demande et renvoie des enregistrements
+compacts via un pipe. L'historique, l'agrégation et les notifications
+restent dans le processus coordinateur, les temps de réponse sont donc
+mesurés sans subir sa charge.
+"""
+
+import asyncio
+import importlib
+import itertools
+import logging
+import multiprocessing
+import signal
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.logging_setup import configure_worker, worker_logging
+
+logger = logging.getLogger(__name__)
+
+# Attributs optionnels des résultats transmis en plus des champs de base
+RECORD_EXTRAS = ('critical', 'description', 'phases', 'hedged')
+
+# Paramètres de sonde fixés par le coordinateur à chaque demande
+PROBE_OVERRIDES = ('timeout', 'hedge_after')
+
+
+def to_record(result) -> Tuple:
+    """Convertir un ServiceStatus en enregistrement compact (picklable)"""
+    extras = {
+        name: getattr(result, name)
+        for name in RECORD_EXTRAS
+        if hasattr(result, name)
+    }
+    return (
+        result.service_name,
+        result.is_healthy,
+        result.response_time,
+        result.status_code,
+        result.error,
+        result.timestamp.timestamp(),
+        extras
+    )
+
+
+def from_record(record: Tuple):
+    """Reconstruire un ServiceStatus à partir d'un enregistrement compact"""
+    from app import ServiceStatus
+    
+    name, is_healthy, response_time, status_code, error, timestamp, extras = record
+    result = ServiceStatus(
+        service_name=name,
+        is_healthy=is_healthy,
+        response_time=response_time,
+        status_code=status_code,
+        error=error
+    )
+    result.timestamp = datetime.fromtimestamp(timestamp)
+    for attr, value in extras.items():
+        setattr(result, attr, value)
+    return result
+
+
+def _worker_main(conn, specs: List[Tuple[str, str, Dict]], log_settings: Optional[Tuple] = None):
+    """Point d'entrée d'un processus worker"""
+    # L'arrêt est piloté par le coordinateur
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    
+    # Logs écrits par le thread d'écriture du coordinateur
+    configure_worker(log_settings)
+    
+    checkers = {}
+    for module_name, class_name, kwargs in specs:
+        checker_class = getattr(importlib.import_module(module_name), class_name)
+        checkers[kwargs['name']] = checker_class(**kwargs)
+    
+    asyncio.run(_worker_loop(conn, checkers))
+    conn.close()
+
+
+async def _worker_loop(conn, checkers: Dict):
+    """Boucle d'un worker: attendre les demandes de sondage et y répondre"""
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+    
+    def on_readable():
+        try:
+            inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # Coordinateur disparu
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait(None)
+    
+    loop.add_reader(conn.fileno(), on_readable)
+    
+    async def probe(request_id: int, targets: List[Tuple[str, Dict]]):
+        # Timeout adaptatif et délai de relance fixés par le coordinateur
+        for name, overrides in targets:
+            for attr, value in overrides.items():
+                setattr(checkers[name], attr, value)
+        results = await asyncio.gather(
+            *[checkers[name].check() for name, _ in targets],
+            return_exceptions=True
+        )
+        records = [
+            None if isinstance(result, Exception) else to_record(result)
+            for result in results
+        ]
+        conn.send(('result', request_id, records))
+    
+    pending = set()
+    while True:
+        message = await inbox.get()
+        if message is None or message[0] == 'stop':
+            break
+        
+        _, request_id, targets = message
+        task = asyncio.create_task(probe(request_id, targets))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    loop.remove_reader(conn.fileno())
+
+
+class ProbeWorkerPool:
+    """Pool de processus de sondage piloté par le coordinateur"""
+    
+    def __init__(self, num_workers: int):
+        """
+        Args:
+            num_workers: Nombre de processus workers
+        """
+        self.num_workers = num_workers
+        self._processes: List[multiprocessing.Process] = []
+        self._connections: List = []
+        
+        # Nom du service -> index du worker
+        self._assignment: Dict[str, int] = {}
+        
+        # Demande -> (future, réponses attendues, enregistrements par nom)
+        self._pending: Dict[int, Tuple[asyncio.Future, set, Dict]] = {}
+        self._request_ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def start(self, service_checkers: List):
+        """
+        Répartir les service checkers et démarrer les workers
+        
+        Args:
+            service_checkers: Checkers individuels exposant `name` et `spec()`
+        """
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context('spawn')
+        log_settings = worker_logging(context)
+        
+        # Répartition déterministe (tri par nom puis round-robin)
+        ordered = sorted(service_checkers, key=lambda c: c.name)
+        count = max(1, min(self.num_workers, len(ordered)))
+        partitions: List[List[Tuple[str, str, Dict]]] = [[] for _ in range(count)]
+        
+        for index, checker in enumerate(ordered):
+            worker_index = index % count
+            self._assignment[checker.name] = worker_index
+            partitions[worker_index].append(
+                (type(checker).__module__, type(checker).__qualname__, checker.spec())
+            )
+        
+        for worker_index, specs in enumerate(partitions):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child_conn, specs, log_settings),
+                name=f"probe-worker-{worker_index}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            
+            self._loop.add_reader(parent_conn.fileno(), self._on_readable, worker_index)
+            self._processes.append(process)
+            self._connections.append(parent_conn)
+            
+            logger.info(
+                f"⚙️ Worker {worker_index} démarré (pid {process.pid}): "
+                f"{', '.join(spec[2]['name'] for spec in specs)}"
+            )
+    
+    def pids(self) -> List[int]:
+        """PID des workers en cours d'exécution"""
+        return [p.pid for p in self._processes if p.pid and p.is_alive()]
+    
+    def _on_readable(self, worker_index: int):
+        """Réception d'une réponse d'un worker"""
+        conn = self._connections[worker_index]
+        try:
+            _, request_id, records = conn.recv()
+        except (EOFError, OSError):
+            logger.error(f"❌ Worker {worker_index} arrêté de manière inattendue")
+            self._loop.remove_reader(conn.fileno())
+            self._fail_worker(worker_index)
+            return
+        
+        entry = self._pending.get(request_id)
+        if entry is None:
+            return
+        
+        future, waiting, received = entry
+        for record in records:
+            if record is not None:
+                received[record[0]] = record
+        waiting.discard(worker_index)
+        
+        if not waiting and not future.done():
+            future.set_result(received)
+    
+    def _fail_worker(self, worker_index: int):
+        """Débloquer les demandes en attente d'un worker disparu"""
+        for future, waiting, received in self._pending.values():
+            waiting.discard(worker_index)
+            if not waiting and not future.done():
+                future.set_result(received)
+    
+    async def run(self, checkers: List) -> List:
+        """
+        Sonder une liste de service checkers via les workers
+        
+        Les checkers inconnus du pool sont exécutés localement.
+        
+        Returns:
+            Résultats dans l'ordre des checkers (Exception si échec)
+        """
+        from app import ServiceStatus
+        
+        by_worker: Dict[int, List[Tuple[str, Dict]]] = {}
+        local = []
+        for checker in checkers:
+            worker_index = self._assignment.get(checker.name)
+            if worker_index is None or not self._processes[worker_index].is_alive():
+                local.append(checker)
+            else:
+                overrides = {
+                    attr: getattr(checker, attr)
+                    for attr in PROBE_OVERRIDES
+                    if hasattr(checker, attr)
+                }
+                by_worker.setdefault(worker_index, []).append((checker.name, overrides))
+        
+        received: Dict[str, Tuple] = {}
+        if by_worker:
+            request_id = next(self._request_ids)
+            future = self._loop.create_future()
+            self._pending[request_id] = (future, set(by_worker), received)
+            try:
+                for worker_index, targets in by_worker.items():
+                    self._connections[worker_index].send(('probe', request_id, targets))
+                
+                # Chaque sonde est bornée par son propre timeout, marge pour les workers bloqués
+                deadline = max(getattr(c, 'timeout', 10) for c in checkers) * 2 + 5
+                done, _ = await asyncio.wait({future}, timeout=deadline)
+                if not done:
+                    logger.error(f"⏱️ Workers de sondage sans réponse après {deadline}s")
+            finally:
+                del self._pending[request_id]
+        
+        local_results = dict(zip(
+            (checker.name for checker in local),
+            await asyncio.gather(*[c.check() for c in local], return_exceptions=True)
+        ))
+        
+        results = []
+        for checker in checkers:
+            if checker.name in local_results:
+                results.append(local_results[checker.name])
+            elif checker.name in received:
+                results.append(from_record(received[checker.name]))
+            else:
+                results.append(ServiceStatus(
+                    service_name=checker.name,
+                    is_healthy=False,
+                    response_time=0,
+                    error="Worker de sondage indisponible"
+                ))
+        return results
+    
+    async def stop(self, timeout: float = 5.0):
+        """Arrêter proprement les workers"""
+        for conn in self._connections:
+            try:
+                self._loop.remove_reader(conn.fileno())
+                conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+        
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            remaining = max(0.0, deadline - time.monotonic())
+            await self._loop.run_in_executor(None, process.join, remaining)
+            if process.is_alive():
+                process.terminate()
+        
+        for conn in self._connections:
+            conn.close()
+        
+        self._processes.clear()
+        self._connections.clear()
+        self._assignment.clear()
+        logger.info("Workers de sondage arrêtés")
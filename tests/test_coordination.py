@@ -0,0 +1,215 @@
+"""
+Tests de la coordination multi-instances
+
+Les instances partagent un fichier SQLite temporaire. Les services sondés
+pointent vers un port local fermé (DOWN immédiat).
+
+Lancement: python -m pytest tests/  (ou python -m unittest discover tests)
+"""
+
+import json
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute()))
+
+from app import ControlPlane
+from src.checkers.neron import NeronChecker
+from src.config import Config
+from src.database.coordination import HashRing, LeaseCoordinator, SQLiteCoordinationBackend
+from src.database.history import HistoryManager
+
+
+def closed_port() -> int:
+    """Port local sur lequel rien n'écoute"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RecordingNotifier:
+    """Notificateur qui enregistre les messages au lieu de les envoyer"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send_alert(self, message: str):
+        self.sent.append(('alert', message))
+    
+    async def send_success(self, message: str):
+        self.sent.append(('success', message))
+    
+    async def send_warning(self, message: str):
+        self.sent.append(('warning', message))
+    
+    async def send_info(self, message: str):
+        self.sent.append(('info', message))
+
+
+class HashRingTest(unittest.TestCase):
+    
+    def test_removing_a_node_only_moves_its_keys(self):
+        """Le départ d'une instance ne réattribue que ses propres cibles"""
+        keys = [f"service-{i}" for i in range(200)]
+        before = HashRing(["a", "b", "c"])
+        after = HashRing(["a", "b"])
+        
+        owners = {key: before.get_node(key) for key in keys}
+        self.assertEqual(set(owners.values()), {"a", "b", "c"})
+        for key, owner in owners.items():
+            if owner != "c":
+                self.assertEqual(after.get_node(key), owner)
+            self.assertIn(after.get_node(key), ("a", "b"))
+    
+    def test_empty_ring(self):
+        self.assertIsNone(HashRing([]).get_node("service"))
+
+
+class LeaseCoordinatorTest(unittest.IsolatedAsyncioTestCase):
+    
+    TARGETS = [f"service-{i}" for i in range(8)]
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = str(Path(self.tmp.name) / "coordination.db")
+    
+    def make_coordinator(self, instance_id: str, lease_ttl: float = 30) -> LeaseCoordinator:
+        backend = SQLiteCoordinationBackend(self.db_path)
+        self.addCleanup(backend.close)
+        coordinator = LeaseCoordinator(backend, instance_id, lease_ttl=lease_ttl)
+        coordinator.set_targets(self.TARGETS)
+        return coordinator
+    
+    def held(self, coordinator: LeaseCoordinator):
+        return {target for target in self.TARGETS if coordinator.holds(target)}
+    
+    def test_lease_blocks_other_holders_until_expiry(self):
+        """Un bail tenu ne peut être pris qu'après son expiration"""
+        backend = SQLiteCoordinationBackend(self.db_path)
+        self.addCleanup(backend.close)
+        
+        self.assertTrue(backend.acquire("service", "a", 0.2))
+        self.assertTrue(backend.acquire("service", "a", 0.2))  # Renouvellement
+        self.assertFalse(backend.acquire("service", "b", 0.2))
+        
+        time.sleep(0.25)
+        self.assertTrue(backend.acquire("service", "b", 0.2))
+        self.assertFalse(backend.acquire("service", "a", 0.2))
+    
+    def test_targets_split_between_instances(self):
+        """Deux instances se partagent les cibles sans recouvrement"""
+        a = self.make_coordinator("a")
+        b = self.make_coordinator("b")
+        
+        self.assertEqual(set(a.refresh()), set(self.TARGETS))  # Seule instance vivante
+        b.refresh()  # Part de b encore tenue par a
+        self.assertEqual(self.held(b), set())
+        a.refresh()  # a rend la part de b
+        b.refresh()
+        
+        self.assertTrue(self.held(a))
+        self.assertTrue(self.held(b))
+        self.assertEqual(self.held(a) & self.held(b), set())
+        self.assertEqual(self.held(a) | self.held(b), set(self.TARGETS))
+    
+    def test_takeover_after_instance_dies(self):
+        """Les baux d'une instance qui ne renouvelle plus sont repris à expiration"""
+        a = self.make_coordinator("a", lease_ttl=0.3)
+        b = self.make_coordinator("b", lease_ttl=0.3)
+        a.refresh()
+        b.refresh()
+        a.refresh()
+        b.refresh()
+        lost = self.held(a)
+        self.assertTrue(lost)
+        
+        # a ne renouvelle plus: ni présence, ni baux
+        time.sleep(0.35)
+        self.assertEqual(self.held(a), set())
+        
+        self.assertEqual(set(b.refresh()), lost)
+        self.assertEqual(self.held(b), set(self.TARGETS))
+    
+    async def test_stop_releases_leases_for_immediate_takeover(self):
+        """Un arrêt propre rend les baux: reprise sans attendre leur expiration"""
+        a = self.make_coordinator("a", lease_ttl=60)
+        b = self.make_coordinator("b", lease_ttl=60)
+        a.refresh()
+        
+        await a.stop()
+        
+        self.assertEqual(set(b.refresh()), set(self.TARGETS))
+
+
+class CoordinatedControlPlaneTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "history.db")
+        self.config = Config(config_file=str(Path(self.tmp.name) / "absent.yaml"),
+                             require_telegram=False)
+        self.config.anomaly_detection = False
+        self.config.coordination_db_path = self.db_path
+        self.config.instance_id = "instance-a"
+        self.config.lease_ttl = 30
+    
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+    
+    def make_control_plane(self, services) -> ControlPlane:
+        config_file = Path(self.tmp.name) / "neron.json"
+        config_file.write_text(json.dumps({
+            "base_url": "http://127.0.0.1",
+            "services": services,
+            "settings": {"timeout": 1, "check_parallel": True}
+        }))
+        
+        self.notifier = RecordingNotifier()
+        cp = ControlPlane.for_replay(self.config, self.notifier)
+        cp.history = HistoryManager(self.db_path)
+        cp.worker_pool = None
+        cp.checkers = [NeronChecker(config_file=str(config_file))]
+        self.addCleanup(cp.history.close)
+        return cp
+    
+    async def test_single_service_group_alerts_under_lease(self):
+        """Un groupe d'un seul service alerte: le bail est tenu sur le nom du groupe"""
+        cp = self.make_control_plane([{"name": "Neron Main", "port": closed_port()}])
+        cp.start_coordination()
+        try:
+            self.assertTrue(cp.owns("Neron"))
+            self.assertFalse(cp.owns("Neron Main"))
+            
+            results = await cp.check_all()
+        finally:
+            await cp.coordinator.stop()
+        
+        self.assertEqual([r.service_name for r in results], ["Neron Main"])
+        alerts = [message for kind, message in self.notifier.sent if kind == 'alert']
+        self.assertEqual(len(alerts), 1)
+        self.assertIn("Neron Main", alerts[0])
+    
+    async def test_seed_state_of_single_service_group(self):
+        """Reprise d'un bail: l'état est relu sous le nom du service du groupe"""
+        cp = self.make_control_plane([{"name": "Neron Main", "port": closed_port()}])
+        cp.history.add_check("Neron Main", is_healthy=False, response_time=0)
+        
+        cp.start_coordination()
+        try:
+            self.assertIs(cp.previous_states.get("Neron Main"), False)
+            
+            # DOWN déjà connu: pas de nouvelle alerte après la reprise
+            await cp.check_all()
+        finally:
+            await cp.coordinator.stop()
+        
+        self.assertEqual(self.notifier.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Tests de l'historique: transitions d'état, uptime pondéré par le temps et
+stockage compressé en runs (history_storage: rle)
+
+Chaque test utilise une base SQLite temporaire.
+
+Lancement: python -m pytest tests/  (ou python -m unittest discover tests)
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute()))
+
+from src.database import transitions
+from src.database.history import HistoryManager
+
+
+class HistoryTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = str(Path(self.tmp.name) / "history.db")
+    
+    def open_history(self, **kwargs) -> HistoryManager:
+        history = HistoryManager(self.db_path, read_connections=1, **kwargs)
+        self.addCleanup(history.close)
+        return history
+    
+    def rows(self, history: HistoryManager, query: str):
+        return [tuple(row) for row in history.conn.execute(query).fetchall()]
+
+
+class StateTransitionsTest(HistoryTestCase):
+    
+    def test_one_transition_per_state_change(self):
+        """Seuls les changements d'état ajoutent une transition"""
+        history = self.open_history()
+        for healthy in [True, True, False, False, False, True]:
+            history.add_check("Homebox", healthy, 0.1, error=None if healthy else "HTTP 503")
+        
+        self.assertEqual(
+            self.rows(history, "SELECT is_healthy, error FROM state_transitions ORDER BY id"),
+            [(1, None), (0, "HTTP 503"), (1, None)]
+        )
+    
+    def test_backfill_from_existing_checks(self):
+        """Une base antérieure aux transitions les reconstruit depuis `checks`"""
+        start = datetime(2026, 3, 2, 12, 0)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE checks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, service_name TEXT NOT NULL,
+                timestamp DATETIME NOT NULL, is_healthy BOOLEAN NOT NULL,
+                response_time REAL NOT NULL, status_code INTEGER, error TEXT
+            )
+        """)
+        for minute, healthy in enumerate([True, False, False, True, True]):
+            conn.execute(
+                "INSERT INTO checks (service_name, timestamp, is_healthy, response_time) "
+                "VALUES (?, ?, ?, ?)",
+                ("Homebox", start + timedelta(minutes=minute), healthy, 0.1)
+            )
+        conn.commit()
+        conn.close()
+        
+        history = self.open_history()
+        
+        self.assertEqual(
+            self.rows(history, "SELECT is_healthy FROM state_transitions ORDER BY timestamp"),
+            [(1,), (0,), (1,)]
+        )
+    
+    def test_intervals_merge_repeated_states(self):
+        """Transitions répétées (ex: deux instances) fusionnées, état initial repris avant la période"""
+        base = datetime(2026, 3, 2, 12, 0)
+        history = self.open_history()
+        for minutes, healthy in [(0, True), (10, False), (15, False), (30, True)]:
+            history.conn.execute(
+                "INSERT INTO state_transitions (service_name, timestamp, is_healthy) VALUES (?, ?, ?)",
+                ("Homebox", base + timedelta(minutes=minutes), healthy)
+            )
+        history.conn.commit()
+        
+        since, until = base + timedelta(minutes=5), base + timedelta(minutes=60)
+        intervals = transitions.load_intervals(history.conn, since, until)["Homebox"]
+        
+        self.assertEqual(intervals, [
+            (base, base + timedelta(minutes=10), True, None),
+            (base + timedelta(minutes=10), base + timedelta(minutes=30), False, None),
+            (base + timedelta(minutes=30), None, True, None),
+        ])
+        
+        # 35 min UP et 20 min DOWN sur les 55 min de la période
+        stats = transitions.reliability(intervals, since, until)
+        self.assertAlmostEqual(stats['uptime'], 35 / 55 * 100)
+        self.assertEqual(stats['incidents'], 1)
+        self.assertEqual(stats['downtime'], 20 * 60)
+        self.assertEqual(stats['mttr'], 20 * 60)
+        self.assertEqual(stats['mtbf'], 35 * 60)
+
+
+class RunLengthStorageTest(HistoryTestCase):
+    
+    def add_checks(self, history: HistoryManager, checks):
+        for healthy, response_time, status_code in checks:
+            history.add_check("Homebox", healthy, response_time, status_code=status_code,
+                              error=None if healthy else "HTTP 503")
+    
+    def test_runs_split_on_state_and_latency_changes(self):
+        """Ligne brute à chaque changement d'état, de code HTTP ou de latence, run entre deux"""
+        history = self.open_history(storage='rle', rle_latency_band=0.5)
+        self.add_checks(history,
+                        [(True, 0.1, 200)] * 4 + [(True, 1.0, 200)] * 3 +
+                        [(True, 1.0, 204)] * 2 + [(False, 0.0, 503)] * 3)
+        history.flush()
+        
+        self.assertEqual(
+            self.rows(history, "SELECT response_time, status_code FROM checks ORDER BY id"),
+            [(0.1, 200), (1.0, 200), (1.0, 204), (0.0, 503)]
+        )
+        self.assertEqual(
+            self.rows(history, "SELECT count, is_healthy, status_code FROM check_runs ORDER BY id"),
+            [(3, 1, 200), (2, 1, 200), (1, 1, 204), (2, 0, 503)]
+        )
+        self.assertEqual(self.rows(history, "SELECT SUM(count) FROM check_samples"), [(12,)])
+    
+    def test_latency_jitter_stays_in_run(self):
+        """Une latence dans la bande autour de la moyenne prolonge le run"""
+        history = self.open_history(storage='rle', rle_latency_band=0.5)
+        self.add_checks(history, [(True, rt, 200) for rt in (0.10, 0.12, 0.09, 0.11, 0.13)])
+        history.flush()
+        
+        self.assertEqual(len(self.rows(history, "SELECT id FROM checks")), 1)
+        (count, rt_min, rt_max, rt_sum), = self.rows(
+            history, "SELECT count, rt_min, rt_max, rt_sum FROM check_runs"
+        )
+        self.assertEqual(count, 4)
+        self.assertEqual((rt_min, rt_max), (0.09, 0.13))
+        self.assertAlmostEqual(rt_sum, 0.45)
+    
+    def test_recent_checks_merge_raw_rows_and_runs(self):
+        """Lignes brutes et runs présentés ensemble, du plus récent au plus ancien"""
+        history = self.open_history(storage='rle')
+        self.add_checks(history, [(True, 0.1, 200)] * 3 + [(False, 0.0, 503)] * 2)
+        history.flush()
+        
+        recent = history.get_recent_checks("Homebox")
+        
+        self.assertEqual([(r['is_healthy'], r['count']) for r in recent],
+                         [(0, 1), (0, 1), (1, 2), (1, 1)])
+        timestamps = [r['timestamp'] for r in recent]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+    
+    def test_open_runs_written_on_close(self):
+        """Les compteurs des runs ouverts sont écrits à la fermeture"""
+        history = HistoryManager(self.db_path, read_connections=1, storage='rle')
+        self.add_checks(history, [(True, 0.1, 200)] * 6)
+        history.close()
+        
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("SELECT count FROM check_runs").fetchall(), [(5,)])
+        self.assertEqual(conn.execute("SELECT SUM(count) FROM check_samples").fetchall(), [(6,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
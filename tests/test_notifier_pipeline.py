@@ -0,0 +1,309 @@
+"""
+Tests du pipeline de notifications contre des serveurs locaux de substitution
+
+Chaque serveur (webhook, ntfy, API Telegram, SMTP) tourne sur 127.0.0.1 et
+peut être mis en panne (HTTP 503) ou ralenti pour simuler un backend défaillant.
+
+Lancement: python -m pytest tests/  (ou python -m unittest discover tests)
+"""
+
+import asyncio
+import email
+import json
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute()))
+
+from src.notifiers import pipeline
+from src.notifiers.ntfy import NtfyNotifier
+from src.notifiers.pipeline import NotifierPipeline, create_notifier
+from src.notifiers.telegram import TelegramNotifier
+from src.notifiers.webhook import WebhookNotifier
+
+
+class StandInServer:
+    """Serveur HTTP local qui enregistre les requêtes reçues"""
+    
+    def __init__(self):
+        self.down = False
+        self.delay = 0.0
+        self.received = []
+        self.runner = None
+        self.url = None
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.down:
+            return web.Response(status=503, text="indisponible")
+        body = await request.read()
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = body.decode('utf-8')
+        self.received.append({'path': request.path, 'headers': dict(request.headers), 'body': payload})
+        return web.json_response({'ok': True})
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+    
+    async def stop(self):
+        await self.runner.cleanup()
+    
+    def messages(self):
+        return [r['body']['message'] for r in self.received]
+
+
+class StandInSmtpServer:
+    """Serveur SMTP local minimal (sans TLS) qui enregistre les emails reçus"""
+    
+    def __init__(self):
+        self.received = []
+        # Délai avant chaque réponse, par connexion (la première d'abord)
+        self.step_delays = []
+        self.server = None
+        self.port = None
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        delay = self.step_delays.pop(0) if self.step_delays else 0
+        
+        async def reply(line: bytes):
+            await asyncio.sleep(delay)
+            writer.write(line + b"\r\n")
+            await writer.drain()
+        
+        envelope = {'from': None, 'to': []}
+        try:
+            await reply(b"220 stand-in ESMTP")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode('ascii').strip()
+                verb = command[:4].upper()
+                if verb in ('EHLO', 'HELO'):
+                    await reply(b"250 stand-in")
+                elif verb == 'MAIL':
+                    envelope['from'] = command.split(':', 1)[1].strip(' <>')
+                    await reply(b"250 OK")
+                elif verb == 'RCPT':
+                    envelope['to'].append(command.split(':', 1)[1].strip(' <>'))
+                    await reply(b"250 OK")
+                elif verb == 'DATA':
+                    await reply(b"354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data = await reader.readline()
+                        if data in (b".\r\n", b""):
+                            break
+                        lines.append(data)
+                    self.received.append({**envelope, 'email': email.message_from_bytes(b"".join(lines))})
+                    await reply(b"250 OK")
+                elif verb == 'QUIT':
+                    await reply(b"221 Bye")
+                    break
+                else:
+                    await reply(b"250 OK")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class NotifierPipelineTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self._retry_delay = pipeline.RETRY_DELAY
+        pipeline.RETRY_DELAY = 0.01
+        self.server = StandInServer()
+        await self.server.start()
+    
+    async def asyncTearDown(self):
+        pipeline.RETRY_DELAY = self._retry_delay
+        await self.server.stop()
+    
+    def make_pipeline(self, **kwargs) -> NotifierPipeline:
+        options = dict(queue_size=100, timeout=1, failure_threshold=2, reset_timeout=0.1)
+        options.update(kwargs)
+        return NotifierPipeline(**options)
+    
+    async def wait_for(self, condition, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition non atteinte")
+            await asyncio.sleep(0.01)
+    
+    async def test_messages_survive_an_outage(self):
+        """Pendant une panne, les messages attendent puis sont tous livrés dans l'ordre"""
+        notifications = self.make_pipeline()
+        backend_notifier = WebhookNotifier(f"{self.server.url}/hook")
+        notifications.add(backend_notifier)
+        backend = notifications.backends[0]
+        
+        self.server.down = True
+        for i in range(6):
+            await notifications.send_alert(f"m{i}")
+        await self.wait_for(lambda: backend.breaker.state == 'open')
+        self.assertEqual(self.server.received, [])
+        
+        self.server.down = False
+        await asyncio.wait_for(backend.queue.join(), 5)
+        await notifications.close()
+        
+        self.assertEqual(self.server.messages(), [f"m{i}" for i in range(6)])
+        self.assertEqual(backend.dropped, 0)
+        self.assertEqual(backend.breaker.state, 'closed')
+    
+    async def test_overflow_drops_oldest_and_counts_losses(self):
+        """File pleine pendant la panne: les plus anciens sont écartés et comptés"""
+        notifications = self.make_pipeline(queue_size=3)
+        notifications.add(WebhookNotifier(f"{self.server.url}/hook"))
+        backend = notifications.backends[0]
+        
+        self.server.down = True
+        await notifications.send_alert("m0")
+        await self.wait_for(lambda: backend.retrying)
+        for i in range(1, 6):
+            await notifications.send_alert(f"m{i}")
+        
+        self.server.down = False
+        await asyncio.wait_for(backend.queue.join(), 5)
+        await notifications.close()
+        
+        self.assertEqual(self.server.messages(), ["m3", "m4", "m5"])
+        self.assertEqual(backend.dropped, 3)
+    
+    async def test_slow_backend_does_not_delay_others(self):
+        """Un backend qui ne répond pas ne retarde ni l'appelant ni les autres backends"""
+        slow = StandInServer()
+        await slow.start()
+        slow.delay = 5
+        try:
+            notifications = self.make_pipeline(timeout=0.5)
+            notifications.add(WebhookNotifier(f"{slow.url}/hook"))
+            notifications.add(WebhookNotifier(f"{self.server.url}/hook"))
+            
+            start = time.monotonic()
+            await notifications.send_alert("panne")
+            self.assertLess(time.monotonic() - start, 0.1)
+            
+            await self.wait_for(lambda: self.server.received, timeout=0.4)
+            self.assertEqual(self.server.messages(), ["panne"])
+            
+            notifications.backends[0].task.cancel()
+            notifications.backends[0].task = None
+            await notifications.close(timeout=1)
+        finally:
+            await slow.stop()
+    
+    async def test_routing_by_severity(self):
+        """Chaque backend ne reçoit que les gravités qui lui sont routées"""
+        alerts_only = StandInServer()
+        await alerts_only.start()
+        try:
+            notifications = self.make_pipeline()
+            notifications.add(WebhookNotifier(f"{alerts_only.url}/alerts"), ['alert'])
+            notifications.add(WebhookNotifier(f"{self.server.url}/all"))
+            
+            await notifications.send_alert("down")
+            await notifications.send_info("rapport")
+            await notifications.close()
+            
+            self.assertEqual(alerts_only.messages(), ["down"])
+            self.assertEqual(self.server.messages(), ["down", "rapport"])
+            with self.assertRaises(ValueError):
+                notifications.add(WebhookNotifier(self.server.url), ['urgent'])
+        finally:
+            await alerts_only.stop()
+    
+    async def test_telegram_and_ntfy_backends(self):
+        """Formats envoyés par les backends Telegram (API surchargée) et ntfy"""
+        notifications = self.make_pipeline()
+        notifications.add(TelegramNotifier("token", "42", base_url=f"{self.server.url}/bot"))
+        notifications.add(NtfyNotifier(f"{self.server.url}/topic", token="secret"))
+        
+        await notifications.send_warning("<b>Lent</b> &amp; instable")
+        await notifications.close()
+        
+        by_path = {r['path']: r for r in self.server.received}
+        telegram = by_path['/bot/sendMessage']['body']
+        self.assertEqual(telegram['chat_id'], "42")
+        self.assertEqual(telegram['parse_mode'], "HTML")
+        self.assertIn("<b>Lent</b>", telegram['text'])
+        
+        ntfy = by_path['/topic']
+        self.assertEqual(ntfy['body'], "Lent & instable")
+        self.assertEqual(ntfy['headers']['Authorization'], "Bearer secret")
+    
+    async def make_smtp(self, timeout: float = 1) -> StandInSmtpServer:
+        """Serveur SMTP de substitution et pipeline avec son backend smtp"""
+        server = StandInSmtpServer()
+        await server.start()
+        self.addAsyncCleanup(server.stop)
+        
+        config = SimpleNamespace(notifier_timeout=timeout)
+        self.smtp_notifier = create_notifier({
+            'type': 'smtp', 'host': '127.0.0.1', 'port': server.port,
+            'sender': "cp@example.com", 'recipients': ["admin@example.com"],
+            'starttls': False,
+        }, config)
+        self.smtp_pipeline = self.make_pipeline(timeout=timeout)
+        self.smtp_pipeline.add(self.smtp_notifier)
+        return server
+    
+    async def test_smtp_backend(self):
+        """Email texte: sujet selon la gravité, HTML retiré, destinataires"""
+        server = await self.make_smtp()
+        
+        await self.smtp_pipeline.send_alert("<b>Homebox</b> DOWN")
+        await self.smtp_pipeline.close()
+        
+        self.assertEqual(len(server.received), 1)
+        received = server.received[0]
+        self.assertEqual(received['from'], "cp@example.com")
+        self.assertEqual(received['to'], ["admin@example.com"])
+        self.assertEqual(received['email']['Subject'], "[Control Plane] ALERTE")
+        self.assertEqual(received['email'].get_payload().strip(), "Homebox DOWN")
+    
+    async def test_smtp_send_ends_within_pipeline_timeout(self):
+        """Un envoi SMTP trop lent s'arrête avant le nouvel essai: pas d'email en double"""
+        server = await self.make_smtp(timeout=0.5)
+        self.assertLess(self.smtp_notifier.timeout, 0.5)
+        
+        # Première connexion: chaque réponse arrive après 0.2s (envoi complet en ~1.2s)
+        server.step_delays = [0.2]
+        backend = self.smtp_pipeline.backends[0]
+        await self.smtp_pipeline.send_alert("panne")
+        await asyncio.wait_for(backend.queue.join(), 5)
+        
+        # Laisser au premier envoi le temps de se terminer s'il n'a pas été interrompu
+        await asyncio.sleep(1.5)
+        await self.smtp_pipeline.close()
+        
+        self.assertEqual(len(server.received), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests du rejeu de l'historique (python app.py replay)
+
+Lancement: python -m pytest tests/  (ou python -m unittest discover tests)
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(ROOT))
+
+from app import ControlPlane
+from src.checkers.homebox import HomeboxChecker
+from src.config import Config
+from src.database.history import HistoryManager
+from src.replay import replay_command
+
+
+class ReplayTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        # Configurations des groupes relues depuis config/ (comme en production)
+        cwd = os.getcwd()
+        os.chdir(ROOT)
+        self.addCleanup(os.chdir, cwd)
+        
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = str(Path(self.tmp.name) / "history.db")
+        self.config = Config(config_file=str(Path(self.tmp.name) / "absent.yaml"),
+                             require_telegram=False)
+        
+        self.members = sorted(ControlPlane.group_members([HomeboxChecker()]))
+        if len(self.members) < 2:
+            self.skipTest("config/homebox.json sans groupe de plusieurs services")
+    
+    def write_outage(self, start: datetime):
+        """Une panne Homebox: ligne du groupe et de chaque membre à chaque cycle"""
+        history = HistoryManager(self.db_path)
+        try:
+            for cycle, healthy in enumerate([True, True, False, False, True, True]):
+                timestamp = start + timedelta(minutes=cycle)
+                for name in ["Homebox"] + self.members:
+                    history.conn.execute(
+                        "INSERT INTO checks (service_name, timestamp, is_healthy, response_time) "
+                        "VALUES (?, ?, ?, ?)",
+                        (name, timestamp, healthy, 0.1)
+                    )
+            history.conn.commit()
+        finally:
+            history.close()
+    
+    async def replay(self, *argv) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = await replay_command(["--db", self.db_path, *argv], self.config)
+        self.assertEqual(code, 0)
+        return output.getvalue()
+    
+    async def test_group_members_are_not_replayed(self):
+        """Une panne d'un groupe donne une alerte et une récupération, comme en production"""
+        start = datetime.now() - timedelta(hours=1)
+        self.write_outage(start)
+        
+        report = await self.replay("--from", "2h")
+        
+        self.assertIn("Vérifications: 6 ", report)
+        self.assertIn("alert 1,", report)
+        self.assertIn("success 1,", report)
+        self.assertIn("Incidents: 1, détectés 1, manqués 0", report)
+        self.assertIn("- Homebox: 1 incident(s), 1 alerte(s)", report)
+    
+    async def test_member_replayed_when_requested(self):
+        """Un membre demandé explicitement avec --service est rejoué"""
+        start = datetime.now() - timedelta(hours=1)
+        self.write_outage(start)
+        
+        report = await self.replay("--from", "2h", "--service", self.members[0])
+        
+        self.assertIn("Vérifications: 6 ", report)
+        self.assertIn(f"- {self.members[0]}: 1 incident(s), 1 alerte(s)", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
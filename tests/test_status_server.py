@@ -0,0 +1,55 @@
+"""
+Tests de la page de statut locale (flux /events)
+
+Lancement: python -m pytest tests/  (ou python -m unittest discover tests)
+"""
+
+import asyncio
+import socket
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute()))
+
+from src.state import StatusSnapshot
+from src.web.events import EventBroker
+from src.web.status import StatusServer
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class StatusServerTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def test_stop_closes_event_streams(self):
+        """Un client /events connecté ne retarde pas l'arrêt du serveur"""
+        broker = EventBroker()
+        server = StatusServer(StatusSnapshot(), port=free_port(), broker=broker)
+        await server.start()
+        
+        async with aiohttp.ClientSession() as session:
+            response = await session.get(f"http://127.0.0.1:{server.port}/events")
+            while not server._streams:
+                await asyncio.sleep(0.01)
+            
+            start = time.monotonic()
+            await server.stop()
+            self.assertLess(time.monotonic() - start, 1)
+            
+            # Le client voit la fin du flux
+            await asyncio.wait_for(response.content.read(), 1)
+            response.release()
+        
+        self.assertEqual(broker.subscribers, set())
+        self.assertEqual(server._streams, set())
+
+
+if __name__ == '__main__':
+    unittest.main()